@@ -288,9 +288,9 @@ class GameTheoryPlayerV4(Player):
 
         for resource in RESOURCES:
 
-            self.player_state[resource] = game.state.player_state[f"{prefix}{resource}_IN_HAND"]
+            self.player_state[CARD_NAMES[resource]] = game.state.player_state[f"{prefix}{CARD_NAMES[resource]}_IN_HAND"]
 
-            total += game.state.player_state[f"{prefix}{resource}_IN_HAND"]
+            total += game.state.player_state[f"{prefix}{CARD_NAMES[resource]}_IN_HAND"]
 
         self.player_state["TOTAL"] = total
 
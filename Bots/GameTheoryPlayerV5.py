@@ -4,7 +4,7 @@ from typing import List, Literal, Final, Union
 from catanatron import Player
 from catanatron_experimental.cli.cli_players import register_player
 from catanatron.models.enums import *
-from catanatron.models.board import STATIC_GRAPH, get_edges
+from catanatron.models.board import get_edges
 
 @register_player("GT5")
 class GameTheoryPlayerV5(Player):
@@ -260,9 +260,9 @@ class GameTheoryPlayerV5(Player):
 
         for resource in RESOURCES:
 
-            self.player_state[resource] = game.state.player_state[f"{prefix}{resource}_IN_HAND"]
+            self.player_state[CARD_NAMES[resource]] = game.state.player_state[f"{prefix}{CARD_NAMES[resource]}_IN_HAND"]
 
-            total += game.state.player_state[f"{prefix}{resource}_IN_HAND"]
+            total += game.state.player_state[f"{prefix}{CARD_NAMES[resource]}_IN_HAND"]
 
         self.player_state["TOTAL"] = total
 
@@ -0,0 +1,1056 @@
+"""
+Lockstep batched game engine, for running thousands of (random) playouts.
+
+BatchedGames holds N games as structure-of-arrays NumPy tensors (hands, bank,
+buildings, roads, robber, prompts) instead of N State objects, and advances
+all of them one decision at a time: dice, payouts and legality masks are
+computed for every game at once. Only longest road bookkeeping (rare, and
+graph-shaped) runs per game, reusing the board's longest_trail engine.
+
+Rules are the ones of apply_action and generate_playable_actions, so a batch
+replaying a scalar game's log (passing the logged dice, steals and discards
+to step) goes through the same states. Domestic trades are not supported
+(bots never offer them).
+
+Decisions are columns of the current player's block of get_action_space:
+the action id of column c in game g is current_player[g] * block_size + c.
+
+This module needs numpy, which is not a dependency of the core package.
+"""
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from catanatron.game import TURNS_LIMIT
+from catanatron.models.actions import (
+    _build_action_index,
+    _build_action_space,
+    _encoding_key,
+    get_action_space,
+)
+from catanatron.models.board import (
+    EDGE_IDS,
+    EDGE_NODE_MASKS,
+    INCIDENT_EDGES,
+    NODE_EDGE_MASKS,
+    count_edges,
+    iter_bits,
+    longest_trail,
+)
+from catanatron.models.decks import (
+    CITY_COST_FREQDECK,
+    DEVELOPMENT_CARD_COST_FREQDECK,
+    ROAD_COST_FREQDECK,
+    SETTLEMENT_COST_FREQDECK,
+)
+from catanatron.models.enums import (
+    CITY,
+    KNIGHT,
+    MONOPOLY,
+    RESOURCES,
+    ROAD_BUILDING,
+    SETTLEMENT,
+    VICTORY_POINT,
+    YEAR_OF_PLENTY,
+    Action,
+    ActionPrompt,
+    ActionType,
+)
+from catanatron.models.topology import STATIC_TOPOLOGY, get_land_topology
+from catanatron.state_functions import (
+    ACTUAL_VICTORY_POINTS_INDEX,
+    CITIES_AVAILABLE_INDEX,
+    HAS_ARMY_INDEX,
+    HAS_PLAYED_DEV_INDEX,
+    HAS_ROAD_INDEX,
+    HAS_ROLLED_INDEX,
+    LONGEST_ROAD_LENGTH_INDEX,
+    NUM_PLAYER_STATE_FIELDS,
+    PLAYED_KNIGHT_INDEX,
+    PLAYED_OFFSET,
+    ROADS_AVAILABLE_INDEX,
+    SETTLEMENTS_AVAILABLE_INDEX,
+    VICTORY_POINTS_INDEX,
+)
+
+PROMPT_INDEX = {prompt: index for index, prompt in enumerate(ActionPrompt)}
+BUILD_INITIAL_SETTLEMENT = PROMPT_INDEX[ActionPrompt.BUILD_INITIAL_SETTLEMENT]
+BUILD_INITIAL_ROAD = PROMPT_INDEX[ActionPrompt.BUILD_INITIAL_ROAD]
+PLAY_TURN = PROMPT_INDEX[ActionPrompt.PLAY_TURN]
+DISCARD = PROMPT_INDEX[ActionPrompt.DISCARD]
+MOVE_ROBBER = PROMPT_INDEX[ActionPrompt.MOVE_ROBBER]
+
+YEAR_OF_PLENTY_OPTIONS = [
+    (first, second) for i, first in enumerate(RESOURCES) for second in RESOURCES[i:]
+] + [(first,) for first in RESOURCES]
+MARITIME_RATES = (4, 3, 2)
+MARITIME_PAIRS = [(give, get) for give in RESOURCES for get in RESOURCES if give != get]
+NO_PORT, THREE_TO_ONE_PORT = -1, len(RESOURCES)
+
+# Per-kind handlers are looked up by ActionType (see BatchedGames.step)
+SUPPORTED_ACTION_TYPES = (
+    ActionType.ROLL,
+    ActionType.MOVE_ROBBER,
+    ActionType.DISCARD,
+    ActionType.BUILD_ROAD,
+    ActionType.BUILD_SETTLEMENT,
+    ActionType.BUILD_CITY,
+    ActionType.BUY_DEVELOPMENT_CARD,
+    ActionType.PLAY_KNIGHT_CARD,
+    ActionType.PLAY_YEAR_OF_PLENTY,
+    ActionType.PLAY_ROAD_BUILDING,
+    ActionType.PLAY_MONOPOLY,
+    ActionType.MARITIME_TRADE,
+    ActionType.END_TURN,
+)
+
+Policy = Callable[["BatchedGames", np.ndarray], np.ndarray]
+
+
+class BatchedGames:
+    """N games (same map template and number of players) stepped in lockstep.
+
+    Seats (indexes into each game's colors) stand for players. Land nodes,
+    land edges and land tiles are numbered by their position in sorted node
+    ids, sorted edges and map.land_tiles, respectively.
+
+    Attributes:
+        colors (List[Tuple[Color, ...]]): Seating order of each game.
+        player_state (np.ndarray): (N, P, NUM_PLAYER_STATE_FIELDS) ints. Row
+            [g, p] is seat p's row of game g's State.player_state_array.
+        bank (np.ndarray): (N, 5) resource freqdecks.
+        development_deck (np.ndarray): (N, 25) development cards. The first
+            development_deck_size[g] are game g's development_listdeck.
+        node_owner (np.ndarray): (N, V) seat owning each land node, or -1.
+        node_building (np.ndarray): (N, V) SETTLEMENT, CITY or 0 (empty).
+        edge_owner (np.ndarray): (N, E) seat owning each land edge, or -1.
+        network (np.ndarray): (N, P, V) nodes touched by a seat's buildings
+            or roads (board.network_masks).
+        robber (np.ndarray): (N,) land tile index of the robber.
+        prompt (np.ndarray): (N,) index of current prompt in ActionPrompt.
+        winner (np.ndarray): (N,) winning seat, or -1.
+        done (np.ndarray): (N,) games that have a winner or reached TURNS_LIMIT.
+    """
+
+    def __init__(self, states: Sequence, vps_to_win: int = 10, seed=None):
+        """Batches copies of the given states (e.g. [game.state, ...]).
+
+        Args:
+            states (Sequence[State]): Games to batch. Must share the map
+                template (tile shuffles may differ) and number of players.
+            vps_to_win (int, optional): Victory Points needed to win.
+            seed (optional): Seed of the batch's random number generator
+                (dice, steals, discards and the built-in policies).
+        """
+        first = states[0]
+        catan_map = first.board.map
+        self.num_games = len(states)
+        self.num_players = len(first.colors)
+        self.vps_to_win = vps_to_win
+        self.discard_limit = first.discard_limit
+        self.rng = np.random.default_rng(seed)
+        self.colors = [state.colors for state in states]
+
+        # ===== Static tables (shared by all games)
+        self.land_coordinates = tuple(catan_map.land_tiles.keys())
+        self.land_node_ids = sorted(catan_map.land_nodes)
+        self.land_edges = sorted(
+            (min(edge), max(edge))
+            for edge in get_land_topology(catan_map.land_nodes).edges
+        )
+        node_index = {node_id: i for i, node_id in enumerate(self.land_node_ids)}
+        edge_index = {edge: i for i, edge in enumerate(self.land_edges)}
+        self._node_index = node_index
+        self._edge_index = edge_index
+        num_nodes, num_edges = len(self.land_node_ids), len(self.land_edges)
+        num_tiles = len(self.land_coordinates)
+
+        # padded with num_nodes / num_tiles (a column that is always empty)
+        self._node_neighbors = np.full((num_nodes, 3), num_nodes)
+        self._node_tiles = np.full((num_nodes, 3), num_tiles)
+        for node_id, i in node_index.items():
+            neighbors = [
+                node_index[n]
+                for n in STATIC_TOPOLOGY.neighbors[node_id]
+                if n in node_index
+            ]
+            self._node_neighbors[i, : len(neighbors)] = neighbors
+        self._tile_nodes = np.array(
+            [
+                [node_index[n] for n in tile.nodes.values()]
+                for tile in catan_map.land_tiles.values()
+            ]
+        )
+        for t, tile_nodes in enumerate(self._tile_nodes):
+            for i in tile_nodes:
+                self._node_tiles[i, np.argmax(self._node_tiles[i] == num_tiles)] = t
+        self._edge_nodes = np.array(
+            [[node_index[a], node_index[b]] for a, b in self.land_edges]
+        )
+        self._edge_bits = [1 << EDGE_IDS.index(edge) for edge in self.land_edges]
+
+        self._build_layout(get_action_space(first))
+
+        # ===== Per-game state
+        shape = (self.num_games, self.num_players)
+        self.player_state = np.zeros((*shape, NUM_PLAYER_STATE_FIELDS), np.int64)
+        self.bank = np.zeros((self.num_games, len(RESOURCES)), np.int64)
+        self.development_deck = np.zeros((self.num_games, 25), np.int64)
+        self.development_deck_size = np.zeros(self.num_games, np.int64)
+        # with a padding (empty) tile, yielding nothing
+        self.tile_number = np.zeros((self.num_games, num_tiles + 1), np.int64)
+        self.tile_yield = np.zeros((self.num_games, num_tiles + 1, 5), np.int64)
+        self.node_port = np.full((self.num_games, num_nodes), NO_PORT)
+        # like board.payouts, cards yielded per dice number (ignoring robber)
+        self.payouts = np.zeros((*shape[:1], 13, *shape[1:], 5), np.int64)
+        self.trade_rates = np.full((*shape, 5), 4)
+        self.node_owner = np.full((self.num_games, num_nodes), -1)
+        self.node_building = np.zeros((self.num_games, num_nodes), np.int64)
+        self.edge_owner = np.full((self.num_games, num_edges), -1)
+        self.network = np.zeros((*shape, num_nodes), bool)
+        self.last_settlement = np.full(shape, -1)
+        self.robber = np.zeros(self.num_games, np.int64)
+        self.prompt = np.zeros(self.num_games, np.int64)
+        self.current_player = np.zeros(self.num_games, np.int64)
+        self.current_turn = np.zeros(self.num_games, np.int64)
+        self.num_turns = np.zeros(self.num_games, np.int64)
+        self.is_initial_build_phase = np.zeros(self.num_games, bool)
+        self.is_discarding = np.zeros(self.num_games, bool)
+        self.is_moving_knight = np.zeros(self.num_games, bool)
+        self.is_road_building = np.zeros(self.num_games, bool)
+        self.free_roads_available = np.zeros(self.num_games, np.int64)
+        self.road_lengths = np.zeros(shape, np.int64)
+        self.road_color = np.full(self.num_games, -1)
+        self.road_length = np.zeros(self.num_games, np.int64)
+        # Longest road bookkeeping, per game and seat (like Board's)
+        self._road_masks: List[List[int]] = []
+        self._owned_masks: List[List[int]] = []
+        self._components: List[List[List[int]]] = []
+        self._road_order: List[List[int]] = []
+
+        for g, state in enumerate(states):
+            self._load_state(g, state)
+
+        self.winner = np.full(self.num_games, -1)
+        self.done = np.zeros(self.num_games, bool)
+        self._update_done(np.arange(self.num_games))
+
+    def _build_layout(self, action_space):
+        """Column offsets of each action type in a player's block"""
+        self.block_size = len(action_space) // self.num_players
+        self.column_action_types = tuple(
+            action.action_type for action in action_space[: self.block_size]
+        )
+        self._offsets = {}
+        for column, action_type in enumerate(self.column_action_types):
+            self._offsets.setdefault(action_type, column)
+
+        # column => (kind, argument) where kind indexes SUPPORTED_ACTION_TYPES
+        kinds = np.full(self.block_size, -1)
+        for kind, action_type in enumerate(SUPPORTED_ACTION_TYPES):
+            kinds[np.array(self.column_action_types) == action_type] = kind
+        self._column_kind = kinds
+        self._column_argument = np.arange(self.block_size) - np.array(
+            [self._offsets[action_type] for action_type in self.column_action_types]
+        )
+
+    def _load_state(self, g, state):
+        if state.is_resolving_trade:
+            raise ValueError("Can't batch a state resolving a domestic trade")
+        catan_map = state.board.map
+        if (
+            tuple(catan_map.land_tiles.keys()) != self.land_coordinates
+            or len(state.colors) != self.num_players
+        ):
+            raise ValueError("Batched games must share map template and players")
+        if state.discard_limit != self.discard_limit:
+            raise ValueError("Batched games must share discard limit")
+
+        seats = state.color_to_index
+        self.player_state[g] = np.reshape(
+            state.player_state_array, (self.num_players, NUM_PLAYER_STATE_FIELDS)
+        )
+        self.bank[g] = state.resource_freqdeck
+        deck = state.development_listdeck
+        self.development_deck[g, : len(deck)] = deck
+        self.development_deck_size[g] = len(deck)
+
+        for t, tile in enumerate(catan_map.land_tiles.values()):
+            if [self._node_index[n] for n in tile.nodes.values()] != list(
+                self._tile_nodes[t]
+            ):
+                raise ValueError("Batched games must share map template and players")
+            if tile.resource is not None:
+                self.tile_number[g, t] = tile.number
+                self.tile_yield[g, t, tile.resource] = 1
+        for resource, node_ids in catan_map.port_nodes.items():
+            port = THREE_TO_ONE_PORT if resource is None else resource
+            for node_id in node_ids:
+                self.node_port[g, self._node_index[node_id]] = port
+
+        board = state.board
+        for node_id, (color, building_type) in board.buildings.items():
+            node, seat = self._node_index[node_id], seats[color]
+            self.node_owner[g, node] = seat
+            self.node_building[g, node] = building_type
+            indexes = np.array([g]), np.array([seat]), np.array([node])
+            self._add_payouts(*indexes, building_type)
+            self._update_trade_rates(*indexes)
+        for (a, b), color in board.roads.items():
+            if a < b:
+                self.edge_owner[g, self._edge_index[(a, b)]] = seats[color]
+        for color, network_mask in board.network_masks.items():
+            for node_id in iter_bits(network_mask):
+                self.network[g, seats[color], self._node_index[node_id]] = True
+        for color, buildings in state.buildings_by_color.items():
+            if len(buildings[SETTLEMENT]) > 0:
+                last_node_id = buildings[SETTLEMENT][-1]
+                self.last_settlement[g, seats[color]] = self._node_index[last_node_id]
+        self.robber[g] = self.land_coordinates.index(board.robber_coordinate)
+
+        self.prompt[g] = PROMPT_INDEX[state.current_prompt]
+        self.current_player[g] = state.current_player_index
+        self.current_turn[g] = state.current_turn_index
+        self.num_turns[g] = state.num_turns
+        self.is_initial_build_phase[g] = state.is_initial_build_phase
+        self.is_discarding[g] = state.is_discarding
+        self.is_moving_knight[g] = state.is_moving_knight
+        self.is_road_building[g] = state.is_road_building
+        self.free_roads_available[g] = state.free_roads_available
+
+        for color, length in board.road_lengths.items():
+            self.road_lengths[g, seats[color]] = length
+        self.road_color[g] = -1 if board.road_color is None else seats[board.road_color]
+        self.road_length[g] = board.road_length
+        self._road_masks.append([board.road_masks.get(c, 0) for c in state.colors])
+        self._owned_masks.append(
+            [
+                board.settlement_masks.get(c, 0) | board.city_masks.get(c, 0)
+                for c in state.colors
+            ]
+        )
+        self._components.append(
+            [list(board.component_masks.get(c, ())) for c in state.colors]
+        )
+        self._road_order.append([seats[color] for color in board.road_lengths])
+
+    # ===== Decisions
+    def _space_args(self, g):
+        land_nodes = frozenset(self.land_node_ids)
+        return (self.land_coordinates, land_nodes, self.colors[g])
+
+    def action(self, g: int, column: int) -> Action:
+        """Action that column is, for the current player of game g"""
+        action_space = _build_action_space(*self._space_args(g))
+        return action_space[self.current_player[g] * self.block_size + column]
+
+    def column(self, g: int, action: Action) -> int:
+        """Inverse of .action. Drops outcomes (dice, etc...) like encode_action."""
+        action_id = _build_action_index(*self._space_args(g))[_encoding_key(action)]
+        return action_id - self.current_player[g] * self.block_size
+
+    def legal_mask(self) -> np.ndarray:
+        """(N, block_size) bool mask of the current players' playable actions.
+        Rows of finished games are all False."""
+        mask = np.zeros((self.num_games, self.block_size), bool)
+        rows = np.flatnonzero(~self.done)
+        prompt = self.prompt[rows]
+        current = self.current_player[rows]
+        player_state = self.player_state[rows, current]
+        hand = player_state[:, : len(RESOURCES)]
+        offsets = self._offsets
+
+        selected = rows[prompt == BUILD_INITIAL_SETTLEMENT]
+        if len(selected) > 0:
+            start = offsets[ActionType.BUILD_SETTLEMENT]
+            columns = slice(start, start + len(self.land_node_ids))
+            mask[selected, columns] = self._buildable_nodes(selected)
+
+        selected = rows[prompt == BUILD_INITIAL_ROAD]
+        if len(selected) > 0:
+            start = offsets[ActionType.BUILD_ROAD]
+            columns = slice(start, start + len(self.land_edges))
+            last_settlement = self.last_settlement[
+                selected, self.current_player[selected]
+            ][:, None]
+            touches = (self._edge_nodes[:, 0] == last_settlement) | (
+                self._edge_nodes[:, 1] == last_settlement
+            )
+            mask[selected, columns] = touches & (self.edge_owner[selected] == -1)
+
+        selected = rows[prompt == MOVE_ROBBER]
+        if len(selected) > 0:
+            start = offsets[ActionType.MOVE_ROBBER]
+            columns = slice(
+                start, start + len(self.land_coordinates) * self.num_players
+            )
+            mask[selected, columns] = self._robber_mask(selected)
+
+        mask[rows[prompt == DISCARD], offsets[ActionType.DISCARD]] = True
+
+        is_play_turn = prompt == PLAY_TURN
+        is_road_building = is_play_turn & self.is_road_building[rows]
+        has_rolled = player_state[:, HAS_ROLLED_INDEX] == 1
+        before_roll = is_play_turn & ~is_road_building & ~has_rolled
+        after_roll = is_play_turn & ~is_road_building & has_rolled
+        roads_available = player_state[:, ROADS_AVAILABLE_INDEX] > 0
+        can_play = player_state[:, HAS_PLAYED_DEV_INDEX] == 0
+
+        mask[rows[before_roll], offsets[ActionType.ROLL]] = True
+        knight = (before_roll | after_roll) & can_play & (player_state[:, KNIGHT] >= 1)
+        mask[rows[knight], offsets[ActionType.PLAY_KNIGHT_CARD]] = True
+
+        needs_edges = (is_road_building | after_roll) & roads_available
+        if np.any(needs_edges):
+            selected = rows[needs_edges]
+            edges = self._buildable_edges(selected)
+            start = offsets[ActionType.BUILD_ROAD]
+            columns = slice(start, start + len(self.land_edges))
+            has_money = np.all(hand[needs_edges] >= ROAD_COST_FREQDECK, axis=1)
+            free = is_road_building[needs_edges]
+            mask[selected[free | has_money], columns] = edges[free | has_money]
+
+            road_building = (
+                after_roll[needs_edges]
+                & can_play[needs_edges]
+                & (player_state[needs_edges, ROAD_BUILDING] >= 1)
+                & np.any(edges, axis=1)
+            )
+            mask[selected[road_building], offsets[ActionType.PLAY_ROAD_BUILDING]] = True
+
+        if np.any(after_roll):
+            self._fill_turn_mask(mask, rows[after_roll], player_state[after_roll])
+        return mask
+
+    def _fill_turn_mask(self, mask, rows, player_state):
+        """Actions other than ROLL, knights and roads of a rolled PLAY_TURN"""
+        offsets = self._offsets
+        hand = player_state[:, : len(RESOURCES)]
+        current = self.current_player[rows]
+        bank = self.bank[rows]
+        mask[rows, offsets[ActionType.END_TURN]] = True
+
+        num_nodes = len(self.land_node_ids)
+        settle = np.all(hand >= SETTLEMENT_COST_FREQDECK, axis=1) & (
+            player_state[:, SETTLEMENTS_AVAILABLE_INDEX] > 0
+        )
+        if np.any(settle):
+            selected = rows[settle]
+            start = offsets[ActionType.BUILD_SETTLEMENT]
+            mask[selected, start : start + num_nodes] = (
+                self._buildable_nodes(selected)
+                & self.network[selected, self.current_player[selected]]
+            )
+        city = np.all(hand >= CITY_COST_FREQDECK, axis=1) & (
+            player_state[:, CITIES_AVAILABLE_INDEX] > 0
+        )
+        start = offsets[ActionType.BUILD_CITY]
+        mask[rows[city], start : start + num_nodes] = (
+            self.node_owner[rows[city]] == current[city][:, None]
+        ) & (self.node_building[rows[city]] == SETTLEMENT)
+
+        buy = np.all(hand >= DEVELOPMENT_CARD_COST_FREQDECK, axis=1) & (
+            self.development_deck_size[rows] > 0
+        )
+        mask[rows[buy], offsets[ActionType.BUY_DEVELOPMENT_CARD]] = True
+
+        can_play = player_state[:, HAS_PLAYED_DEV_INDEX] == 0
+        monopoly = can_play & (player_state[:, MONOPOLY] >= 1)
+        start = offsets[ActionType.PLAY_MONOPOLY]
+        mask[rows[monopoly], start : start + len(RESOURCES)] = True
+
+        plenty = can_play & (player_state[:, YEAR_OF_PLENTY] >= 1)
+        if np.any(plenty):
+            start = offsets[ActionType.PLAY_YEAR_OF_PLENTY]
+            columns = slice(start, start + len(YEAR_OF_PLENTY_OPTIONS))
+            mask[rows[plenty], columns] = self._year_of_plenty_mask(bank[plenty])
+
+        # Maritime trades, at the lowest rate per resource
+        rates = self.trade_rates[rows, current]
+        gives = np.array([give for give, _ in MARITIME_PAIRS])
+        gets = np.array([get for _, get in MARITIME_PAIRS])
+        can_give = hand >= rates
+        start = offsets[ActionType.MARITIME_TRADE]
+        for i, rate in enumerate(MARITIME_RATES):
+            columns = slice(start + i * len(gives), start + (i + 1) * len(gives))
+            mask[rows, columns] = (
+                (rates[:, gives] == rate) & can_give[:, gives] & (bank[:, gets] > 0)
+            )
+
+    def _buildable_nodes(self, rows):
+        """(n, V) empty nodes not next to a building (distance rule)"""
+        occupied = np.zeros((len(rows), len(self.land_node_ids) + 1), bool)
+        occupied[:, :-1] = self.node_owner[rows] != -1
+        return ~occupied[:, :-1] & ~np.any(occupied[:, self._node_neighbors], axis=2)
+
+    def _buildable_edges(self, rows):
+        """(n, E) empty edges next to a non-enemy node of current player's network"""
+        current = self.current_player[rows]
+        owner = self.node_owner[rows]
+        expandable = self.network[rows, current] & (
+            (owner == -1) | (owner == current[:, None])
+        )
+        return (self.edge_owner[rows] == -1) & (
+            expandable[:, self._edge_nodes[:, 0]]
+            | expandable[:, self._edge_nodes[:, 1]]
+        )
+
+    def _robber_mask(self, rows):
+        """(n, T * P) MOVE_ROBBER columns: (tile, victim slot) pairs"""
+        current = self.current_player[rows]
+        owners = self.node_owner[rows][:, self._tile_nodes]  # (n, T, 6)
+        has_cards = np.sum(self.player_state[rows, :, : len(RESOURCES)], axis=2) >= 1
+        seats = np.arange(self.num_players)
+        victims = np.any(owners[:, :, :, None] == seats, axis=2)  # (n, T, P)
+        victims &= has_cards[:, None, :] & (seats != current[:, None])[:, None, :]
+
+        # slot 0 is "steal from nobody"; slot k > 0 is k-th enemy in seat order
+        slots = np.arange(1, self.num_players)
+        slot_seats = np.where(slots - 1 < current[:, None], slots - 1, slots)
+        by_slot = np.take_along_axis(victims, slot_seats[:, None, :], axis=2)
+        result = np.concatenate(
+            [~np.any(by_slot, axis=2, keepdims=True), by_slot], axis=2
+        )
+        result[np.arange(len(rows)), self.robber[rows]] = False
+        return result.reshape(len(rows), -1)
+
+    def _year_of_plenty_mask(self, bank):
+        """Same options as year_of_plenty_possibilities"""
+        result = np.zeros((len(bank), len(YEAR_OF_PLENTY_OPTIONS)), bool)
+        single_column = len(YEAR_OF_PLENTY_OPTIONS) - len(RESOURCES)
+        for column, (first, second) in enumerate(
+            YEAR_OF_PLENTY_OPTIONS[:single_column]
+        ):
+            if first == second:
+                can_draw = bank[:, first] >= 2
+            else:
+                can_draw = (bank[:, first] >= 1) & (bank[:, second] >= 1)
+            result[:, column] = can_draw
+            for card in (first, second):
+                result[:, single_column + card] |= ~can_draw & (bank[:, card] >= 1)
+        return result
+
+    # ===== Transitions
+    def step(
+        self,
+        columns: np.ndarray,
+        dice: Optional[np.ndarray] = None,
+        stolen: Optional[np.ndarray] = None,
+        discarded: Optional[np.ndarray] = None,
+    ):
+        """Applies one decision (a column of legal_mask) in every unfinished game.
+
+        Columns are assumed legal (see legal_mask). Outcomes are drawn from
+        .rng, unless given (for replaying logs):
+
+        Args:
+            columns (np.ndarray): (N,) decisions. Ignored for finished games.
+            dice (np.ndarray, optional): (N, 2) dice to use for ROLLs.
+            stolen (np.ndarray, optional): (N,) resources robbed by MOVE_ROBBERs.
+            discarded (np.ndarray, optional): (N, 5) freqdecks to DISCARD.
+        """
+        columns = np.asarray(columns)
+        rows = np.flatnonzero(~self.done)
+        kinds = self._column_kind[columns[rows]]
+        arguments = self._column_argument[columns[rows]]
+        if np.any(kinds == -1):
+            raise ValueError("Domestic trades are not supported by BatchedGames")
+
+        handlers = (
+            lambda g, _: self._roll(g, dice),
+            lambda g, argument: self._move_robber(g, argument, stolen),
+            lambda g, _: self._discard(g, discarded),
+            self._build_road,
+            self._build_settlement,
+            self._build_city,
+            lambda g, _: self._buy_development_card(g),
+            lambda g, _: self._play_knight(g),
+            self._play_year_of_plenty,
+            lambda g, _: self._play_road_building(g),
+            self._play_monopoly,
+            self._maritime_trade,
+            lambda g, _: self._end_turn(g),
+        )
+        for kind, handler in enumerate(handlers):
+            selected = kinds == kind
+            if np.any(selected):
+                handler(rows[selected], arguments[selected])
+        self._update_done(rows)
+
+    def play(self, policy: Optional[Policy] = None) -> np.ndarray:
+        """Steps until every game has a winner or reached TURNS_LIMIT.
+
+        Args:
+            policy (Callable, optional): policy(batch, legal_mask) returning
+                one column per game. Defaults to random_policy.
+
+        Returns:
+            np.ndarray: .winner (winning seat per game, -1 if truncated).
+        """
+        policy = policy or random_policy
+        while not np.all(self.done):
+            self.step(policy(self, self.legal_mask()))
+        return self.winner
+
+    def winning_colors(self) -> list:
+        """Winning color of each game (None if no winner)"""
+        return [
+            None if seat == -1 else colors[seat]
+            for colors, seat in zip(self.colors, self.winner)
+        ]
+
+    def _update_done(self, rows):
+        reached = self.player_state[rows, :, ACTUAL_VICTORY_POINTS_INDEX] >= (
+            self.vps_to_win
+        )
+        # like Game.winning_color, last seat with enough points wins
+        last = self.num_players - 1 - np.argmax(reached[:, ::-1], axis=1)
+        self.winner[rows] = np.where(np.any(reached, axis=1), last, -1)
+        self.done[rows] = (self.winner[rows] != -1) | (
+            self.num_turns[rows] >= TURNS_LIMIT
+        )
+
+    def _advance_turn(self, g, direction=1):
+        self.current_player[g] = (self.current_player[g] + direction) % self.num_players
+        self.current_turn[g] = self.current_player[g]
+        self.num_turns[g] += 1
+
+    def _end_turn(self, g):
+        current = self.current_player[g]
+        self.player_state[g, current, HAS_PLAYED_DEV_INDEX] = 0
+        self.player_state[g, current, HAS_ROLLED_INDEX] = 0
+        self._advance_turn(g)
+        self.prompt[g] = PLAY_TURN
+
+    def _roll(self, g, dice):
+        self.player_state[g, self.current_player[g], HAS_ROLLED_INDEX] = 1
+        if dice is None:
+            number = np.sum(self.rng.integers(1, 7, (len(g), 2)), axis=1)
+        else:
+            number = np.sum(dice[g], axis=1)
+
+        seven = g[number == 7]
+        hand_sizes = np.sum(self.player_state[seven, :, : len(RESOURCES)], axis=2)
+        discarders = hand_sizes > self.discard_limit
+        discarding = np.any(discarders, axis=1)
+        self.current_player[seven[discarding]] = np.argmax(
+            discarders[discarding], axis=1
+        )
+        self.prompt[seven[discarding]] = DISCARD
+        self.is_discarding[seven[discarding]] = True
+        self.prompt[seven[~discarding]] = MOVE_ROBBER
+        self.is_moving_knight[seven[~discarding]] = True
+
+        rolled = g[number != 7]
+        number = number[number != 7]
+        payout = self.payouts[rolled, number]  # (n, P, 5)
+        # take back what the robbed tile yields
+        robbed = self.robber[rolled]
+        hit = self.tile_number[rolled, robbed] == number
+        rolled_hit, robbed = rolled[hit], robbed[hit]
+        owners = self.node_owner[rolled_hit[:, None], self._tile_nodes[robbed]]
+        amounts = self.node_building[rolled_hit[:, None], self._tile_nodes[robbed]]
+        seats = np.arange(self.num_players)
+        robbed_amounts = np.sum(amounts[:, :, None] * (owners[:, :, None] == seats), 1)
+        payout[hit] -= (
+            robbed_amounts[:, :, None] * self.tile_yield[rolled_hit, robbed][:, None, :]
+        )
+
+        # depleted resources are not yielded to anyone
+        payout *= (self.bank[rolled] >= np.sum(payout, axis=1))[:, None, :]
+        self.player_state[rolled, :, : len(RESOURCES)] += payout
+        self.bank[rolled] -= np.sum(payout, axis=1)
+        self.prompt[rolled] = PLAY_TURN
+
+    def _discard(self, g, discarded):
+        current = self.current_player[g]
+        hands = self.player_state[g, current, : len(RESOURCES)]
+        if discarded is None:
+            # half the hand at random, like random.sample(hand, k)
+            counts = hands.ravel()
+            rows = np.repeat(np.repeat(np.arange(len(g)), len(RESOURCES)), counts)
+            cards = np.repeat(np.tile(np.arange(len(RESOURCES)), len(g)), counts)
+            order = np.lexsort((self.rng.random(len(cards)), rows))
+            sizes = np.sum(hands, axis=1)
+            ranks = np.arange(len(cards)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+            chosen = order[ranks < np.repeat(sizes // 2, sizes)]
+            to_discard = np.bincount(
+                rows[chosen] * len(RESOURCES) + cards[chosen],
+                minlength=len(g) * len(RESOURCES),
+            ).reshape(len(g), len(RESOURCES))
+        else:
+            to_discard = discarded[g]
+        self.player_state[g, current, : len(RESOURCES)] -= to_discard
+        self.bank[g] += to_discard
+
+        hand_sizes = np.sum(self.player_state[g, :, : len(RESOURCES)], axis=2)
+        left = (hand_sizes > 7) & (np.arange(self.num_players) > current[:, None])
+        more = np.any(left, axis=1)
+        self.current_player[g[more]] = np.argmax(left[more], axis=1)
+        g = g[~more]
+        self.current_player[g] = self.current_turn[g]
+        self.prompt[g] = MOVE_ROBBER
+        self.is_discarding[g] = False
+        self.is_moving_knight[g] = True
+
+    def _move_robber(self, g, argument, stolen):
+        self.robber[g] = argument // self.num_players
+        self.prompt[g] = PLAY_TURN
+        slot = argument % self.num_players
+        g, slot = g[slot > 0], slot[slot > 0]
+        current = self.current_player[g]
+        victim = np.where(slot - 1 < current, slot - 1, slot)
+        if stolen is None:  # a card at random, like player_deck_random_draw
+            cumulative = np.cumsum(
+                self.player_state[g, victim, : len(RESOURCES)], axis=1
+            )
+            draw = np.floor(self.rng.random(len(g)) * cumulative[:, -1])
+            resource = np.sum(cumulative <= draw[:, None], axis=1)
+        else:
+            resource = stolen[g]
+        self.player_state[g, victim, resource] -= 1
+        self.player_state[g, current, resource] += 1
+
+    def _play_development_card(self, g, card):
+        current = self.current_player[g]
+        if card == KNIGHT:
+            has_army = self.player_state[g, :, HAS_ARMY_INDEX] == 1
+            previous = np.where(
+                np.any(has_army, axis=1), np.argmax(has_army, axis=1), -1
+            )
+            previous_size = self.player_state[g, previous, PLAYED_KNIGHT_INDEX]
+        self.player_state[g, current, card] -= 1
+        self.player_state[g, current, HAS_PLAYED_DEV_INDEX] = 1
+        self.player_state[g, current, PLAYED_OFFSET + card] += 1
+        if card == KNIGHT:
+            # like maintain_largest_army
+            size = self.player_state[g, current, PLAYED_KNIGHT_INDEX]
+            wins = (size >= 3) & (
+                (previous == -1) | ((previous_size < size) & (previous != current))
+            )
+            self._award(g[wins], current[wins], previous[wins], HAS_ARMY_INDEX)
+
+    def _award(self, g, winner, loser, flag_index):
+        """Moves longest road / largest army (flag_index) to winner"""
+        self.player_state[g, winner, flag_index] = 1
+        self.player_state[g, winner, VICTORY_POINTS_INDEX] += 2
+        self.player_state[g, winner, ACTUAL_VICTORY_POINTS_INDEX] += 2
+        g, loser = g[loser != -1], loser[loser != -1]
+        self.player_state[g, loser, flag_index] = 0
+        self.player_state[g, loser, VICTORY_POINTS_INDEX] -= 2
+        self.player_state[g, loser, ACTUAL_VICTORY_POINTS_INDEX] -= 2
+
+    def _play_knight(self, g):
+        self._play_development_card(g, KNIGHT)
+        self.prompt[g] = MOVE_ROBBER
+
+    def _play_year_of_plenty(self, g, argument):
+        cards = np.zeros((len(g), len(RESOURCES)), np.int64)
+        for i, option in enumerate(YEAR_OF_PLENTY_OPTIONS):
+            for card in option:
+                cards[argument == i, card] += 1
+        self.player_state[g, self.current_player[g], : len(RESOURCES)] += cards
+        self.bank[g] -= cards
+        self._play_development_card(g, YEAR_OF_PLENTY)
+        self.prompt[g] = PLAY_TURN
+
+    def _play_monopoly(self, g, resource):
+        total = np.sum(self.player_state[g, :, resource], axis=1)
+        self.player_state[g, :, resource] = 0
+        self.player_state[g, self.current_player[g], resource] = total
+        self._play_development_card(g, MONOPOLY)
+        self.prompt[g] = PLAY_TURN
+
+    def _play_road_building(self, g):
+        self._play_development_card(g, ROAD_BUILDING)
+        self.is_road_building[g] = True
+        self.free_roads_available[g] = 2
+        self.prompt[g] = PLAY_TURN
+
+    def _maritime_trade(self, g, argument):
+        current = self.current_player[g]
+        rate = np.array(MARITIME_RATES)[argument // len(MARITIME_PAIRS)]
+        pairs = np.array(MARITIME_PAIRS)[argument % len(MARITIME_PAIRS)]
+        give, get = pairs[:, 0], pairs[:, 1]
+        self.player_state[g, current, give] -= rate
+        self.bank[g, give] += rate
+        self.player_state[g, current, get] += 1
+        self.bank[g, get] -= 1
+        self.prompt[g] = PLAY_TURN
+
+    def _buy_development_card(self, g):
+        current = self.current_player[g]
+        self.development_deck_size[g] -= 1
+        card = self.development_deck[g, self.development_deck_size[g]]
+        self.player_state[g, current, card] += 1
+        self.player_state[g, current, ACTUAL_VICTORY_POINTS_INDEX] += (
+            card == VICTORY_POINT
+        )
+        self.player_state[
+            g, current, : len(RESOURCES)
+        ] -= DEVELOPMENT_CARD_COST_FREQDECK
+        self.bank[g] += DEVELOPMENT_CARD_COST_FREQDECK
+
+    def _build_city(self, g, node):
+        current = self.current_player[g]
+        self.node_building[g, node] = CITY
+        self._add_payouts(g, current, node, 1)
+        self.player_state[g, current, SETTLEMENTS_AVAILABLE_INDEX] += 1
+        self.player_state[g, current, CITIES_AVAILABLE_INDEX] -= 1
+        self.player_state[g, current, VICTORY_POINTS_INDEX] += 1
+        self.player_state[g, current, ACTUAL_VICTORY_POINTS_INDEX] += 1
+        self.player_state[g, current, : len(RESOURCES)] -= CITY_COST_FREQDECK
+        self.bank[g] += CITY_COST_FREQDECK
+
+    def _build_settlement(self, g, node):
+        current = self.current_player[g]
+        self.node_owner[g, node] = current
+        self.node_building[g, node] = SETTLEMENT
+        self.network[g, current, node] = True
+        self._add_payouts(g, current, node, 1)
+        self._update_trade_rates(g, current, node)
+        self.player_state[g, current, SETTLEMENTS_AVAILABLE_INDEX] -= 1
+        self.player_state[g, current, VICTORY_POINTS_INDEX] += 1
+        self.player_state[g, current, ACTUAL_VICTORY_POINTS_INDEX] += 1
+
+        initial = self.is_initial_build_phase[g]
+        self.last_settlement[g[initial], current[initial]] = node[initial]
+        self.prompt[g[initial]] = BUILD_INITIAL_ROAD
+        # second house yields a card per adjacent tile
+        second = initial & (
+            self.player_state[g, current, SETTLEMENTS_AVAILABLE_INDEX] == 3
+        )
+        tiles = self._node_tiles[node[second]]  # (n, 3)
+        cards = np.sum(self.tile_yield[g[second][:, None], tiles], axis=1)
+        self.player_state[g[second], current[second], : len(RESOURCES)] += cards
+        self.bank[g[second]] -= cards
+
+        paid = ~initial
+        self.player_state[
+            g[paid], current[paid], : len(RESOURCES)
+        ] -= SETTLEMENT_COST_FREQDECK
+        self.bank[g[paid]] += SETTLEMENT_COST_FREQDECK
+        for game, seat, node_id, is_initial in zip(
+            g, current, np.array(self.land_node_ids)[node], initial
+        ):
+            previous_road_color = self.road_color[game]
+            self._place_settlement(game, seat, node_id, is_initial)
+            if not is_initial:
+                self._maintain_longest_road(game, previous_road_color)
+
+    def _add_payouts(self, g, seat, node, amount):
+        """Adds amount more buildings of seat on node to .payouts"""
+        for tile in self._node_tiles[node].T:
+            number = self.tile_number[g, tile]
+            np.add.at(
+                self.payouts, (g, number, seat), amount * self.tile_yield[g, tile]
+            )
+
+    def _update_trade_rates(self, g, seat, node):
+        port = self.node_port[g, node]
+        three_to_one = port == THREE_TO_ONE_PORT
+        rates = self.trade_rates[g[three_to_one], seat[three_to_one]]
+        self.trade_rates[g[three_to_one], seat[three_to_one]] = np.minimum(rates, 3)
+        two_to_one = (port != NO_PORT) & ~three_to_one
+        self.trade_rates[g[two_to_one], seat[two_to_one], port[two_to_one]] = 2
+
+    def _build_road(self, g, edge):
+        current = self.current_player[g]
+        self.edge_owner[g, edge] = current
+        self.network[g, current, self._edge_nodes[edge, 0]] = True
+        self.network[g, current, self._edge_nodes[edge, 1]] = True
+        self.player_state[g, current, ROADS_AVAILABLE_INDEX] -= 1
+
+        initial = self.is_initial_build_phase[g]
+        free = ~initial & self.is_road_building[g] & (self.free_roads_available[g] > 0)
+        paid = ~initial & ~free
+        self.player_state[
+            g[paid], current[paid], : len(RESOURCES)
+        ] -= ROAD_COST_FREQDECK
+        self.bank[g[paid]] += ROAD_COST_FREQDECK
+        for game, seat, index, is_initial in zip(g, current, edge, initial):
+            previous_road_color = self.road_color[game]
+            self._place_road(game, seat, self.land_edges[index])
+            if not is_initial:
+                self._maintain_longest_road(game, previous_road_color)
+
+        g_free = g[free]
+        self.free_roads_available[g_free] -= 1
+        finished = (self.free_roads_available[g_free] == 0) | ~np.any(
+            self._buildable_edges(g_free), axis=1
+        )
+        finished |= self.player_state[g_free, current[free], ROADS_AVAILABLE_INDEX] == 0
+        self.is_road_building[g_free[finished]] = False
+        self.free_roads_available[g_free[finished]] = 0
+
+        g_initial = g[initial]
+        num_buildings = np.sum(
+            5 - self.player_state[g_initial, :, SETTLEMENTS_AVAILABLE_INDEX], axis=1
+        )
+        forward = num_buildings < self.num_players
+        backward = (num_buildings > self.num_players) & (
+            num_buildings < 2 * self.num_players
+        )
+        self._advance_turn(g_initial[forward])
+        self._advance_turn(g_initial[backward], -1)
+        self.prompt[g_initial] = BUILD_INITIAL_SETTLEMENT
+        last = g_initial[num_buildings == 2 * self.num_players]
+        self.is_initial_build_phase[last] = False
+        self.prompt[last] = PLAY_TURN
+
+    # ===== Longest road (per game; mirrors Board.build_road / build_settlement)
+    def _enemy_mask(self, g, seat):
+        occupied = 0
+        for owned in self._owned_masks[g]:
+            occupied |= owned
+        return occupied & ~self._owned_masks[g][seat]
+
+    def _component_index(self, g, seat, node_id):
+        for i, nodes in enumerate(self._components[g][seat]):
+            if nodes >> node_id & 1:
+                return i
+
+    def _road_masks_within(self, g, seat, nodes):
+        """Like board.get_component_road_masks: (edges, blocked) of seat in
+        component nodes (a node mask)"""
+        edges = 0
+        for index in iter_bits(self._road_masks[g][seat]):
+            if EDGE_NODE_MASKS[index] & nodes == EDGE_NODE_MASKS[index]:
+                edges |= 1 << index
+        return edges, self._enemy_mask(g, seat) & nodes
+
+    def _bfs_walk(self, g, seat, node_id):
+        road_mask = self._road_masks[g][seat]
+        enemy_mask = self._enemy_mask(g, seat)
+        agenda = [node_id]
+        visited = 0
+        while len(agenda) != 0:
+            n = agenda.pop()
+            visited |= 1 << n
+            if enemy_mask >> n & 1:
+                continue
+            for v, edge_bit in INCIDENT_EDGES[n]:
+                if road_mask & edge_bit and not visited >> v & 1:
+                    agenda.append(v)
+        return visited
+
+    def _place_road(self, g, seat, edge):
+        a, b = edge
+        self._road_masks[g][seat] |= self._edge_bits[self._edge_index[edge]]
+        if seat not in self._road_order[g]:
+            self._road_order[g].append(seat)
+
+        components = self._components[g][seat]
+        enemy_mask = self._enemy_mask(g, seat)
+        a_index = self._component_index(g, seat, a)
+        b_index = self._component_index(g, seat, b)
+        if a_index is None and b_index is not None and not enemy_mask >> a & 1:
+            component = components[b_index] | 1 << a
+            components[b_index] = component
+        elif a_index is not None and b_index is None and not enemy_mask >> b & 1:
+            component = components[a_index] | 1 << b
+            components[a_index] = component
+        elif a_index is not None and b_index is not None and a_index != b_index:
+            component = components[a_index] | components[b_index]
+            for index in sorted([a_index, b_index], reverse=True):
+                del components[index]
+            components.append(component)
+        else:
+            component = components[a_index if a_index is not None else b_index]
+
+        edges, blocked = self._road_masks_within(g, seat, component)
+        if count_edges(edges) > self.road_lengths[g, seat]:
+            candidate_length = len(longest_trail(edges, blocked))
+            self.road_lengths[g, seat] = max(
+                self.road_lengths[g, seat], candidate_length
+            )
+            if candidate_length >= 5 and candidate_length > self.road_length[g]:
+                self.road_color[g] = seat
+                self.road_length[g] = candidate_length
+
+    def _place_settlement(self, g, seat, node_id, initial_build_phase):
+        self._owned_masks[g][seat] |= 1 << node_id
+        if initial_build_phase:
+            self._components[g][seat].append(1 << node_id)
+            return
+
+        incident = NODE_EDGE_MASKS[node_id]
+        for other, road_mask in enumerate(self._road_masks[g]):
+            if other == seat or count_edges(road_mask & incident) != 2:
+                continue
+            # other's road is plowed at node_id: split its component there
+            a, c = [
+                neighbor
+                for neighbor, edge_bit in INCIDENT_EDGES[node_id]
+                if road_mask & edge_bit
+            ]
+            components = self._components[g][other]
+            del components[self._component_index(g, other, node_id)]
+            a_nodes = self._bfs_walk(g, other, a)
+            components.append(a_nodes)
+            if not a_nodes >> c & 1:  # (else a cycle still connects them)
+                components.append(self._bfs_walk(g, other, c))
+
+            self.road_lengths[g, other] = max(
+                len(longest_trail(*self._road_masks_within(g, other, component)))
+                for component in components
+            )
+            best = max(self._road_order[g], key=lambda s: self.road_lengths[g, s])
+            self.road_color[g] = best
+            self.road_length[g] = self.road_lengths[g, best]
+
+    def _maintain_longest_road(self, g, previous_road_color):
+        for seat in self._road_order[g]:
+            self.player_state[g, seat, LONGEST_ROAD_LENGTH_INDEX] = self.road_lengths[
+                g, seat
+            ]
+        road_color = self.road_color[g]
+        if road_color != -1 and previous_road_color != road_color:
+            self._award(
+                np.array([g]),
+                np.array([road_color]),
+                np.array([previous_road_color]),
+                HAS_ROAD_INDEX,
+            )
+
+
+def _sample_columns(games: BatchedGames, mask: np.ndarray, weights=None):
+    """One legal column per row of mask (0 for rows without any), at random
+    with probability proportional to weights[column] (uniform if None)"""
+    active = np.flatnonzero(~games.done)
+    rows, columns = np.nonzero(mask[active])
+    counts = np.zeros(len(mask), np.int64)
+    counts[active] = np.bincount(rows, minlength=len(active))
+    starts = np.cumsum(counts) - counts
+    draw = games.rng.random(len(mask))
+    if weights is None:
+        picks = starts + (draw * counts).astype(np.int64)
+    else:
+        cumulative = np.cumsum(weights[columns])
+        before = np.concatenate([[0], cumulative])[starts]
+        totals = np.concatenate([[0], cumulative])[starts + counts] - before
+        picks = np.searchsorted(cumulative, before + draw * totals, side="right")
+        picks = np.minimum(picks, starts + counts - 1)
+
+    result = np.zeros(len(mask), np.int64)
+    result[counts > 0] = columns[picks[counts > 0]]
+    return result
+
+
+def weighted_policy(weights_by_action_type) -> Policy:
+    """Policy picking a legal column at random, with probability proportional
+    to the weight of its action type (1 if missing), like WeightedRandomPlayer"""
+
+    def policy(games: BatchedGames, mask: np.ndarray) -> np.ndarray:
+        weights = np.array(
+            [weights_by_action_type.get(t, 1) for t in games.column_action_types],
+            np.float64,
+        )
+        return _sample_columns(games, mask, weights)
+
+    return policy
+
+
+def random_policy(games: BatchedGames, mask: np.ndarray) -> np.ndarray:
+    """Picks a legal column uniformly at random, like RandomPlayer"""
+    return _sample_columns(games, mask)
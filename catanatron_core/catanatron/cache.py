@@ -0,0 +1,67 @@
+"""
+On-disk cache of static tables (values that only depend on the code, like
+the board topology or gym feature names), so that short-lived processes
+(workers, CLI invocations) load them instead of rebuilding them on import.
+
+Tables are marshalled into CACHE_DIR, keyed by name, Python version and the
+modification times of the source files they are derived from (so editing
+those invalidates them). CACHE_DIR defaults to ~/.cache/catanatron. Set the
+CATANATRON_CACHE_DIR environment variable to use another directory, or to
+an empty string to disable caching.
+
+Only marshal and os are used, since importing json, hashlib or tempfile
+would cost about as much as building the tables.
+"""
+
+import marshal
+import os
+import sys
+from typing import Any, Callable, Iterable
+
+CACHE_DIR = os.environ.get(
+    "CATANATRON_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "catanatron"),
+)
+
+
+def sources_key(paths: Iterable[str]) -> str:
+    key = sys.version_info[:2]
+    for path in paths:
+        stat = os.stat(path)
+        key += (stat.st_mtime_ns, stat.st_size)
+    # ints (unlike strings) hash the same in every process
+    return format(hash(key) & 0xFFFFFFFFFFFFFFFF, "016x")
+
+
+def cached_table(name: str, build: Callable[[], Any], sources: Iterable[str]):
+    """Loads a table from the cache, or builds it (and caches it).
+
+    Args:
+        name (str): Unique (and file-name safe) name of the table.
+        build (Callable[[], Any]): Builds the table. Must be marshallable
+            (built-in containers of ints, strings, etc.).
+        sources (Iterable[str]): Paths of the files the table is derived from.
+
+    Returns:
+        Any: The table, whether it was built or loaded.
+    """
+    path = None
+    if CACHE_DIR:
+        try:
+            path = os.path.join(CACHE_DIR, f"{name}-{sources_key(sources)}.marshal")
+            with open(path, "rb") as file:
+                return marshal.load(file)
+        except (OSError, EOFError, ValueError, TypeError):  # not cached (or corrupt)
+            pass
+
+    table = build()
+    if path is not None:
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(temporary_path, "wb") as file:
+                marshal.dump(table, file)
+            os.replace(temporary_path, path)  # atomic, for concurrent workers
+        except OSError:  # e.g. read-only home; works, just without caching
+            pass
+    return table
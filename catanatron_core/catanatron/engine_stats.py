@@ -0,0 +1,66 @@
+"""
+Opt-in instrumentation of the engine's hot paths, to see where time goes
+without an external profiler. Counts calls and accumulates their time for:
+    apply_action (by action type),
+    generate_playable_actions (by prompt),
+    Game.copy,
+    longest road (by build that recomputed it) and
+    yield_resources (on rolls).
+
+Stats are only collected for games created with Game(collect_stats=True).
+Otherwise hooks just find state.stats (or board.stats) to be None, which
+costs next to nothing, so they stay in production code.
+
+Example:
+    game = Game(players, collect_stats=True)
+    game.play()
+    print(game.stats().report())
+"""
+
+from collections import defaultdict
+from typing import Dict, Tuple
+
+
+class EngineStats:
+    """Counts and cumulative times of engine calls, by (section, key). E.g.
+    ("apply_action", "ROLL") or ("generate_playable_actions", "PLAY_TURN").
+    Shared by all copies of a game (e.g. those searched by bots)."""
+
+    def __init__(self):
+        self.counts: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.seconds: Dict[Tuple[str, str], float] = defaultdict(float)
+
+    def record(self, section: str, key, seconds: float):
+        self.counts[(section, key)] += 1
+        self.seconds[(section, key)] += seconds
+
+    def merge(self, other: "EngineStats"):
+        """Adds other's counts and times to these (e.g. across games)"""
+        for entry, count in other.counts.items():
+            self.counts[entry] += count
+            self.seconds[entry] += other.seconds[entry]
+
+    def to_dict(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """JSON-ready {section: {key: {"count": ..., "seconds": ...}}}"""
+        result: Dict[str, Dict[str, Dict[str, float]]] = defaultdict(dict)
+        for (section, key), count in self.counts.items():
+            result[section][str(key)] = {
+                "count": count,
+                "seconds": self.seconds[(section, key)],
+            }
+        return dict(result)
+
+    def report(self) -> str:
+        """Plain-text table, by section and (descending) total time"""
+        lines = [
+            f"{'SECTION':<26} {'KEY':<24} {'COUNT':>10} {'TOTAL ms':>10} {'AVG us':>8}"
+        ]
+        entries = sorted(self.counts, key=lambda e: (e[0], -self.seconds[e]))
+        for section, key in entries:
+            count = self.counts[(section, key)]
+            seconds = self.seconds[(section, key)]
+            lines.append(
+                f"{section:<26} {str(key):<24} {count:>10} "
+                f"{seconds * 1e3:>10.1f} {seconds / count * 1e6:>8.1f}"
+            )
+        return "\n".join(lines)
@@ -5,11 +5,13 @@ Contains Game class which is a thin-wrapper around the State class.
 import uuid
 import random
 import sys
+from time import perf_counter
 from typing import List, Union, Optional
 
+from catanatron.engine_stats import EngineStats
 from catanatron.models.enums import Action, ActionPrompt, ActionType
-from catanatron.state import State, apply_action
-from catanatron.state_functions import player_key, player_has_rolled
+from catanatron.state import State, apply_action, apply_action_undoable, undo_action
+from catanatron.state_functions import get_actual_victory_points, player_has_rolled
 from catanatron.models.map import CatanMap
 from catanatron.models.player import Color, Player
 
@@ -78,6 +80,15 @@ class GameAccumulator:
         """
         pass
 
+    def merge(self, other):
+        """
+        Called when games are played in parallel (e.g. catanatron-play
+        --parallel), to add what other collected in another process
+        to this one. Accumulators that only have side effects (like
+        writing files) can leave this as is; others should implement it.
+        """
+        pass
+
 
 class Game:
     """
@@ -94,26 +105,37 @@ class Game:
         vps_to_win: int = 10,
         catan_map: Optional[CatanMap] = None,
         initialize: bool = True,
+        collect_stats: bool = False,
     ):
         """Creates a game (doesn't run it).
 
         Args:
             players (List[Player]): list of players, should be at most 4.
-            seed (int, optional): Random seed to use (for reproducing games). Defaults to None.
+            seed (int, optional): Random seed to use (for reproducing games). Seeds
+                the game's own generator (game.state.rng); the random module
+                is left untouched. Defaults to None.
             discard_limit (int, optional): Discard limit to use. Defaults to 7.
             vps_to_win (int, optional): Victory Points needed to win. Defaults to 10.
             catan_map (CatanMap, optional): Map to use. Defaults to None.
             initialize (bool, optional): Whether to initialize. Defaults to True.
+            collect_stats (bool, optional): Whether to instrument the engine
+                (see .stats). Defaults to False.
         """
         if initialize:
             self.seed = seed if seed is not None else random.randrange(sys.maxsize)
-            random.seed(self.seed)
 
             self.id = str(uuid.uuid4())
             self.vps_to_win = vps_to_win
-            self.state = State(players, catan_map, discard_limit=discard_limit)
+            self.state = State(
+                players,
+                catan_map,
+                discard_limit=discard_limit,
+                rng=random.Random(self.seed),
+            )
+            if collect_stats:
+                self.state.stats = self.state.board.stats = EngineStats()
 
-    def play(self, accumulators=[], decide_fn=None):
+    def play(self, accumulators=[], decide_fn=None, turbo=False):
         """Executes game until a player wins or exceeded TURNS_LIMIT.
 
         Args:
@@ -123,9 +145,19 @@ class Game:
                 Defaults to [].
             decide_fn (function, optional): Function to overwrite current player's decision with.
                 Defaults to None.
+            turbo (bool, optional): Fast path for bulk simulation with trusted
+                players. Decisions aren't validated, players aren't consulted
+                when there is a single playable action, and actions are not
+                logged to state.actions (so players must not read it).
+                Can't be used with accumulators. Defaults to False.
         Returns:
             Color: winning color or None if game exceeded TURNS_LIMIT
         """
+        if turbo:
+            if len(accumulators) > 0:
+                raise ValueError("Accumulators can't be used in turbo mode")
+            return self._play_turbo(decide_fn)
+
         for accumulator in accumulators:
             accumulator.before(self)
         while self.winning_color() is None and self.state.num_turns < TURNS_LIMIT:
@@ -134,6 +166,29 @@ class Game:
             accumulator.after(self)
         return self.winning_color()
 
+    def _play_turbo(self, decide_fn=None):
+        state = self.state
+        if self.winning_color() is not None:
+            return self.winning_color()
+
+        while state.num_turns < TURNS_LIMIT:
+            actions = state.playable_actions
+            if len(actions) == 1:
+                action = actions[0]
+            elif decide_fn is not None:
+                action = decide_fn(state.current_player(), self, actions)
+            else:
+                action = state.current_player().decide(self, actions)
+            apply_action(state, action, log=False)
+            if get_actual_victory_points(state, action.color) >= self.vps_to_win:
+                break
+            if (  # cutting a road can hand Longest Road to a third player
+                action.action_type == ActionType.BUILD_SETTLEMENT
+                and self.winning_color() is not None
+            ):
+                break
+        return self.winning_color()
+
     def play_tick(self, decide_fn=None, accumulators=[]):
         """Advances game by one ply (player decision).
 
@@ -167,6 +222,25 @@ class Game:
 
         return apply_action(self.state, action)
 
+    def execute_undoable(self, action: Action, validate_action: bool = True):
+        """Like execute, but also returns a journal to pass to .undo.
+
+        Lets search make/unmake moves on this Game instead of copying it.
+
+        Returns:
+            Tuple[Action, Tuple]: Final action and its undo journal.
+        """
+        if validate_action and not is_valid_action(self.state, action):
+            raise ValueError(
+                f"{action} not playable right now. playable_actions={self.state.playable_actions}"
+            )
+
+        return apply_action_undoable(self.state, action)
+
+    def undo(self, journal):
+        """Reverts the .execute_undoable call that returned journal."""
+        undo_action(self.state, journal)
+
     def winning_color(self) -> Union[Color, None]:
         """Gets winning color
 
@@ -175,15 +249,21 @@ class Game:
         """
         result = None
         for color in self.state.colors:
-            key = player_key(self.state, color)
-            if (
-                self.state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"]
-                >= self.vps_to_win
-            ):
+            if get_actual_victory_points(self.state, color) >= self.vps_to_win:
                 result = color
 
         return result
 
+    def stats(self) -> Optional[EngineStats]:
+        """Counts and times of engine calls (see engine_stats.py) made by
+        this game and its copies, if created with collect_stats=True.
+
+        Returns:
+            Optional[EngineStats]: Use .to_dict() or .report() to read them.
+                None if stats are not being collected.
+        """
+        return self.state.stats
+
     def copy(self) -> "Game":
         """Creates a copy of this Game, that can be modified without
         repercusions on this one (useful for simulations).
@@ -191,9 +271,14 @@ class Game:
         Returns:
             Game: Game copy.
         """
+        stats = self.state.stats
+        if stats is not None:
+            start = perf_counter()
         game_copy = Game(players=[], initialize=False)
         game_copy.seed = self.seed
         game_copy.id = self.id
         game_copy.vps_to_win = self.vps_to_win
         game_copy.state = self.state.copy()
+        if stats is not None:
+            stats.record("game", "copy", perf_counter() - start)
         return game_copy
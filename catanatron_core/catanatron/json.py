@@ -8,7 +8,13 @@ from enum import Enum
 from catanatron.models.map import Water, Port, LandTile
 from catanatron.game import Game
 from catanatron.models.player import Color
-from catanatron.models.enums import RESOURCES, Action, ActionType
+from catanatron.models.enums import (
+    BUILDING_NAMES,
+    CARD_CODES,
+    CARD_NAMES,
+    Action,
+    ActionType,
+)
 from catanatron.state_functions import get_longest_road_length
 
 
@@ -19,16 +25,50 @@ def longest_roads_by_player(state):
     return result
 
 
+def card_to_json(card):
+    return None if card is None else CARD_NAMES[card]
+
+
+def card_from_json(name):
+    return None if name is None else CARD_CODES[name]
+
+
+def action_value_to_json(action_type, value):
+    """Translates card codes in an Action.value to their names"""
+    if value is None:
+        return None
+    if action_type == ActionType.MOVE_ROBBER:
+        return (value[0], value[1], card_to_json(value[2]))
+    elif action_type in (
+        ActionType.DISCARD,
+        ActionType.PLAY_YEAR_OF_PLENTY,
+        ActionType.MARITIME_TRADE,
+    ):
+        return [card_to_json(card) for card in value]
+    elif action_type in (ActionType.BUY_DEVELOPMENT_CARD, ActionType.PLAY_MONOPOLY):
+        return card_to_json(value)
+    return value
+
+
 def action_from_json(data):
     color = Color[data[0]]
     action_type = ActionType[data[1]]
+    value = data[2]
     if action_type == ActionType.BUILD_ROAD:
-        action = Action(color, action_type, tuple(data[2]))
-    elif action_type == ActionType.MARITIME_TRADE:
-        value = tuple(data[2])
+        action = Action(color, action_type, tuple(value))
+    elif action_type == ActionType.MOVE_ROBBER:
+        robbed_color = None if value[1] is None else Color[value[1]]
+        value = (tuple(value[0]), robbed_color, card_from_json(value[2]))
+        action = Action(color, action_type, value)
+    elif action_type in (ActionType.MARITIME_TRADE, ActionType.PLAY_YEAR_OF_PLENTY):
+        value = tuple(card_from_json(name) for name in value)
         action = Action(color, action_type, value)
+    elif action_type == ActionType.DISCARD and value is not None:
+        action = Action(color, action_type, [card_from_json(name) for name in value])
+    elif action_type in (ActionType.BUY_DEVELOPMENT_CARD, ActionType.PLAY_MONOPOLY):
+        action = Action(color, action_type, card_from_json(value))
     else:
-        action = Action(color, action_type, data[2])
+        action = Action(color, action_type, value)
     return action
 
 
@@ -40,6 +80,12 @@ class GameEncoder(json.JSONEncoder):
             return obj
         if isinstance(obj, Enum):
             return obj.value
+        if isinstance(obj, Action):
+            return [
+                self.default(obj.color),
+                self.default(obj.action_type),
+                action_value_to_json(obj.action_type, obj.value),
+            ]
         if isinstance(obj, tuple):
             return obj
         if isinstance(obj, Game):
@@ -49,7 +95,9 @@ class GameEncoder(json.JSONEncoder):
                 for direction, node_id in tile.nodes.items():
                     building = obj.state.board.buildings.get(node_id, None)
                     color = None if building is None else building[0]
-                    building_type = None if building is None else building[1]
+                    building_type = (
+                        None if building is None else BUILDING_NAMES[building[1]]
+                    )
                     nodes[node_id] = {
                         "id": node_id,
                         "tile_coordinate": coordinate,
@@ -75,7 +123,7 @@ class GameEncoder(json.JSONEncoder):
                 "nodes": nodes,
                 "edges": list(edges.values()),
                 "actions": [self.default(a) for a in obj.state.actions],
-                "player_state": obj.state.player_state,
+                "player_state": dict(obj.state.player_state),
                 "colors": obj.state.colors,
                 "bot_colors": list(
                     map(
@@ -86,7 +134,9 @@ class GameEncoder(json.JSONEncoder):
                 "robber_coordinate": obj.state.board.robber_coordinate,
                 "current_color": obj.state.current_color(),
                 "current_prompt": obj.state.current_prompt,
-                "current_playable_actions": obj.state.playable_actions,
+                "current_playable_actions": [
+                    self.default(a) for a in obj.state.playable_actions
+                ],
                 "longest_roads_by_player": longest_roads_by_player(obj.state),
                 "winning_color": obj.winning_color(),
             }
@@ -97,7 +147,7 @@ class GameEncoder(json.JSONEncoder):
                 "id": obj.id,
                 "type": "PORT",
                 "direction": self.default(obj.direction),
-                "resource": self.default(obj.resource),
+                "resource": card_to_json(obj.resource),
             }
         if isinstance(obj, LandTile):
             if obj.resource is None:
@@ -105,7 +155,7 @@ class GameEncoder(json.JSONEncoder):
             return {
                 "id": obj.id,
                 "type": "RESOURCE_TILE",
-                "resource": self.default(obj.resource),
+                "resource": card_to_json(obj.resource),
                 "number": obj.number,
             }
         return json.JSONEncoder.default(self, obj)
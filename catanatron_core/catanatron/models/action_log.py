@@ -0,0 +1,108 @@
+"""
+Append-only log of actions (State.actions), whose copies share structure.
+
+A log is a chain of frozen chunks plus a tail (list) of its own appends.
+Copying freezes the tail into a new chunk that both logs then share, so it
+costs O(1) regardless of game length (instead of copying a list of hundreds
+of actions per search node). A frozen chunk is merged into its parent while
+the parent isn't bigger, so chunk sizes shrink towards the end of the chain
+and its depth stays logarithmic in the number of actions.
+"""
+
+from itertools import chain
+from typing import Iterator, List, Optional
+
+from catanatron.models.enums import Action
+
+
+class _Chunk:
+    """Frozen (never mutated again) run of actions, from index start on"""
+
+    __slots__ = ("parent", "actions", "start", "end")
+
+    def __init__(self, parent: Optional["_Chunk"], actions: List[Action]):
+        self.parent = parent
+        self.actions = actions
+        self.start = 0 if parent is None else parent.end
+        self.end = self.start + len(actions)
+
+
+class ActionLog:
+    """List-like, append-only log of actions. Supports len(), iteration,
+    indexing (and slicing, into lists), equality with lists and copy()."""
+
+    __slots__ = ("_frozen", "_tail")
+
+    def __init__(self, actions=()):
+        self._frozen: Optional[_Chunk] = None
+        self._tail: List[Action] = list(actions)
+
+    def append(self, action: Action):
+        self._tail.append(action)
+
+    def copy(self) -> "ActionLog":
+        if self._tail:
+            actions = self._tail
+            parent = self._frozen
+            while parent is not None and len(parent.actions) <= len(actions):
+                actions = parent.actions + actions
+                parent = parent.parent
+            self._frozen = _Chunk(parent, actions)
+            self._tail = []
+
+        log_copy = ActionLog()
+        log_copy._frozen = self._frozen
+        return log_copy
+
+    def truncate(self, length: int):
+        """Drops actions from index length on (used to undo actions)"""
+        frozen_length = 0 if self._frozen is None else self._frozen.end
+        if length >= frozen_length:
+            del self._tail[length - frozen_length :]
+            return
+
+        chunk = self._frozen
+        while chunk.start > length:
+            chunk = chunk.parent
+        self._frozen = chunk.parent
+        self._tail = chunk.actions[: length - chunk.start]
+
+    def _chunks(self) -> List[List[Action]]:
+        chunks = [self._tail]
+        chunk = self._frozen
+        while chunk is not None:
+            chunks.append(chunk.actions)
+            chunk = chunk.parent
+        chunks.reverse()
+        return chunks
+
+    def __len__(self) -> int:
+        return len(self._tail) + (0 if self._frozen is None else self._frozen.end)
+
+    def __iter__(self) -> Iterator[Action]:
+        return chain.from_iterable(self._chunks())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("action log index out of range")
+
+        chunk = self._frozen
+        if chunk is None or index >= chunk.end:
+            return self._tail[index - length + len(self._tail)]
+        while chunk.start > index:
+            chunk = chunk.parent
+        return chunk.actions[index - chunk.start]
+
+    def __eq__(self, other):
+        if isinstance(other, (ActionLog, list)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"ActionLog({list(self)!r})"
@@ -2,9 +2,10 @@
 Move-generation functions (these return a list of actions that can be taken 
 by current player). Main function is generate_playable_actions.
 """
+import functools
 import operator as op
 from functools import reduce
-from typing import Any, Dict, List, Set, Tuple, Union
+from typing import Any, Dict, FrozenSet, List, Tuple
 
 from catanatron.models.decks import (
     CITY_COST_FREQDECK,
@@ -12,30 +13,32 @@ from catanatron.models.decks import (
     SETTLEMENT_COST_FREQDECK,
     freqdeck_can_draw,
     freqdeck_contains,
-    freqdeck_count,
     freqdeck_from_listdeck,
 )
 from catanatron.models.enums import (
+    KNIGHT,
+    MONOPOLY,
     RESOURCES,
+    ROAD_BUILDING,
+    YEAR_OF_PLENTY,
     Action,
     ActionPrompt,
     ActionType,
-    BRICK,
-    ORE,
     FastResource,
     SETTLEMENT,
-    SHEEP,
-    WHEAT,
-    WOOD,
 )
+from catanatron.models.topology import get_land_topology
 from catanatron.state_functions import (
+    CITIES_AVAILABLE_INDEX,
+    ROADS_AVAILABLE_INDEX,
+    SETTLEMENTS_AVAILABLE_INDEX,
     get_player_buildings,
     get_player_freqdeck,
     player_can_afford_dev_card,
     player_can_play_dev,
     player_has_rolled,
-    player_key,
     player_num_resource_cards,
+    player_offset,
     player_resource_freqdeck_contains,
 )
 
@@ -55,7 +58,7 @@ def generate_playable_actions(state) -> List[Action]:
             actions = road_building_possibilities(state, color, False)
         elif not player_has_rolled(state, color):
             actions = [Action(color, ActionType.ROLL, None)]
-            if player_can_play_dev(state, color, "KNIGHT"):
+            if player_can_play_dev(state, color, KNIGHT):
                 actions.append(Action(color, ActionType.PLAY_KNIGHT_CARD, None))
         else:
             actions = [Action(color, ActionType.END_TURN, None)]
@@ -71,16 +74,16 @@ def generate_playable_actions(state) -> List[Action]:
                 actions.append(Action(color, ActionType.BUY_DEVELOPMENT_CARD, None))
 
             # Play Dev Cards
-            if player_can_play_dev(state, color, "YEAR_OF_PLENTY"):
+            if player_can_play_dev(state, color, YEAR_OF_PLENTY):
                 actions.extend(
                     year_of_plenty_possibilities(color, state.resource_freqdeck)
                 )
-            if player_can_play_dev(state, color, "MONOPOLY"):
+            if player_can_play_dev(state, color, MONOPOLY):
                 actions.extend(monopoly_possibilities(color))
-            if player_can_play_dev(state, color, "KNIGHT"):
+            if player_can_play_dev(state, color, KNIGHT):
                 actions.append(Action(color, ActionType.PLAY_KNIGHT_CARD, None))
             if (
-                player_can_play_dev(state, color, "ROAD_BUILDING")
+                player_can_play_dev(state, color, ROAD_BUILDING)
                 and len(road_building_possibilities(state, color, False)) > 0
             ):
                 actions.append(Action(color, ActionType.PLAY_ROAD_BUILDING, None))
@@ -123,33 +126,37 @@ def monopoly_possibilities(color) -> List[Action]:
 
 
 def year_of_plenty_possibilities(color, freqdeck: List[int]) -> List[Action]:
-    options: Set[Union[Tuple[FastResource, FastResource], Tuple[FastResource]]] = set()
+    # options only depend on whether the bank has 0, 1 or 2+ of each card
+    bank_key = tuple(count if count < 2 else 2 for count in freqdeck)
+    return list(_year_of_plenty_actions(color, bank_key))
+
+
+@functools.lru_cache(maxsize=1024)
+def _year_of_plenty_actions(color, freqdeck: Tuple[int, ...]) -> Tuple[Action, ...]:
+    options: Dict[Tuple[FastResource, ...], None] = dict()  # ordered set
     for i, first_card in enumerate(RESOURCES):
         for j in range(i, len(RESOURCES)):
             second_card = RESOURCES[j]  # doing it this way to not repeat
 
             to_draw = freqdeck_from_listdeck([first_card, second_card])
             if freqdeck_contains(freqdeck, to_draw):
-                options.add((first_card, second_card))
+                options[(first_card, second_card)] = None
             else:  # try allowing player select 1 card only.
                 if freqdeck_can_draw(freqdeck, 1, first_card):
-                    options.add((first_card,))
+                    options[(first_card,)] = None
                 if freqdeck_can_draw(freqdeck, 1, second_card):
-                    options.add((second_card,))
+                    options[(second_card,)] = None
 
-    return list(
-        map(
-            lambda cards: Action(color, ActionType.PLAY_YEAR_OF_PLENTY, tuple(cards)),
-            options,
-        )
+    return tuple(
+        Action(color, ActionType.PLAY_YEAR_OF_PLENTY, cards) for cards in options
     )
 
 
 def road_building_possibilities(state, color, check_money=True) -> List[Action]:
-    key = player_key(state, color)
+    offset = player_offset(state, color)
 
     has_money = player_resource_freqdeck_contains(state, color, ROAD_COST_FREQDECK)
-    has_roads_available = state.player_state[f"{key}_ROADS_AVAILABLE"] > 0
+    has_roads_available = state.player_state_array[offset + ROADS_AVAILABLE_INDEX] > 0
 
     if (not check_money or has_money) and has_roads_available:
         buildable_edges = state.board.buildable_edges(color)
@@ -168,12 +175,12 @@ def settlement_possibilities(state, color, initial_build_phase=False) -> List[Ac
             for node_id in buildable_node_ids
         ]
     else:
-        key = player_key(state, color)
+        offset = player_offset(state, color)
         has_money = player_resource_freqdeck_contains(
             state, color, SETTLEMENT_COST_FREQDECK
         )
         has_settlements_available = (
-            state.player_state[f"{key}_SETTLEMENTS_AVAILABLE"] > 0
+            state.player_state_array[offset + SETTLEMENTS_AVAILABLE_INDEX] > 0
         )
         if has_money and has_settlements_available:
             buildable_node_ids = state.board.buildable_node_ids(color)
@@ -186,10 +193,10 @@ def settlement_possibilities(state, color, initial_build_phase=False) -> List[Ac
 
 
 def city_possibilities(state, color) -> List[Action]:
-    key = player_key(state, color)
+    offset = player_offset(state, color)
 
     has_money = player_resource_freqdeck_contains(state, color, CITY_COST_FREQDECK)
-    has_cities_available = state.player_state[f"{key}_CITIES_AVAILABLE"] > 0
+    has_cities_available = state.player_state_array[offset + CITIES_AVAILABLE_INDEX] > 0
 
     if has_money and has_cities_available:
         return [
@@ -201,24 +208,21 @@ def city_possibilities(state, color) -> List[Action]:
 
 
 def robber_possibilities(state, color) -> List[Action]:
+    # each tile can yield a (move-but-cant-steal) action or
+    #   several (move-and-steal-from-x) actions.
+    victims = [
+        candidate_color
+        for candidate_color in state.colors
+        if candidate_color != color  # can't play yourself
+        and player_num_resource_cards(state, candidate_color) >= 1
+    ]
+    tile_colors = state.board.tile_colors
     actions = []
     for coordinate, tile in state.board.map.land_tiles.items():
         if coordinate == state.board.robber_coordinate:
             continue  # ignore. must move robber.
 
-        # each tile can yield a (move-but-cant-steal) action or
-        #   several (move-and-steal-from-x) actions.
-        to_steal_from = set()  # set of player_indexs
-        for _, node_id in tile.nodes.items():
-            building = state.board.buildings.get(node_id, None)
-            if building is not None:
-                candidate_color = building[0]
-                if (
-                    player_num_resource_cards(state, candidate_color) >= 1
-                    and color != candidate_color  # can't play yourself
-                ):
-                    to_steal_from.add(candidate_color)
-
+        to_steal_from = [c for c in tile_colors.get(tile.id, ()) if c in victims]
         if len(to_steal_from) == 0:
             actions.append(
                 Action(color, ActionType.MOVE_ROBBER, (coordinate, None, None))
@@ -274,43 +278,207 @@ def ncr(n, r):
 
 
 def maritime_trade_possibilities(state, color) -> List[Action]:
-    hand_freqdeck = [
-        player_num_resource_cards(state, color, resource) for resource in RESOURCES
-    ]
-    port_resources = state.board.get_player_port_resources(color)
-    trade_offers = inner_maritime_trade_possibilities(
-        hand_freqdeck, state.resource_freqdeck, port_resources
-    )
-
+    hand_freqdeck = get_player_freqdeck(state, color)
+    rates = maritime_rates(state.board.get_player_port_resources(color))
     return list(
-        map(lambda t: Action(color, ActionType.MARITIME_TRADE, t), trade_offers)
+        _maritime_trade_actions(
+            color, *maritime_trade_key(hand_freqdeck, state.resource_freqdeck, rates)
+        )
     )
 
 
 def inner_maritime_trade_possibilities(hand_freqdeck, bank_freqdeck, port_resources):
     """This inner function is to make this logic more shareable"""
-    trade_offers = set()
+    rates = maritime_rates(frozenset(port_resources))
+    return set(
+        _maritime_trade_offers(
+            rates, *maritime_trade_key(hand_freqdeck, bank_freqdeck, rates)
+        )
+    )
+
 
-    # Get lowest rate per resource
-    rates: Dict[FastResource, int] = {WOOD: 4, BRICK: 4, SHEEP: 4, WHEAT: 4, ORE: 4}
+@functools.lru_cache(maxsize=64)
+def maritime_rates(port_resources: FrozenSet) -> Tuple[int, ...]:
+    """Lowest rate per resource, given resources (None for 3:1) of ports"""
+    rates = [4, 4, 4, 4, 4]
     if None in port_resources:
-        rates = {WOOD: 3, BRICK: 3, SHEEP: 3, WHEAT: 3, ORE: 3}
+        rates = [3, 3, 3, 3, 3]
     for resource in port_resources:
         if resource != None:
             rates[resource] = 2
+    return tuple(rates)
+
+
+def maritime_trade_key(hand_freqdeck, bank_freqdeck, rates):
+    """What maritime trades depend on, as (rates, giveable, gettable). Where
+    giveable and gettable are masks of resources with a bit per resource."""
+    giveable = 0
+    gettable = 0
+    for resource in RESOURCES:
+        if hand_freqdeck[resource] >= rates[resource]:
+            giveable |= 1 << resource
+        if bank_freqdeck[resource] > 0:
+            gettable |= 1 << resource
+    return rates, giveable, gettable
+
+
+@functools.lru_cache(maxsize=1024)
+def _maritime_trade_offers(rates, giveable: int, gettable: int) -> Tuple[Tuple, ...]:
+    trade_offers = []
+    for resource in RESOURCES:
+        if not giveable >> resource & 1:
+            continue
+        resource_out: List[Any] = [resource] * rates[resource]
+        resource_out += [None] * (4 - rates[resource])
+        for j_resource in RESOURCES:
+            if resource != j_resource and gettable >> j_resource & 1:
+                trade_offers.append(tuple(resource_out + [j_resource]))
+    return tuple(trade_offers)
+
+
+@functools.lru_cache(maxsize=4096)
+def _maritime_trade_actions(color, rates, giveable, gettable) -> Tuple[Action, ...]:
+    return tuple(
+        Action(color, ActionType.MARITIME_TRADE, trade_offer)
+        for trade_offer in _maritime_trade_offers(rates, giveable, gettable)
+    )
+
+
+# ===== Integer action encoding
+# Decisions (the actions generate_playable_actions can return) are numbered
+# densely, per map and seating (colors). Search, gym and logs can then work
+# on ints and only decode into Action objects when needed.
+#
+# Outcomes filled in when applying an action (dice, card bought, resource
+# stolen, cards discarded) are not part of the decision, so they are dropped
+# by encode_action. Domestic-trade responses are encoded relative to
+# state.current_trade (which decode_action fills back in). OFFER_TRADE is
+# not encodable (it is never generated).
+def _encoding_key(action: Action):
+    """Decision that action carries out, in the form used by the action space"""
+    action_type = action.action_type
+    if action_type == ActionType.BUILD_ROAD:
+        a, b = action.value
+        return Action(action.color, action_type, (a, b) if a < b else (b, a))
+    elif action_type == ActionType.MOVE_ROBBER:
+        coordinate, victim, _ = action.value
+        return Action(action.color, action_type, (coordinate, victim, None))
+    elif action_type in (
+        ActionType.ROLL,
+        ActionType.BUY_DEVELOPMENT_CARD,
+        ActionType.DISCARD,
+        ActionType.ACCEPT_TRADE,
+        ActionType.REJECT_TRADE,
+    ):
+        return Action(action.color, action_type, None)
+    elif action_type == ActionType.CONFIRM_TRADE:
+        return Action(action.color, action_type, action.value[10])
+    return action
+
+
+@functools.lru_cache(maxsize=16)
+def _build_action_space(land_coordinates, land_nodes, colors) -> Tuple[Action, ...]:
+    land_edges = sorted(
+        (min(edge), max(edge)) for edge in get_land_topology(land_nodes).edges
+    )
+    action_space: List[Action] = []
+    for color in colors:
+        enemies = [None, *[c for c in colors if c != color]]
+        action_space.extend(
+            [
+                Action(color, ActionType.ROLL, None),
+                *[
+                    Action(color, ActionType.MOVE_ROBBER, (coordinate, enemy, None))
+                    for coordinate in land_coordinates
+                    for enemy in enemies
+                ],
+                Action(color, ActionType.DISCARD, None),
+                *[Action(color, ActionType.BUILD_ROAD, edge) for edge in land_edges],
+                *[
+                    Action(color, ActionType.BUILD_SETTLEMENT, node_id)
+                    for node_id in sorted(land_nodes)
+                ],
+                *[
+                    Action(color, ActionType.BUILD_CITY, node_id)
+                    for node_id in sorted(land_nodes)
+                ],
+                Action(color, ActionType.BUY_DEVELOPMENT_CARD, None),
+                Action(color, ActionType.PLAY_KNIGHT_CARD, None),
+                *[
+                    Action(color, ActionType.PLAY_YEAR_OF_PLENTY, (first, second))
+                    for i, first in enumerate(RESOURCES)
+                    for second in RESOURCES[i:]
+                ],
+                *[
+                    Action(color, ActionType.PLAY_YEAR_OF_PLENTY, (first,))
+                    for first in RESOURCES
+                ],
+                Action(color, ActionType.PLAY_ROAD_BUILDING, None),
+                *[
+                    Action(color, ActionType.PLAY_MONOPOLY, resource)
+                    for resource in RESOURCES
+                ],
+                *[
+                    Action(
+                        color,
+                        ActionType.MARITIME_TRADE,
+                        tuple([give] * rate + [None] * (4 - rate) + [get]),
+                    )
+                    for rate in (4, 3, 2)
+                    for give in RESOURCES
+                    for get in RESOURCES
+                    if give != get
+                ],
+                Action(color, ActionType.END_TURN, None),
+                Action(color, ActionType.ACCEPT_TRADE, None),
+                Action(color, ActionType.REJECT_TRADE, None),
+                *[
+                    Action(color, ActionType.CONFIRM_TRADE, enemy)
+                    for enemy in enemies[1:]
+                ],
+                Action(color, ActionType.CANCEL_TRADE, None),
+            ]
+        )
+    return tuple(action_space)
+
+
+@functools.lru_cache(maxsize=16)
+def _build_action_index(land_coordinates, land_nodes, colors) -> Dict[Action, int]:
+    action_space = _build_action_space(land_coordinates, land_nodes, colors)
+    return {action: action_id for action_id, action in enumerate(action_space)}
+
+
+def _action_space_args(state):
+    catan_map = state.board.map
+    return (tuple(catan_map.land_tiles.keys()), catan_map.land_nodes, state.colors)
+
+
+def get_action_space(state) -> Tuple[Action, ...]:
+    """All decisions for state's map and seating. An action's id is its index.
+
+    Trade responses hold placeholders instead of trade values (see
+    decode_action). Shared by all states with the same map and colors.
+    """
+    return _build_action_space(*_action_space_args(state))
+
+
+def encode_action(state, action: Action) -> int:
+    """Dense int id of the decision in action (see get_action_space)"""
+    return _build_action_index(*_action_space_args(state))[_encoding_key(action)]
+
+
+def decode_action(state, action_id: int) -> Action:
+    """Inverse of encode_action. Trade responses get state's current trade."""
+    action = _build_action_space(*_action_space_args(state))[action_id]
+    if action.action_type in (ActionType.ACCEPT_TRADE, ActionType.REJECT_TRADE):
+        return Action(action.color, action.action_type, state.current_trade)
+    elif action.action_type == ActionType.CONFIRM_TRADE:
+        value = (*state.current_trade[:10], action.value)
+        return Action(action.color, action.action_type, value)
+    return action
+
 
-    # For resource in hand
-    for index, resource in enumerate(RESOURCES):
-        amount = hand_freqdeck[index]
-        if amount >= rates[resource]:
-            resource_out: List[Any] = [resource] * rates[resource]
-            resource_out += [None] * (4 - rates[resource])
-            for j_resource in RESOURCES:
-                if (
-                    resource != j_resource
-                    and freqdeck_count(bank_freqdeck, j_resource) > 0
-                ):
-                    trade_offer = tuple(resource_out + [j_resource])
-                    trade_offers.add(trade_offer)
-
-    return trade_offers
+def generate_playable_action_ids(state) -> List[int]:
+    """state.playable_actions as action ids (same order)"""
+    index = _build_action_index(*_action_space_args(state))
+    return [index[_encoding_key(action)] for action in state.playable_actions]
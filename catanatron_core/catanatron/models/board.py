@@ -1,39 +1,96 @@
-import pickle
-import copy
 from collections import defaultdict
-from typing import Any, Set, Dict, Tuple, List
+from time import perf_counter
+from typing import Set, Dict, Tuple, List, Optional, FrozenSet
 import functools
 
-import networkx as nx  # type: ignore
-
+from catanatron.engine_stats import EngineStats
 from catanatron.models.player import Color
 from catanatron.models.map import (
     BASE_MAP_TEMPLATE,
-    MINI_MAP_TEMPLATE,
     NUM_NODES,
     CatanMap,
     NodeId,
 )
 from catanatron.models.enums import FastBuildingType, SETTLEMENT, CITY
+from catanatron.models.topology import (
+    STATIC_TOPOLOGY,
+    bfs_distances,
+    get_land_topology,
+)
+from catanatron.models.zobrist import building_key, road_key
 
 
-# Used to find relationships between nodes and edges
-base_map = CatanMap.from_template(BASE_MAP_TEMPLATE)
-mini_map = CatanMap.from_template(MINI_MAP_TEMPLATE)
-STATIC_GRAPH = nx.Graph()
-for tile in base_map.tiles.values():
-    STATIC_GRAPH.add_nodes_from(tile.nodes.values())
-    STATIC_GRAPH.add_edges_from(tile.edges.values())
+# Bitboard tables. Node ids and edge indexes (into EDGE_IDS) are bit positions.
+EDGE_IDS: List[Tuple[int, int]] = sorted(
+    (min(edge), max(edge)) for edge in STATIC_TOPOLOGY.edges
+)
+EDGE_BITS: Dict[Tuple[int, int], int] = dict()  # both orientations
+for _index, (_a, _b) in enumerate(EDGE_IDS):
+    EDGE_BITS[(_a, _b)] = EDGE_BITS[(_b, _a)] = 1 << _index
+INCIDENT_EDGES: Dict[int, Tuple[Tuple[int, int], ...]] = {
+    node: tuple(
+        (neighbor, EDGE_BITS[(node, neighbor)])
+        for neighbor in STATIC_TOPOLOGY.neighbors[node]
+    )
+    for node in STATIC_TOPOLOGY.node_ids
+}  # node => (neighbor, edge bit) pairs
+NODE_NEIGHBOR_MASKS: Dict[int, int] = {
+    node: functools.reduce(lambda mask, e: mask | 1 << e[0], incident, 0)
+    for node, incident in INCIDENT_EDGES.items()
+}
+NODE_EDGE_MASKS: Dict[int, int] = {
+    node: functools.reduce(lambda mask, e: mask | e[1], incident, 0)
+    for node, incident in INCIDENT_EDGES.items()
+}
+EDGE_NODE_MASKS: List[int] = [1 << a | 1 << b for a, b in EDGE_IDS]
+
+
+def iter_bits(mask: int):
+    """Yields positions of set bits in mask, in ascending order"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def count_edges(edges: int) -> int:
+    return bin(edges).count("1")
+
+
+def node_ids_mask(node_ids) -> int:
+    mask = 0
+    for node_id in node_ids:
+        mask |= 1 << node_id
+    return mask
+
+
+@functools.lru_cache(3)  # base, mini and any custom land nodes
+def get_land_edges_mask(land_nodes: frozenset) -> int:
+    """Edges with both ends on land; the only ones roads can go on"""
+    land_mask = node_ids_mask(land_nodes)
+    mask = 0
+    for index, node_mask in enumerate(EDGE_NODE_MASKS):
+        if node_mask & land_mask == node_mask:
+            mask |= 1 << index
+    return mask
 
 
 @functools.lru_cache(1)
-def get_node_distances():
-    return nx.floyd_warshall(STATIC_GRAPH)
+def get_node_distances() -> Dict[NodeId, Dict[NodeId, float]]:
+    """All-pairs shortest path lengths (in edges) between board nodes"""
+    return {
+        node_id: {
+            target: float(distance)
+            for target, distance in bfs_distances(STATIC_TOPOLOGY, node_id).items()
+        }
+        for node_id in STATIC_TOPOLOGY.node_ids
+    }
 
 
 @functools.lru_cache(3)  # None, range(54), range(24)
 def get_edges(land_nodes=None):
-    return list(STATIC_GRAPH.subgraph(land_nodes or range(NUM_NODES)).edges())
+    land_nodes = frozenset(land_nodes or range(NUM_NODES))
+    return list(get_land_topology(land_nodes).edges)
 
 
 class Board:
@@ -45,19 +102,55 @@ class Board:
         roads (Dict[EdgeId, Color]): Mapping from edge
             to Color (if there is a road there). Contains inverted
             edges as well for ease of querying.
-        connected_components (Dict[Color, List[Set[NodeId]]]): Cache
-            datastructure to speed up maintaining longest road computation.
-            To be queried by Color. Value is a list of node sets.
+        component_masks (Dict[Color, Tuple[int, ...]]): Connected components
+            of each color's road network, as node masks, to speed up
+            maintaining longest road. Components include the nodes at their
+            ends (even if enemy-owned). Tuples are replaced, never mutated,
+            so copies share them. See component_index.
         board_buildable_ids (Set[NodeId]): Cache of buildable node ids in board.
         road_color (Color): Color of player with longest road.
         road_length (int): Number of roads of longest road
         robber_coordinate (Coordinate): Coordinate where robber is.
+        payouts (Dict[int, Dict[Color, Tuple[int, ...]]]): Dice number =>
+            color => freqdeck of cards its buildings yield on that roll,
+            ignoring the robber (see yield_resources). Replaced on build.
+        tile_colors (Dict[int, Tuple[Color, ...]]): Land tile id =>
+            colors with buildings on it, in Color order. Who a robber there
+            could steal from (see robber_possibilities). Replaced on build.
+        zobrist (int): Zobrist key of buildings and roads (see
+            catanatron.models.zobrist), maintained as they are built.
+        stats (EngineStats): Same as State.stats (times longest road
+            computations), or None.
+
+    Bitboards mirror buildings, roads and board_buildable_ids as int bitsets
+    (bit i is node i, or edge EDGE_IDS[i]); queries use these:
+        settlement_masks, city_masks (Dict[Color, int]): Node masks.
+        road_masks (Dict[Color, int]): Edge masks.
+        network_masks (Dict[Color, int]): Nodes touched by color's roads or
+            buildings. Same as the union of color's component_masks.
+        occupied_node_mask, occupied_edge_mask (int): All buildings / roads.
+        buildable_node_mask (int): Same as board_buildable_ids.
+        land_edges_mask (int): Edges roads can go on in this map.
+        buildable_edge_masks (Dict[Color, int]): Empty land edges touching a
+            node of color's network that is not an enemy's. Maintained
+            incrementally; builds only revisit edges around touched nodes.
+
+    buildable_edges, buildable_node_ids and get_player_port_resources answers
+    are cached per color (sorted lists ready to use), and builds only drop
+    the entries of colors they affect.
+
+    Copies are copy-on-write: Board.copy() shares the containers above with
+    the original, and whichever board builds first duplicates them (see
+    _own_containers). Caches are shared too; builds replace them instead of
+    clearing them in place.
     """
 
     def __init__(self, catan_map=None, initialize=True):
-        self.buildable_subgraph: Any = None
         self.buildable_edges_cache = {}
+        self.buildable_nodes_cache = {}
         self.player_port_resources_cache = {}
+        self.owns_containers = True
+        self.stats: Optional[EngineStats] = None
         if initialize:
             self.map: CatanMap = catan_map or CatanMap.from_template(
                 BASE_MAP_TEMPLATE
@@ -66,23 +159,33 @@ class Board:
             self.buildings: Dict[NodeId, Tuple[Color, FastBuildingType]] = dict()
             self.roads = dict()  # (node_id, node_id) => color
 
-            # color => int{}[] (list of node_id sets) one per component
-            #   nodes in sets are incidental (might not be owned by player)
-            self.connected_components: Any = defaultdict(list)
+            # color => node masks, one per component
+            #   nodes in masks are incidental (might not be owned by player)
+            self.component_masks: Dict[Color, Tuple[int, ...]] = defaultdict(tuple)
             self.board_buildable_ids = set(self.map.land_nodes)
             self.road_lengths = defaultdict(int)
             self.road_color = None
             self.road_length = 0
 
+            self.settlement_masks: Dict[Color, int] = defaultdict(int)
+            self.city_masks: Dict[Color, int] = defaultdict(int)
+            self.road_masks: Dict[Color, int] = defaultdict(int)
+            self.network_masks: Dict[Color, int] = defaultdict(int)
+            self.occupied_node_mask = 0
+            self.occupied_edge_mask = 0
+            self.buildable_node_mask = node_ids_mask(self.map.land_nodes)
+            self.land_edges_mask = get_land_edges_mask(self.map.land_nodes)
+            self.buildable_edge_masks: Dict[Color, int] = defaultdict(int)
+            self.payouts: Dict[int, Dict[Color, Tuple[int, ...]]] = dict()
+            self.tile_colors: Dict[int, Tuple[Color, ...]] = dict()
+            self.zobrist = 0
+
             # assumes there is at least one desert:
             self.robber_coordinate = filter(
                 lambda coordinate: self.map.land_tiles[coordinate].resource is None,
                 self.map.land_tiles.keys(),
             ).__next__()
 
-            # Cache buildable subgraph
-            self.buildable_subgraph = STATIC_GRAPH.subgraph(self.map.land_nodes)
-
     def build_settlement(self, color, node_id, initial_build_phase=False):
         """Adds a settlement, and ensures is a valid place to build.
 
@@ -104,52 +207,76 @@ class Board:
         if node_id in self.buildings:
             raise ValueError("Invalid Settlement Placement: a building exists there")
 
+        self._own_containers()
         self.buildings[node_id] = (color, SETTLEMENT)
+        self._add_payouts(color, node_id, 1)
+        self._add_tile_colors(color, node_id)
+        self.zobrist ^= building_key(color, SETTLEMENT, node_id)
+        node_bit = 1 << node_id
+        self.settlement_masks[color] |= node_bit
+        self.network_masks[color] |= node_bit
+        self.occupied_node_mask |= node_bit
 
         previous_road_color = self.road_color
         if initial_build_phase:
-            self.connected_components[color].append({node_id})
+            self.component_masks[color] += (node_bit,)
         else:
             # Maybe cut connected components.
-            edges_by_color = defaultdict(list)
-            for edge in STATIC_GRAPH.edges(node_id):
-                edges_by_color[self.roads.get(edge, None)].append(edge)
-
-            for edge_color, edges in edges_by_color.items():
-                if edge_color == color or edge_color is None:
+            incident = NODE_EDGE_MASKS[node_id]
+            for edge_color, road_mask in list(self.road_masks.items()):
+                if edge_color == color:
                     continue  # ignore
-                if len(edges) == 2:  # rip, edge_color has been plowed
+                if count_edges(road_mask & incident) == 2:  # edge_color plowed
                     # consider cut was at b=node_id for edges (a, b) and (b, c)
-                    a = [n for n in edges[0] if n != node_id].pop()
-                    c = [n for n in edges[1] if n != node_id].pop()
-
-                    # do bfs from a adding all encountered nodes
-                    a_nodeset = self.bfs_walk(a, edge_color)
-                    c_nodeset = self.bfs_walk(c, edge_color)
-
-                    # split this components on here.
-                    b_index = self._get_connected_component_index(node_id, edge_color)
-                    del self.connected_components[edge_color][b_index]
-                    self.connected_components[edge_color].append(a_nodeset)
-                    self.connected_components[edge_color].append(c_nodeset)
+                    a, c = [
+                        neighbor
+                        for neighbor, edge_bit in INCIDENT_EDGES[node_id]
+                        if road_mask & edge_bit
+                    ]
+
+                    # split b's component into the nodes a and c still reach
+                    # (just one if a cycle still connects them).
+                    components = list(self.component_masks[edge_color])
+                    del components[self.component_index(edge_color, node_id)]
+                    a_nodes = self.network_walk(a, edge_color)
+                    components.append(a_nodes)
+                    if not a_nodes >> c & 1:
+                        components.append(self.network_walk(c, edge_color))
+                    self.component_masks[edge_color] = tuple(components)
 
                     # Update longest road by plowed player. Compare again with all
+                    # Unchanged components are cache hits in longest_trail
+                    if self.stats is not None:
+                        start = perf_counter()
                     self.road_lengths[edge_color] = max(
-                        *[
-                            len(longest_acyclic_path(self, component, edge_color))
-                            for component in self.connected_components[edge_color]
-                        ]
+                        len(
+                            longest_trail(
+                                *get_component_road_masks(self, nodes, edge_color)
+                            )
+                        )
+                        for nodes in components
                     )
                     self.road_color, self.road_length = max(
                         self.road_lengths.items(), key=lambda e: e[1]
                     )
+                    if self.stats is not None:
+                        self.stats.record(
+                            "longest_road", "settlement cut", perf_counter() - start
+                        )
 
         self.board_buildable_ids.discard(node_id)
-        for n in STATIC_GRAPH.neighbors(node_id):
+        for n, _ in INCIDENT_EDGES[node_id]:
             self.board_buildable_ids.discard(n)
-
-        self.buildable_edges_cache = {}  # Reset buildable_edges
-        self.player_port_resources_cache = {}  # Reset port resources
+        self.buildable_node_mask &= ~(node_bit | NODE_NEIGHBOR_MASKS[node_id])
+
+        # Only edges around node_id can change buildability (for anyone).
+        self._update_buildable_edges(NODE_EDGE_MASKS[node_id])
+        self.buildable_nodes_cache = {}  # board-wide buildable nodes changed
+        self.player_port_resources_cache = {
+            c: resources
+            for c, resources in self.player_port_resources_cache.items()
+            if c != color
+        }
         return previous_road_color, self.road_color, self.road_lengths
 
     def bfs_walk(self, node_id, color):
@@ -163,26 +290,36 @@ class Board:
             Set[int]: Nodes that are "connected" to this one
                 by roads of the color player.
         """
+        return set(iter_bits(self.network_walk(node_id, color)))
+
+    def network_walk(self, node_id, color) -> int:
+        """Like bfs_walk, but returns the nodes as a mask"""
+        road_mask = self.road_masks[color]
+        enemy_mask = self.enemy_node_mask(color)
         agenda = [node_id]  # assuming node_id is owned.
-        visited = set()
+        visited = 0
 
         while len(agenda) != 0:
             n = agenda.pop()
-            visited.add(n)
+            visited |= 1 << n
 
-            if self.is_enemy_node(n, color):
+            if enemy_mask >> n & 1:
                 continue  # end of the road
 
-            neighbors = [v for v in STATIC_GRAPH.neighbors(n) if v not in visited]
-            expandable = [v for v in neighbors if self.roads.get((n, v), None) == color]
-            agenda.extend(expandable)
+            for v, edge_bit in INCIDENT_EDGES[n]:
+                if road_mask & edge_bit and not visited >> v & 1:
+                    agenda.append(v)
 
         return visited
 
-    def _get_connected_component_index(self, node_id, color):
-        for i, component in enumerate(self.connected_components[color]):
-            if node_id in component:
-                return i
+    def component_index(self, color, node_id) -> Optional[int]:
+        """Index in component_masks[color] of the (first) component with
+        node_id, if any. Colors have just a few components, so one bit test
+        per component beats maintaining (and copying) a node => id map."""
+        for index, nodes in enumerate(self.component_masks.get(color, ())):
+            if nodes >> node_id & 1:
+                return index
+        return None
 
     def build_road(self, color, edge):
         buildable = self.buildable_edges(color)
@@ -190,44 +327,65 @@ class Board:
         if edge not in buildable and inverted_edge not in buildable:
             raise ValueError("Invalid Road Placement")
 
+        self._own_containers()
         self.roads[edge] = color
         self.roads[inverted_edge] = color
+        edge_bit = EDGE_BITS[edge]
+        self.road_masks[color] |= edge_bit
+        self.occupied_edge_mask |= edge_bit
+        self.network_masks[color] |= 1 << edge[0] | 1 << edge[1]
+        self.zobrist ^= road_key(color, edge)
 
-        # Update self.connected_components accordingly. Maybe merge.
+        # Update self.component_masks accordingly. Maybe merge.
         a, b = edge
-        a_index = self._get_connected_component_index(a, color)
-        b_index = self._get_connected_component_index(b, color)
+        components = self.component_masks[color]
+        a_index = self.component_index(color, a)
+        b_index = self.component_index(color, b)
         if a_index is None and b_index is not None and not self.is_enemy_node(a, color):
-            self.connected_components[color][b_index].add(a)
-            component = self.connected_components[color][b_index]
+            component = components[b_index] | 1 << a
+            self.component_masks[color] = (
+                components[:b_index] + (component,) + components[b_index + 1 :]
+            )
         elif (
             a_index is not None and b_index is None and not self.is_enemy_node(b, color)
         ):
-            self.connected_components[color][a_index].add(b)
-            component = self.connected_components[color][a_index]
+            component = components[a_index] | 1 << b
+            self.component_masks[color] = (
+                components[:a_index] + (component,) + components[a_index + 1 :]
+            )
         elif a_index is not None and b_index is not None and a_index != b_index:
             # merge
-            merged_component = self.connected_components[color][a_index].union(
-                self.connected_components[color][b_index]
-            )
-            for index in sorted([a_index, b_index], reverse=True):
-                del self.connected_components[color][index]
-            self.connected_components[color].append(merged_component)
-            component = merged_component
+            component = components[a_index] | components[b_index]
+            self.component_masks[color] = tuple(
+                nodes
+                for index, nodes in enumerate(components)
+                if index != a_index and index != b_index
+            ) + (component,)
         else:  # both nodes in same component; got nothing to do (already added)
-            component = self.connected_components[color][
-                a_index if a_index is not None else b_index
-            ]
+            component = components[a_index if a_index is not None else b_index]
 
-        # find longest path on component under question
+        # find longest path on component under question. skip if it
+        # doesnt even have more roads than color's current longest.
         previous_road_color = self.road_color
-        candidate_length = len(longest_acyclic_path(self, component, color))
-        self.road_lengths[color] = max(self.road_lengths[color], candidate_length)
-        if candidate_length >= 5 and candidate_length > self.road_length:
-            self.road_color = color
-            self.road_length = candidate_length
-
-        self.buildable_edges_cache = {}  # Reset buildable_edges
+        edges, blocked = get_component_road_masks(self, component, color)
+        if count_edges(edges) > self.road_lengths[color]:
+            if self.stats is None:
+                candidate_length = len(longest_trail(edges, blocked))
+            else:
+                start = perf_counter()
+                candidate_length = len(longest_trail(edges, blocked))
+                self.stats.record("longest_road", "road", perf_counter() - start)
+            self.road_lengths[color] = max(self.road_lengths[color], candidate_length)
+            if candidate_length >= 5 and candidate_length > self.road_length:
+                self.road_color = color
+                self.road_length = candidate_length
+
+        self._update_buildable_edges(NODE_EDGE_MASKS[a] | NODE_EDGE_MASKS[b])
+        self.buildable_nodes_cache = {
+            key: node_ids
+            for key, node_ids in self.buildable_nodes_cache.items()
+            if key != color
+        }
         return previous_road_color, self.road_color, self.road_lengths
 
     def build_city(self, color, node_id):
@@ -235,39 +393,93 @@ class Board:
         if building is None or building[0] != color or building[1] != SETTLEMENT:
             raise ValueError("Invalid City Placement: no player settlement there")
 
+        self._own_containers()
         self.buildings[node_id] = (color, CITY)
+        self._add_payouts(color, node_id, 1)  # one more than the settlement
+        self.zobrist ^= building_key(color, SETTLEMENT, node_id)
+        self.zobrist ^= building_key(color, CITY, node_id)
+        self.settlement_masks[color] &= ~(1 << node_id)
+        self.city_masks[color] |= 1 << node_id
+
+    def _add_payouts(self, color, node_id, amount):
+        """Adds amount cards of each adjacent tile to color's payouts."""
+        payouts = self.payouts.copy()  # might be shared with copies
+        for tile in self.map.adjacent_tiles.get(node_id, ()):
+            if tile.resource is None:
+                continue  # desert
+            by_color = payouts.get(tile.number, {}).copy()
+            freqdeck = list(by_color.get(color, (0, 0, 0, 0, 0)))
+            freqdeck[tile.resource] += amount
+            by_color[color] = tuple(freqdeck)
+            payouts[tile.number] = by_color
+        self.payouts = payouts
+
+    def _add_tile_colors(self, color, node_id):
+        """Adds color to tile_colors of tiles adjacent to node_id."""
+        tile_colors = None
+        for tile in self.map.adjacent_tiles.get(node_id, ()):
+            colors = self.tile_colors.get(tile.id, ())
+            if color in colors:
+                continue
+            if tile_colors is None:
+                tile_colors = self.tile_colors.copy()  # might be shared
+            tile_colors[tile.id] = tuple(c for c in Color if c == color or c in colors)
+        if tile_colors is not None:
+            self.tile_colors = tile_colors
 
     def buildable_node_ids(self, color: Color, initial_build_phase=False):
-        if initial_build_phase:
-            return sorted(list(self.board_buildable_ids))
+        """Sorted list of node ids color can build a settlement on"""
+        key = None if initial_build_phase else color
+        if key in self.buildable_nodes_cache:
+            return self.buildable_nodes_cache[key]
 
-        subgraphs = self.find_connected_components(color)
-        nodes = set().union(*subgraphs)
-        return sorted(list(nodes.intersection(self.board_buildable_ids)))
+        if initial_build_phase:
+            node_ids = list(iter_bits(self.buildable_node_mask))
+        else:
+            network_mask = self.network_masks.get(color, 0)
+            node_ids = list(iter_bits(network_mask & self.buildable_node_mask))
+        self.buildable_nodes_cache[key] = node_ids
+        return node_ids
 
     def buildable_edges(self, color: Color):
         """List of (n1,n2) tuples. Edges are in n1 < n2 order."""
         if color in self.buildable_edges_cache:
             return self.buildable_edges_cache[color]
 
-        expandable = set()
-
-        # non-enemy-nodes in your connected components
-        expandable_nodes = set()
-        for node_set in self.connected_components[color]:
-            for node in node_set:
-                if not self.is_enemy_node(node, color):
-                    expandable_nodes.add(node)
-
-        candidate_edges = self.buildable_subgraph.edges(expandable_nodes)
-        for edge in candidate_edges:
-            if self.get_edge_color(edge) is None:
-                expandable.add(tuple(sorted(edge)))
-
-        buildable_edges_list = list(expandable)
+        buildable_edges_list = [
+            EDGE_IDS[index]
+            for index in iter_bits(self.buildable_edge_masks.get(color, 0))
+        ]
         self.buildable_edges_cache[color] = buildable_edges_list
         return buildable_edges_list
 
+    def _update_buildable_edges(self, edges: int):
+        """Recomputes buildable_edge_masks restricted to given edges, and drops
+        cached buildable_edges of colors whose mask changed. Assumes builds
+        only changed buildability of these edges."""
+        empty_edges = edges & self.land_edges_mask & ~self.occupied_edge_mask
+        changed = set()
+        for color, network_mask in self.network_masks.items():
+            # empty land edges next to non-enemy-nodes in your connected components
+            expandable_nodes = network_mask & ~self.enemy_node_mask(color)
+            buildable = 0
+            for index in iter_bits(empty_edges):
+                if EDGE_NODE_MASKS[index] & expandable_nodes:
+                    buildable |= 1 << index
+
+            previous = self.buildable_edge_masks.get(color, 0)
+            mask = previous & ~edges | buildable
+            if mask != previous:
+                self.buildable_edge_masks[color] = mask
+                changed.add(color)
+
+        if len(changed) > 0:
+            self.buildable_edges_cache = {
+                color: edges_list
+                for color, edges_list in self.buildable_edges_cache.items()
+                if color not in changed
+            }
+
     def get_player_port_resources(self, color):
         """Yields resources (None for 3:1) of ports owned by color"""
         if color in self.player_port_resources_cache:
@@ -279,17 +491,31 @@ class Board:
                 if self.get_node_color(node_id) == color:
                     resources.add(resource)
 
+        resources = frozenset(resources)  # hashable, e.g. to key maritime_rates
         self.player_port_resources_cache[color] = resources
         return resources
 
     def find_connected_components(self, color: Color):
         """
         Returns:
-            nx.Graph[]: connected subgraphs. subgraphs
+            FrozenSet[NodeId][]: connected node sets. these
                 might include nodes that color doesnt own (on the way and on ends),
                 just to make it is "closed" and easier for buildable_nodes to operate.
         """
-        return self.connected_components[color]
+        return [
+            frozenset(iter_bits(nodes)) for nodes in self.component_masks.get(color, ())
+        ]
+
+    @property
+    def connected_components(self) -> Dict[Color, List[FrozenSet[NodeId]]]:
+        """component_masks as node frozensets (see find_connected_components)"""
+        return defaultdict(
+            list,
+            {
+                color: self.find_connected_components(color)
+                for color in self.component_masks
+            },
+        )
 
     def continuous_roads_by_player(self, color: Color):
         paths = []
@@ -301,24 +527,130 @@ class Board:
     def copy(self):
         board = Board(self.map, initialize=False)
         board.map = self.map  # reuse since its immutable
-        board.buildings = self.buildings.copy()
-        board.roads = self.roads.copy()
-        board.connected_components = pickle.loads(
-            pickle.dumps(self.connected_components)
-        )
-        board.board_buildable_ids = self.board_buildable_ids.copy()
-        board.road_lengths = self.road_lengths.copy()
+        board.buildings = self.buildings
+        board.roads = self.roads
+        board.component_masks = self.component_masks
+        board.board_buildable_ids = self.board_buildable_ids
+        board.road_lengths = self.road_lengths
         board.road_color = self.road_color
         board.road_length = self.road_length
 
+        board.settlement_masks = self.settlement_masks
+        board.city_masks = self.city_masks
+        board.road_masks = self.road_masks
+        board.network_masks = self.network_masks
+        board.occupied_node_mask = self.occupied_node_mask
+        board.occupied_edge_mask = self.occupied_edge_mask
+        board.buildable_node_mask = self.buildable_node_mask
+        board.land_edges_mask = self.land_edges_mask
+        board.buildable_edge_masks = self.buildable_edge_masks
+        board.payouts = self.payouts
+        board.tile_colors = self.tile_colors
+        board.zobrist = self.zobrist
+
         board.robber_coordinate = self.robber_coordinate
-        board.buildable_subgraph = self.buildable_subgraph
-        board.buildable_edges_cache = copy.deepcopy(self.buildable_edges_cache)
-        board.player_port_resources_cache = copy.deepcopy(
-            self.player_port_resources_cache
-        )
+        board.buildable_edges_cache = self.buildable_edges_cache
+        board.buildable_nodes_cache = self.buildable_nodes_cache
+        board.player_port_resources_cache = self.player_port_resources_cache
+        board.stats = self.stats
+
+        # Containers are now shared; both boards must copy before writing.
+        self.owns_containers = False
+        board.owns_containers = False
         return board
 
+    def _own_containers(self):
+        """Duplicates containers shared with other copies, prior to a write.
+        Component masks are tuples, so only the dict holding them needs
+        copying."""
+        if self.owns_containers:
+            return
+
+        self.buildings = self.buildings.copy()
+        self.roads = self.roads.copy()
+        self.component_masks = defaultdict(tuple, self.component_masks)
+        self.board_buildable_ids = self.board_buildable_ids.copy()
+        self.road_lengths = self.road_lengths.copy()
+        self.settlement_masks = self.settlement_masks.copy()
+        self.city_masks = self.city_masks.copy()
+        self.road_masks = self.road_masks.copy()
+        self.network_masks = self.network_masks.copy()
+        self.buildable_edge_masks = self.buildable_edge_masks.copy()
+        self.owns_containers = True
+
+    def checkpoint(self):
+        """Captures everything a build (or robber move) can change, for
+        .restore. Shares containers copy-on-write, so it is O(1)."""
+        self.owns_containers = False
+        return (
+            self.buildings,
+            self.roads,
+            self.component_masks,
+            self.board_buildable_ids,
+            self.road_lengths,
+            self.road_color,
+            self.road_length,
+            self.robber_coordinate,
+            self.buildable_edges_cache,
+            self.buildable_nodes_cache,
+            self.player_port_resources_cache,
+            self.settlement_masks,
+            self.city_masks,
+            self.road_masks,
+            self.network_masks,
+            self.occupied_node_mask,
+            self.occupied_edge_mask,
+            self.buildable_node_mask,
+            self.buildable_edge_masks,
+            self.payouts,
+            self.tile_colors,
+            self.zobrist,
+        )
+
+    def restore(self, checkpoint):
+        """Reverts board to how it was when checkpoint was taken."""
+        (
+            self.buildings,
+            self.roads,
+            self.component_masks,
+            self.board_buildable_ids,
+            self.road_lengths,
+            self.road_color,
+            self.road_length,
+            self.robber_coordinate,
+            self.buildable_edges_cache,
+            self.buildable_nodes_cache,
+            self.player_port_resources_cache,
+            self.settlement_masks,
+            self.city_masks,
+            self.road_masks,
+            self.network_masks,
+            self.occupied_node_mask,
+            self.occupied_edge_mask,
+            self.buildable_node_mask,
+            self.buildable_edge_masks,
+            self.payouts,
+            self.tile_colors,
+            self.zobrist,
+        ) = checkpoint
+        # A copy taken since the checkpoint may share these containers.
+        self.owns_containers = False
+
+    def bitboard_key(self):
+        """Hashable summary of buildings, roads and robber. Cheap to build,
+        so usable as a transposition key by search."""
+        return (
+            tuple(
+                (
+                    self.settlement_masks.get(color, 0),
+                    self.city_masks.get(color, 0),
+                    self.road_masks.get(color, 0),
+                )
+                for color in Color
+            ),
+            self.robber_coordinate,
+        )
+
     # ===== Helper functions
     def get_node_color(self, node_id):
         # using try-except instead of .get for performance
@@ -334,41 +666,86 @@ class Board:
         except KeyError:
             return None
 
+    def enemy_node_mask(self, color):
+        return self.occupied_node_mask & ~(
+            self.settlement_masks[color] | self.city_masks[color]
+        )
+
     def is_enemy_node(self, node_id, color):
-        node_color = self.get_node_color(node_id)
-        return node_color is not None and node_color != color
+        return self.enemy_node_mask(color) >> node_id & 1 == 1
 
     def is_enemy_road(self, edge, color):
-        edge_color = self.get_edge_color(edge)
-        return edge_color is not None and edge_color != color
+        enemy_roads = self.occupied_edge_mask & ~self.road_masks[color]
+        return enemy_roads & EDGE_BITS[edge] != 0
 
 
 def longest_acyclic_path(board: Board, node_set: Set[int], color: Color):
-    paths = []
-    for start_node in node_set:
-        # do DFS when reach leaf node, stop and add to paths
-        paths_from_this_node = []
-        agenda: List[Tuple[int, Any]] = [(start_node, [])]
-        while len(agenda) > 0:
-            node, path_thus_far = agenda.pop()
-
-            able_to_navigate = False
-            for neighbor_node in STATIC_GRAPH.neighbors(node):
-                edge_color = board.get_edge_color((node, neighbor_node))
-                if edge_color != color:
-                    continue
-
-                neighbor_color = board.get_node_color(neighbor_node)
-                if neighbor_color is not None and neighbor_color != color:
-                    continue  # enemy-owned, cant use this to navigate.
-                edge = tuple(sorted((node, neighbor_node)))
-                if edge not in path_thus_far:
-                    agenda.insert(0, (neighbor_node, path_thus_far + [edge]))
-                    able_to_navigate = True
-
-            if not able_to_navigate:  # then it is leaf node
-                paths_from_this_node.append(path_thus_far)
-
-        paths.extend(paths_from_this_node)
-
-    return max(paths, key=len)
+    """Longest trail (as list of edges) of color's roads within node_set.
+    Trails may start at an enemy-owned node, but never go through one."""
+    return list(longest_trail(*get_road_masks(board, node_set, color)))
+
+
+# ===== Longest road engine
+def get_road_masks(board: Board, node_set: Set[int], color: Color):
+    """Returns (edges, blocked) bitmasks: color's roads within node_set and
+    enemy-owned nodes in node_set."""
+    return get_component_road_masks(board, node_ids_mask(node_set), color)
+
+
+def get_component_road_masks(board: Board, nodes: int, color: Color):
+    """Like get_road_masks, for a node mask (e.g. one of component_masks)"""
+    edges = 0
+    for index in iter_bits(board.road_masks[color]):
+        if EDGE_NODE_MASKS[index] & nodes == EDGE_NODE_MASKS[index]:
+            edges |= 1 << index
+    return edges, board.enemy_node_mask(color) & nodes
+
+
+@functools.lru_cache(maxsize=4096)
+def longest_trail(edges: int, blocked: int):
+    """Longest trail over road bitmask edges that never enters a blocked
+    (enemy-owned) node. Memoized per component, so recomputing components
+    that didn't change is free.
+
+    Only trails starting at a blocked node or at a node without exactly 2
+    roads are searched: a longest trail starting at any other node must be
+    a circuit, which can be walked from any of its nodes.
+
+    Returns:
+        Tuple[EdgeId, ...]: Edges of the trail, in walking order.
+    """
+    degrees: Dict[int, int] = defaultdict(int)
+    remaining = edges
+    while remaining:
+        low = remaining & -remaining
+        a, b = EDGE_IDS[low.bit_length() - 1]
+        degrees[a] += 1
+        degrees[b] += 1
+        remaining ^= low
+    start_nodes = [
+        node for node, degree in degrees.items() if degree != 2 or blocked >> node & 1
+    ]
+    if len(start_nodes) == 0 and len(degrees) > 0:
+        start_nodes = [next(iter(degrees))]  # a simple cycle
+
+    num_edges = count_edges(edges)
+    best: Tuple = ()
+    for node in start_nodes:
+        trail = longest_trail_from(node, edges, blocked)
+        if len(trail) > len(best):
+            best = trail
+            if len(best) == num_edges:
+                break  # used every road; cant do better
+    return best
+
+
+def longest_trail_from(node: int, edges: int, blocked: int):
+    """Longest trail starting at node using only (unused) road bits in edges."""
+    best: Tuple = ()
+    for neighbor, bit in INCIDENT_EDGES[node]:
+        if edges & bit and not blocked >> neighbor & 1:
+            trail = longest_trail_from(neighbor, edges ^ bit, blocked)
+            if len(trail) + 1 > len(best):
+                edge = (node, neighbor) if node < neighbor else (neighbor, node)
+                best = (edge,) + trail
+    return best
@@ -11,11 +11,6 @@ from catanatron.models.enums import (
     ROAD_BUILDING,
     VICTORY_POINT,
     YEAR_OF_PLENTY,
-    WOOD,
-    BRICK,
-    SHEEP,
-    WHEAT,
-    ORE,
     FastDevCard,
     FastResource,
 )
@@ -33,29 +28,27 @@ def starting_resource_bank():
     return [19, 19, 19, 19, 19]
 
 
-RESOURCE_FREQDECK_INDEXES = {WOOD: 0, BRICK: 1, SHEEP: 2, WHEAT: 3, ORE: 4}
-
-
+# Resource codes are freqdeck indexes (see enums.py)
 def freqdeck_can_draw(freqdeck, amount: int, card: FastResource):
-    return freqdeck[RESOURCE_FREQDECK_INDEXES[card]] >= amount
+    return freqdeck[card] >= amount
 
 
 def freqdeck_draw(freqdeck, amount: int, card: FastResource):
-    freqdeck[RESOURCE_FREQDECK_INDEXES[card]] -= amount
+    freqdeck[card] -= amount
 
 
 def freqdeck_replenish(freqdeck, amount: int, card: FastResource):
-    freqdeck[RESOURCE_FREQDECK_INDEXES[card]] += amount
+    freqdeck[card] += amount
 
 
 def freqdeck_count(freqdeck, card: FastResource):
-    return freqdeck[RESOURCE_FREQDECK_INDEXES[card]]
+    return freqdeck[card]
 
 
 def freqdeck_from_listdeck(listdeck: Iterable[FastResource]):
     freqdeck = [0, 0, 0, 0, 0]
     for resource in listdeck:
-        freqdeck_replenish(freqdeck, 1, resource)
+        freqdeck[resource] += 1
     return freqdeck
 
 
@@ -3,26 +3,27 @@ from collections import namedtuple
 from typing import List, Literal, Final
 
 
-FastResource = Literal["WOOD", "BRICK", "SHEEP", "WHEAT", "ORE"]
-FastDevCard = Literal[
-    "KNIGHT", "YEAR_OF_PLENTY", "MONOPOLY", "ROAD_BUILDING", "VICTORY_POINT"
-]
-FastBuildingType = Literal["SETTLEMENT", "CITY", "ROAD"]
-
-# Strings are considerably faster than Python Enum's (e.g. at being hashed).
-# TODO: Move to ints
-WOOD: Final = "WOOD"
-BRICK: Final = "BRICK"
-SHEEP: Final = "SHEEP"
-WHEAT: Final = "WHEAT"
-ORE: Final = "ORE"
+FastResource = Literal[0, 1, 2, 3, 4]
+FastDevCard = Literal[5, 6, 7, 8, 9]
+FastBuildingType = Literal[0, 1, 2]
+
+# Small ints (faster than strings or Enums at being hashed, and can index
+# lists directly). Resources and development cards share one code space so
+# that a card's code is also its offset in a player's hand (and resources
+# are the indexes of a freqdeck). Use CARD_NAMES / BUILDING_NAMES to
+# translate to strings at the boundaries (JSON, features, UI).
+WOOD: Final = 0
+BRICK: Final = 1
+SHEEP: Final = 2
+WHEAT: Final = 3
+ORE: Final = 4
 RESOURCES: List[FastResource] = [WOOD, BRICK, SHEEP, WHEAT, ORE]
 
-KNIGHT: Final = "KNIGHT"
-YEAR_OF_PLENTY: Final = "YEAR_OF_PLENTY"
-MONOPOLY: Final = "MONOPOLY"
-ROAD_BUILDING: Final = "ROAD_BUILDING"
-VICTORY_POINT: Final = "VICTORY_POINT"
+KNIGHT: Final = 5
+YEAR_OF_PLENTY: Final = 6
+MONOPOLY: Final = 7
+ROAD_BUILDING: Final = 8
+VICTORY_POINT: Final = 9
 DEVELOPMENT_CARDS: List[FastDevCard] = [
     KNIGHT,
     YEAR_OF_PLENTY,
@@ -31,9 +32,26 @@ DEVELOPMENT_CARDS: List[FastDevCard] = [
     VICTORY_POINT,
 ]
 
-SETTLEMENT: Final = "SETTLEMENT"
-CITY: Final = "CITY"
-ROAD: Final = "ROAD"
+# SETTLEMENT and CITY codes double as the number of cards they yield.
+ROAD: Final = 0
+SETTLEMENT: Final = 1
+CITY: Final = 2
+
+CARD_NAMES = (
+    "WOOD",
+    "BRICK",
+    "SHEEP",
+    "WHEAT",
+    "ORE",
+    "KNIGHT",
+    "YEAR_OF_PLENTY",
+    "MONOPOLY",
+    "ROAD_BUILDING",
+    "VICTORY_POINT",
+)
+CARD_CODES = {name: code for code, name in enumerate(CARD_NAMES)}
+BUILDING_NAMES = ("ROAD", "SETTLEMENT", "CITY")
+BUILDING_CODES = {name: code for code, name in enumerate(BUILDING_NAMES)}
 
 
 class ActionPrompt(Enum):
@@ -1,12 +1,25 @@
+import functools
 import typing
 from dataclasses import dataclass
 import random
 from enum import Enum
 from collections import Counter, defaultdict
-from typing import Dict, FrozenSet, List, Literal, Mapping, Set, Tuple, Type, Union
+from typing import (
+    Dict,
+    FrozenSet,
+    List,
+    Literal,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
 
 from catanatron.models.coordinate_system import Direction, add, UNIT_VECTORS
 from catanatron.models.enums import (
+    CARD_NAMES,
     FastResource,
     WOOD,
     BRICK,
@@ -65,7 +78,7 @@ class LandTile:
     def __repr__(self):
         if self.resource is None:
             return "Tile:Desert"
-        return f"Tile:{self.number}{self.resource}"
+        return f"Tile:{self.number}{CARD_NAMES[self.resource]}"
 
 
 class Port:
@@ -79,7 +92,9 @@ class Port:
         self.edges = edges
 
     def __repr__(self):
-        return "Port:" + str(self.resource)
+        if self.resource is None:
+            return "Port:None"
+        return "Port:" + CARD_NAMES[self.resource]
 
 
 @dataclass(frozen=True)
@@ -246,8 +261,8 @@ class CatanMap:
         self.ports_by_id = ports_by_id
 
     @staticmethod
-    def from_template(map_template: MapTemplate):
-        tiles = initialize_tiles(map_template)
+    def from_template(map_template: MapTemplate, rng: Optional[random.Random] = None):
+        tiles = initialize_tiles(map_template, rng=rng)
 
         return CatanMap.from_tiles(tiles)
 
@@ -351,6 +366,7 @@ def initialize_tiles(
     shuffled_numbers_param=None,
     shuffled_port_resources_param=None,
     shuffled_tile_resources_param=None,
+    rng: Optional[random.Random] = None,
 ) -> Dict[Coordinate, Tile]:
     """Initializes a new random board, based on the MapTemplate.
 
@@ -360,6 +376,8 @@ def initialize_tiles(
 
     Args:
         map_template (MapTemplate): Template to initialize.
+        rng (random.Random, optional): Generator to shuffle with. Defaults to
+            the random module.
 
     Raises:
         ValueError: Invalid tile in topology
@@ -367,13 +385,14 @@ def initialize_tiles(
     Returns:
         Dict[Coordinate, Tile]: Coordinate to initialized Tile mapping.
     """
-    shuffled_port_resources = shuffled_port_resources_param or random.sample(
+    rng = rng or random
+    shuffled_port_resources = shuffled_port_resources_param or rng.sample(
         map_template.port_resources, len(map_template.port_resources)
     )
-    shuffled_tile_resources = shuffled_tile_resources_param or random.sample(
+    shuffled_tile_resources = shuffled_tile_resources_param or rng.sample(
         map_template.tile_resources, len(map_template.tile_resources)
     )
-    shuffled_numbers = shuffled_numbers_param or random.sample(
+    shuffled_numbers = shuffled_numbers_param or rng.sample(
         map_template.numbers, len(map_template.numbers)
     )
 
@@ -506,50 +525,66 @@ PORT_DIRECTION_TO_NODEREFS = {
     Direction.SOUTHWEST: (NodeRef.SOUTHWEST, NodeRef.SOUTH),
 }
 
-TOURNAMENT_MAP_TILES = initialize_tiles(
-    BASE_MAP_TEMPLATE,
-    [10, 8, 3, 6, 2, 5, 10, 8, 4, 11, 12, 9, 5, 4, 9, 11, 3, 6],
-    [
-        None,
-        SHEEP,
-        None,
-        ORE,
-        WHEAT,
-        None,
-        WOOD,
-        BRICK,
-        None,
-    ],
-    [
-        None,
-        WOOD,
-        SHEEP,
-        SHEEP,
-        WOOD,
-        WHEAT,
-        WOOD,
-        WHEAT,
-        BRICK,
-        SHEEP,
-        BRICK,
-        SHEEP,
-        WHEAT,
-        WHEAT,
-        ORE,
-        BRICK,
-        ORE,
-        WOOD,
-        ORE,
-        None,
-    ],
-)
-TOURNAMENT_MAP = CatanMap.from_tiles(TOURNAMENT_MAP_TILES)
+
+@functools.lru_cache(1)
+def get_tournament_map() -> CatanMap:
+    """The fixed map of tournaments. Built on first use, not on import."""
+    tiles = initialize_tiles(
+        BASE_MAP_TEMPLATE,
+        [10, 8, 3, 6, 2, 5, 10, 8, 4, 11, 12, 9, 5, 4, 9, 11, 3, 6],
+        [
+            None,
+            SHEEP,
+            None,
+            ORE,
+            WHEAT,
+            None,
+            WOOD,
+            BRICK,
+            None,
+        ],
+        [
+            None,
+            WOOD,
+            SHEEP,
+            SHEEP,
+            WOOD,
+            WHEAT,
+            WOOD,
+            WHEAT,
+            BRICK,
+            SHEEP,
+            BRICK,
+            SHEEP,
+            WHEAT,
+            WHEAT,
+            ORE,
+            BRICK,
+            ORE,
+            WOOD,
+            ORE,
+            None,
+        ],
+    )
+    return CatanMap.from_tiles(tiles)
+
+
+def __getattr__(name):
+    # The TOURNAMENT_MAP constants are built on first access (PEP 562)
+    if name == "TOURNAMENT_MAP":
+        return get_tournament_map()
+    if name == "TOURNAMENT_MAP_TILES":
+        return get_tournament_map().tiles
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-def build_map(map_type: Literal["BASE", "TOURNAMENT", "MINI"]):
+def build_map(
+    map_type: Literal["BASE", "TOURNAMENT", "MINI"],
+    rng: Optional[random.Random] = None,
+):
     if map_type == "TOURNAMENT":
-        return TOURNAMENT_MAP  # this assumes map is read-only data struct
+        return get_tournament_map()  # this assumes map is read-only data struct
     elif map_type == "MINI":
-        return CatanMap.from_template(MINI_MAP_TEMPLATE)
+        return CatanMap.from_template(MINI_MAP_TEMPLATE, rng)
     else:
-        return CatanMap.from_template(BASE_MAP_TEMPLATE)
+        return CatanMap.from_template(BASE_MAP_TEMPLATE, rng)
@@ -0,0 +1,211 @@
+"""
+Map banks: files with many pre-shuffled maps of one type, so that maps can
+be referred to by id (for reproducibility and paired comparisons) and built
+without running initialize_tiles for every game.
+
+A map is stored as the three shuffles initialize_tiles takes (numbers, port
+resources and tile resources), one byte per entry. The file is a fixed-size
+header followed by fixed-size records, and is memory-mapped, so opening a
+bank with millions of maps is instant and only touched records are read.
+
+Building a map from a bank reuses the node and edge ids of the template
+(they don't depend on the shuffles), so it only needs to create the tiles.
+
+Example:
+    write_map_bank("base.bank", "BASE", 10000, seed=0)
+    bank = MapBank("base.bank")
+    catan_map = bank.build_map(42)
+"""
+
+import functools
+import mmap
+import random
+import struct
+from typing import Dict, List, Literal, Optional, Tuple
+
+from catanatron.models.map import (
+    BASE_MAP_TEMPLATE,
+    MINI_MAP_TEMPLATE,
+    CatanMap,
+    LandTile,
+    MapTemplate,
+    Port,
+    Water,
+    initialize_tiles,
+)
+
+MAGIC = b"CATANMAPBANK"
+VERSION = 1
+HEADER = struct.Struct("<12sB8sII")  # magic, version, map type, record size, count
+NO_RESOURCE = 255  # desert tiles and 3:1 ports
+
+MAP_TEMPLATES: Dict[str, MapTemplate] = {
+    "BASE": BASE_MAP_TEMPLATE,
+    "MINI": MINI_MAP_TEMPLATE,
+}
+
+Shuffles = Tuple[List[int], List, List]  # numbers, port and tile resources
+
+
+def get_map_template(map_type: str) -> MapTemplate:
+    if map_type not in MAP_TEMPLATES:
+        raise ValueError(
+            f"Map bank can't hold {map_type} maps. Use one of {list(MAP_TEMPLATES)}"
+        )
+    return MAP_TEMPLATES[map_type]
+
+
+def record_size(map_template: MapTemplate) -> int:
+    return (
+        len(map_template.numbers)
+        + len(map_template.port_resources)
+        + len(map_template.tile_resources)
+    )
+
+
+def shuffle_template(map_template: MapTemplate, rng: random.Random) -> Shuffles:
+    """Same shuffles (and draws) as initialize_tiles does"""
+    port_resources = rng.sample(
+        map_template.port_resources, len(map_template.port_resources)
+    )
+    tile_resources = rng.sample(
+        map_template.tile_resources, len(map_template.tile_resources)
+    )
+    numbers = rng.sample(map_template.numbers, len(map_template.numbers))
+    return numbers, port_resources, tile_resources
+
+
+def encode_shuffles(shuffles: Shuffles) -> bytes:
+    numbers, port_resources, tile_resources = shuffles
+    resources = [NO_RESOURCE if r is None else r for r in port_resources]
+    resources += [NO_RESOURCE if r is None else r for r in tile_resources]
+    return bytes(numbers) + bytes(resources)
+
+
+def decode_shuffles(map_template: MapTemplate, record: bytes) -> Shuffles:
+    num_numbers = len(map_template.numbers)
+    num_ports = len(map_template.port_resources)
+    resources = [None if r == NO_RESOURCE else r for r in record[num_numbers:]]
+    return (
+        list(record[:num_numbers]),
+        resources[:num_ports],
+        resources[num_ports:],
+    )
+
+
+def write_map_bank(
+    path: str,
+    map_type: Literal["BASE", "MINI"],
+    num_maps: int,
+    seed: Optional[int] = None,
+):
+    """Generates num_maps shuffled maps of map_type and saves them to path"""
+    map_template = get_map_template(map_type)
+    rng = random.Random(seed)
+    with open(path, "wb") as file:
+        file.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                map_type.encode("ascii"),
+                record_size(map_template),
+                num_maps,
+            )
+        )
+        for _ in range(num_maps):
+            file.write(encode_shuffles(shuffle_template(map_template, rng)))
+
+
+@functools.lru_cache(len(MAP_TEMPLATES))
+def get_template_skeleton(map_type: str):
+    """(coordinate, tile type, nodes, edges) of each tile of a template.
+    Node and edge ids only depend on the template's topology."""
+    tiles = initialize_tiles(get_map_template(map_type), rng=random.Random(0))
+    return [
+        (coordinate, type(tile), tile.nodes, tile.edges)
+        for coordinate, tile in tiles.items()
+    ]
+
+
+def build_map_from_shuffles(map_type: str, shuffles: Shuffles) -> CatanMap:
+    """Equivalent to initialize_tiles with these shuffles, without
+    recomputing node and edge ids. Maps share their nodes and edges dicts
+    (maps are read-only)."""
+    numbers, port_resources, tile_resources = (list(s) for s in shuffles)
+    directions = {
+        coordinate: tile_type[1]
+        for coordinate, tile_type in get_map_template(map_type).topology.items()
+        if isinstance(tile_type, tuple)
+    }
+
+    tiles = {}
+    tile_id = 0
+    port_id = 0
+    for coordinate, tile_type, nodes, edges in get_template_skeleton(map_type):
+        if tile_type is Port:
+            resource = port_resources.pop()
+            tiles[coordinate] = Port(
+                port_id, resource, directions[coordinate], nodes, edges
+            )
+            port_id += 1
+        elif tile_type is LandTile:
+            resource = tile_resources.pop()
+            number = numbers.pop() if resource is not None else None
+            tiles[coordinate] = LandTile(tile_id, resource, number, nodes, edges)
+            tile_id += 1
+        else:
+            tiles[coordinate] = Water(nodes, edges)
+    return CatanMap.from_tiles(tiles)
+
+
+class MapBank:
+    """Read-only, memory-mapped map bank file (see write_map_bank).
+
+    Attributes:
+        path (str): Path of the file.
+        map_type (str): Type of all maps in the bank (e.g. "BASE").
+        map_template (MapTemplate): Template of all maps in the bank.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._buffer) < HEADER.size:
+            raise ValueError(f"{path} is not a map bank")
+        magic, version, map_type, self._record_size, self._num_maps = HEADER.unpack(
+            self._buffer[: HEADER.size]
+        )
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a map bank (of version {VERSION})")
+
+        self.map_type = map_type.rstrip(b"\0").decode("ascii")
+        self.map_template = get_map_template(self.map_type)
+        expected_size = HEADER.size + self._record_size * self._num_maps
+        if self._record_size != record_size(self.map_template) or (
+            len(self._buffer) != expected_size
+        ):
+            raise ValueError(f"{path} is a corrupt map bank")
+
+    def __len__(self) -> int:
+        return self._num_maps
+
+    def shuffles(self, map_id: int) -> Shuffles:
+        """Numbers, port resources and tile resources of map map_id"""
+        if not 0 <= map_id < self._num_maps:
+            raise IndexError(f"map id {map_id} not in bank of {self._num_maps} maps")
+        start = HEADER.size + map_id * self._record_size
+        record = self._buffer[start : start + self._record_size]
+        return decode_shuffles(self.map_template, record)
+
+    def build_map(self, map_id: int) -> CatanMap:
+        return build_map_from_shuffles(self.map_type, self.shuffles(map_id))
+
+    def close(self):
+        self._buffer.close()
+
+    def __getstate__(self):
+        return self.path  # e.g. to send banks to worker processes
+
+    def __setstate__(self, path):
+        self.__init__(path)
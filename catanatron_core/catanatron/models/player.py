@@ -1,4 +1,3 @@
-import random
 from enum import Enum
 
 
@@ -80,7 +79,10 @@ class RandomPlayer(Player):
     """Random AI player that selects an action randomly from the list of playable_actions"""
 
     def decide(self, game, playable_actions):
-        index = random.randrange(0, len(playable_actions))
+        if len(playable_actions) == 1:
+            return playable_actions[0]
+
+        index = game.state.rng.randrange(0, len(playable_actions))
         return playable_actions[index]
     
 
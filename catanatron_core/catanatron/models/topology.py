@@ -0,0 +1,153 @@
+"""
+Precomputed graph tables of the board (neighbors, edges and incidence), so
+that the game loop can use plain tuples instead of networkx graphs.
+
+Node and edge orders replicate the networkx graph this module replaced
+(board.STATIC_GRAPH), since edge order is used by features and action spaces.
+"""
+
+import functools
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Tuple
+
+from catanatron.cache import cached_table
+from catanatron.models import coordinate_system
+from catanatron.models import map as map_module
+from catanatron.models.map import (
+    BASE_MAP_TEMPLATE,
+    MINI_MAP_TEMPLATE,
+    NUM_NODES,
+    CatanMap,
+    EdgeId,
+    NodeId,
+    get_tournament_map,
+)
+
+
+class Topology(NamedTuple):
+    """Tables describing an (undirected) graph of nodes and edges.
+
+    Attributes:
+        node_ids (Tuple[NodeId, ...]): Nodes, in insertion order.
+        neighbors (Tuple[Tuple[NodeId, ...], ...]): Indexed by node id. Empty
+            for node ids not in this graph.
+        edges (Tuple[EdgeId, ...]): Each edge once, in networkx order and
+            orientation (not necessarily sorted).
+        incident_edges (Tuple[Tuple[int, ...], ...]): Indexed by node id.
+            Indexes into .edges of edges touching the node.
+    """
+
+    node_ids: Tuple[NodeId, ...]
+    neighbors: Tuple[Tuple[NodeId, ...], ...]
+    edges: Tuple[EdgeId, ...]
+    incident_edges: Tuple[Tuple[int, ...], ...]
+
+
+def build_topology(adjacency: Dict[NodeId, Iterable[NodeId]]) -> Topology:
+    """Compiles an insertion-ordered adjacency mapping into a Topology"""
+    size = max(adjacency) + 1 if len(adjacency) > 0 else 0
+    neighbors: List[Tuple[NodeId, ...]] = [()] * size
+    for node_id, node_neighbors in adjacency.items():
+        neighbors[node_id] = tuple(node_neighbors)
+
+    edges: List[EdgeId] = []
+    incident_edges: List[List[int]] = [[] for _ in range(size)]
+    seen = set()
+    for node_id in adjacency:
+        for neighbor_id in neighbors[node_id]:
+            if neighbor_id not in seen:
+                incident_edges[node_id].append(len(edges))
+                incident_edges[neighbor_id].append(len(edges))
+                edges.append((node_id, neighbor_id))
+        seen.add(node_id)
+
+    return Topology(
+        tuple(adjacency),
+        tuple(neighbors),
+        tuple(edges),
+        tuple(tuple(indexes) for indexes in incident_edges),
+    )
+
+
+def build_map_topology(catan_map: CatanMap) -> Topology:
+    """Topology of all nodes and edges of a map's tiles (including water)"""
+    adjacency: Dict[NodeId, Dict[NodeId, None]] = {}
+    for tile in catan_map.tiles.values():
+        for node_id in tile.nodes.values():
+            adjacency.setdefault(node_id, {})
+        for a, b in tile.edges.values():
+            adjacency.setdefault(a, {})[b] = None
+            adjacency.setdefault(b, {})[a] = None
+    return build_topology(adjacency)
+
+
+def subtopology(topology: Topology, node_ids: FrozenSet[NodeId]) -> Topology:
+    """Topology induced by the given nodes"""
+    adjacency = {
+        node_id: [n for n in topology.neighbors[node_id] if n in node_ids]
+        for node_id in topology.node_ids
+        if node_id in node_ids
+    }
+    return build_topology(adjacency)
+
+
+# Loaded from the on-disk cache, instead of initializing a map on every import
+STATIC_TOPOLOGY = Topology(
+    *cached_table(
+        "static_topology",
+        lambda: tuple(build_map_topology(CatanMap.from_template(BASE_MAP_TEMPLATE))),
+        [__file__, map_module.__file__, coordinate_system.__file__],
+    )
+)
+
+
+@functools.lru_cache(8)
+def get_land_topology(land_nodes: FrozenSet[NodeId]) -> Topology:
+    """Topology of the edges roads can be built on, for given land nodes"""
+    return subtopology(STATIC_TOPOLOGY, land_nodes)
+
+
+@functools.lru_cache(1)
+def get_land_topologies() -> Dict[str, Topology]:
+    """Land topologies of the built-in maps, by map type"""
+    return {
+        "BASE": get_land_topology(frozenset(range(NUM_NODES))),
+        "MINI": get_land_topology(CatanMap.from_template(MINI_MAP_TEMPLATE).land_nodes),
+        "TOURNAMENT": get_land_topology(get_tournament_map().land_nodes),
+    }
+
+
+def __getattr__(name):
+    # LAND_TOPOLOGIES is built on first access (PEP 562), not on import
+    if name == "LAND_TOPOLOGIES":
+        return get_land_topologies()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def bfs_distances(topology: Topology, source: NodeId) -> Dict[NodeId, int]:
+    distances = {source: 0}
+    agenda = deque([source])
+    while agenda:
+        node_id = agenda.popleft()
+        for neighbor_id in topology.neighbors[node_id]:
+            if neighbor_id not in distances:
+                distances[neighbor_id] = distances[node_id] + 1
+                agenda.append(neighbor_id)
+    return distances
+
+
+def shortest_path(topology: Topology, source: NodeId, target: NodeId):
+    """One shortest path (as list of nodes) from source to target"""
+    parents = {source: source}
+    agenda = deque([source])
+    while agenda and target not in parents:
+        node_id = agenda.popleft()
+        for neighbor_id in topology.neighbors[node_id]:
+            if neighbor_id not in parents:
+                parents[neighbor_id] = node_id
+                agenda.append(neighbor_id)
+
+    path = [target]
+    while path[-1] != source:
+        path.append(parents[path[-1]])
+    return path[::-1]
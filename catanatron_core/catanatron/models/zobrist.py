@@ -0,0 +1,119 @@
+"""
+Zobrist hashing of game states, to get 64-bit keys for transposition tables
+and deduplication.
+
+Buildings and roads (the part of a state that grows during a game) are
+Zobrist-hashed: the XOR of one random 64-bit number per (color, building,
+location). Board maintains it (board.zobrist) as things get built. The rest
+of the state (robber, hands, bank, dev deck, prompt flags and current player)
+is a fixed-size vector of small ints, which Python hashes faster in one
+C-level tuple hash than with per-field table lookups. zobrist_key mixes that
+hash in.
+
+Tables are drawn from a fixed seed, and the tuple hash only sees ints, so
+keys are stable across processes (regardless of PYTHONHASHSEED).
+"""
+import random
+from typing import Dict, List
+
+from catanatron.models.enums import (
+    KNIGHT,
+    MONOPOLY,
+    ROAD_BUILDING,
+    VICTORY_POINT,
+    YEAR_OF_PLENTY,
+    ActionPrompt,
+    SETTLEMENT,
+    CITY,
+)
+from catanatron.models.map import NUM_NODES
+from catanatron.models.player import Color
+from catanatron.models.topology import STATIC_TOPOLOGY
+
+# If True, State.zobrist_key() checks the maintained key against compute_zobrist_key
+VERIFY_KEYS = False
+
+MASK_64 = (1 << 64) - 1
+
+_random = random.Random(20211104)
+
+
+def _draw_keys(size: int) -> List[int]:
+    return [_random.getrandbits(64) for _ in range(size)]
+
+
+COLOR_INDEX = {color: index for index, color in enumerate(Color)}
+# color index => building type => node id
+BUILDING_KEYS = [
+    {SETTLEMENT: _draw_keys(NUM_NODES), CITY: _draw_keys(NUM_NODES)} for _ in Color
+]
+# color index => edge (both orientations)
+ROAD_KEYS: List[Dict] = []
+for _ in Color:
+    _edges = sorted((min(edge), max(edge)) for edge in STATIC_TOPOLOGY.edges)
+    _keys = dict(zip(_edges, _draw_keys(len(_edges))))
+    _keys.update({(b, a): key for (a, b), key in list(_keys.items())})
+    ROAD_KEYS.append(_keys)
+PROMPT_INDEX = {prompt: index for index, prompt in enumerate(ActionPrompt)}
+
+
+def building_key(color: Color, building_type, node_id) -> int:
+    return BUILDING_KEYS[COLOR_INDEX[color]][building_type][node_id]
+
+
+def road_key(color: Color, edge) -> int:
+    return ROAD_KEYS[COLOR_INDEX[color]][edge]
+
+
+def compute_board_zobrist(board) -> int:
+    """From-scratch equivalent of board.zobrist (buildings and roads)"""
+    key = 0
+    for node_id, (color, building_type) in board.buildings.items():
+        key ^= building_key(color, building_type, node_id)
+    for (a, b), color in board.roads.items():
+        if a < b:  # roads has both orientations
+            key ^= road_key(color, (a, b))
+    return key
+
+
+def mix64(value: int) -> int:
+    """Spreads a Python hash over all 64 bits (splitmix64 finalizer)"""
+    value &= MASK_64
+    value = (value ^ (value >> 30)) * 0xBF58476D1CE4E5B9 & MASK_64
+    value = (value ^ (value >> 27)) * 0x94D049BB133111EB & MASK_64
+    return value ^ (value >> 31)
+
+
+def fold_state_keys(state, key: int) -> int:
+    """Mixes into key the parts of state not tracked by board.zobrist"""
+    development_listdeck = state.development_listdeck
+    scalars = hash(
+        (
+            state.board.robber_coordinate,
+            tuple(state.player_state_array),
+            tuple(state.resource_freqdeck),
+            development_listdeck.count(KNIGHT),
+            development_listdeck.count(YEAR_OF_PLENTY),
+            development_listdeck.count(MONOPOLY),
+            development_listdeck.count(ROAD_BUILDING),
+            development_listdeck.count(VICTORY_POINT),
+            PROMPT_INDEX[state.current_prompt],
+            state.current_player_index,
+            state.current_turn_index,
+            state.is_initial_build_phase,
+            state.is_discarding,
+            state.is_moving_knight,
+            state.is_road_building,
+            state.free_roads_available,
+            state.is_resolving_trade,
+            state.current_trade,
+            state.acceptees,
+        )
+    )
+    return key ^ mix64(scalars)
+
+
+def compute_zobrist_key(state) -> int:
+    """From-scratch Zobrist key of state. Same as state.zobrist_key(), but
+    O(buildings); used to verify the incrementally maintained parts."""
+    return fold_state_keys(state, compute_board_zobrist(state.board))
@@ -1,5 +1,3 @@
-import random
-
 from catanatron.models.player import Player
 from catanatron.models.actions import ActionType
 
@@ -18,10 +16,13 @@ class WeightedRandomPlayer(Player):
     """
 
     def decide(self, game, playable_actions):
+        if len(playable_actions) == 1:
+            return playable_actions[0]
+
         bloated_actions = []
         for action in playable_actions:
             weight = WEIGHTS_BY_ACTION_TYPE.get(action.action_type, 1)
             bloated_actions.extend([action] * weight)
 
-        index = random.randrange(0, len(bloated_actions))
+        index = game.state.rng.randrange(0, len(bloated_actions))
         return bloated_actions[index]
@@ -0,0 +1,547 @@
+"""
+Compact, versioned binary snapshots of games and states, to store them and
+send them between processes (server, datasets, workers) instead of pickling
+them. Snapshots don't include Player objects or maps, so they are several
+times smaller than pickles, and faster to save and load.
+
+A snapshot holds everything a State needs to carry on exactly where it left
+off: struct-packed fixed fields and player rows, the bank, the development
+deck (in order), the board as bitboards (plus connected components and road
+lengths, which depend on build order), the state of the random generator
+and the length of the action log (and, unless left out, the log itself).
+Board caches and playable actions are rebuilt (lazily) after loading.
+
+The map is saved as its template and shuffles, like in map banks, so only
+maps of the BASE and MINI templates (e.g. also the tournament map) can be
+saved. Loading snapshots with the same map shares it (maps are read-only).
+
+Example:
+    data = dump_state(game.state)
+    state = load_state(data, players)
+"""
+
+import functools
+import itertools
+import random
+import struct
+from collections import defaultdict
+from typing import Iterable, List, Optional
+
+from catanatron.engine_stats import EngineStats
+from catanatron.game import Game
+from catanatron.models.action_log import ActionLog
+from catanatron.models.board import EDGE_IDS, Board, get_land_edges_mask, iter_bits
+from catanatron.models.enums import (
+    CITY,
+    SETTLEMENT,
+    Action,
+    ActionPrompt,
+    ActionType,
+)
+from catanatron.models.map import CatanMap, LandTile, Port
+from catanatron.models.map_bank import (
+    MAP_TEMPLATES,
+    build_map_from_shuffles,
+    decode_shuffles,
+    encode_shuffles,
+    get_template_skeleton,
+    record_size,
+)
+from catanatron.models.player import Color, Player
+from catanatron.models.topology import STATIC_TOPOLOGY
+from catanatron.models.zobrist import compute_board_zobrist
+from catanatron.state import PLAYER_INITIAL_ROW, State
+from catanatron.state_functions import NUM_PLAYER_STATE_FIELDS
+
+MAGIC = b"CATANSTS"
+GAME_MAGIC = b"CATANGMS"
+VERSION = 1
+HEADER = struct.Struct("<8sB")  # magic, version
+# num players, discard limit, num turns, current player, current turn, prompt,
+# flags, free roads, acceptees, current trade, bank, robber coordinate,
+# road color, road length, num development cards, num actions
+STATE_FIELDS = struct.Struct("<BHIBBBBBB11B5B3bBBBI")
+NODE_MASK_SIZE = (len(STATIC_TOPOLOGY.node_ids) + 7) // 8  # in bytes
+EDGE_MASK_SIZE = (len(EDGE_IDS) + 7) // 8
+# settlements, cities, roads, network and buildable edges of a color
+COLOR_MASKS = struct.Struct(
+    f"<{NODE_MASK_SIZE}s{NODE_MASK_SIZE}s{EDGE_MASK_SIZE}s"
+    f"{NODE_MASK_SIZE}s{EDGE_MASK_SIZE}s"
+)
+RNG_STATE = struct.Struct("<625I?d")  # Mersenne Twister state and gauss_next
+GAME_FIELDS = struct.Struct("<8sBHBB")  # magic, version, vps to win, seed, id
+
+COLORS = list(Color)
+COLOR_INDEX = {color: index for index, color in enumerate(COLORS)}
+NO_COLOR = 255
+PROMPTS = list(ActionPrompt)
+PROMPT_INDEX = {prompt: index for index, prompt in enumerate(PROMPTS)}
+ACTION_TYPES = list(ActionType)
+ACTION_TYPE_INDEX = {action_type: i for i, action_type in enumerate(ACTION_TYPES)}
+MAP_TYPES = list(MAP_TEMPLATES)
+BOOL_FIELDS = [i for i, value in enumerate(PLAYER_INITIAL_ROW) if value is False]
+
+# Action values take a byte per int, None or Color, and tuples and lists
+# a marker and length byte before their elements.
+INT_OFFSET = 64  # bytes 0 to 199 are the ints -64 to 135
+NONE_BYTE = 200
+COLOR_BYTE = 201  # to 204
+TUPLE_BYTE = 210
+LIST_BYTE = 211
+
+
+# ===== Maps
+@functools.lru_cache(maxsize=16)
+def encode_map(catan_map: CatanMap) -> bytes:
+    """Map type (index into MAP_TYPES) followed by the map's shuffles"""
+    for map_type_index, map_type in enumerate(MAP_TYPES):
+        skeleton = get_template_skeleton(map_type)
+        if len(skeleton) != len(catan_map.tiles):
+            continue
+        tiles = [catan_map.tiles.get(coordinate) for coordinate, *_ in skeleton]
+        if any(
+            type(tile) is not tile_type or tile.nodes != nodes
+            for tile, (_, tile_type, nodes, _) in zip(tiles, skeleton)
+        ):
+            continue
+
+        # build_map_from_shuffles pops from the end of each shuffle
+        port_resources = [tile.resource for tile in tiles if type(tile) is Port]
+        land_tiles = [tile for tile in tiles if type(tile) is LandTile]
+        tile_resources = [tile.resource for tile in land_tiles]
+        numbers = [tile.number for tile in land_tiles if tile.resource is not None]
+        unused_numbers = list(MAP_TEMPLATES[map_type].numbers)  # e.g. in MINI
+        for number in numbers:
+            unused_numbers.remove(number)
+        shuffles = (
+            unused_numbers + numbers[::-1],
+            port_resources[::-1],
+            tile_resources[::-1],
+        )
+        return bytes((map_type_index,)) + encode_shuffles(shuffles)
+    raise ValueError(f"Only maps of templates {MAP_TYPES} can be saved")
+
+
+@functools.lru_cache(maxsize=64)
+def decode_map(map_type: str, record: bytes) -> CatanMap:
+    shuffles = decode_shuffles(MAP_TEMPLATES[map_type], record)
+    return build_map_from_shuffles(map_type, shuffles)
+
+
+def node_mask_bytes(mask: int) -> bytes:
+    return mask.to_bytes(NODE_MASK_SIZE, "little")
+
+
+def edge_mask_bytes(mask: int) -> bytes:
+    return mask.to_bytes(EDGE_MASK_SIZE, "little")
+
+
+# ===== Actions
+def encode_value(value, out: bytearray):
+    if value is None:
+        out.append(NONE_BYTE)
+    elif isinstance(value, Color):
+        out.append(COLOR_BYTE + COLOR_INDEX[value])
+    elif isinstance(value, (tuple, list)):
+        out.append(TUPLE_BYTE if isinstance(value, tuple) else LIST_BYTE)
+        out.append(len(value))
+        for element in value:
+            encode_value(element, out)
+    elif -INT_OFFSET <= value < NONE_BYTE - INT_OFFSET:
+        out.append(value + INT_OFFSET)
+    else:
+        raise ValueError(f"Can't save action value {value}")
+
+
+def decode_value(record: bytes, index: int):
+    """Returns the value encoded at record[index] and the index after it"""
+    byte = record[index]
+    if byte < NONE_BYTE:
+        return byte - INT_OFFSET, index + 1
+    if byte == NONE_BYTE:
+        return None, index + 1
+    if byte < TUPLE_BYTE:
+        return COLORS[byte - COLOR_BYTE], index + 1
+
+    elements = []
+    index += 2
+    for _ in range(record[index - 1]):
+        element, index = decode_value(record, index)
+        elements.append(element)
+    return (tuple(elements) if byte == TUPLE_BYTE else elements), index
+
+
+def pack_action(action: Action) -> bytes:
+    """Length-prefixed record of color, action type and value"""
+    try:
+        return _pack_hashable_action(action)
+    except TypeError:  # e.g. DISCARD, whose value is a list
+        return _pack_action(action)
+
+
+@functools.lru_cache(maxsize=4096)
+def _pack_hashable_action(action: Action) -> bytes:
+    return _pack_action(action)  # memoized, since games repeat actions a lot
+
+
+def _pack_action(action: Action) -> bytes:
+    record = bytearray(
+        (COLOR_INDEX[action.color], ACTION_TYPE_INDEX[action.action_type])
+    )
+    encode_value(action.value, record)
+    return bytes((len(record),)) + record
+
+
+@functools.lru_cache(maxsize=4096)
+def unpack_action(record: bytes) -> Action:
+    """Inverse of pack_action (without the length). Memoized too, so
+    decoded actions are shared (logs are read-only)."""
+    value, _ = decode_value(record, 2)
+    return Action(COLORS[record[0]], ACTION_TYPES[record[1]], value)
+
+
+# ===== States
+def dump_state(state: State, actions: bool = True) -> bytes:
+    """Saves state into a snapshot (see module docstring).
+
+    Args:
+        state (State): State to save. Its players are not saved.
+        actions (bool, optional): Whether to save the action log. Otherwise
+            only its length is saved, and loading takes the log from the
+            caller (e.g. when saving every state of a game). Defaults to True.
+
+    Raises:
+        ValueError: If the map isn't of a supported template.
+
+    Returns:
+        bytes: The snapshot.
+    """
+    board = state.board
+    colors = state.colors
+    flags = (
+        state.is_initial_build_phase
+        | state.is_discarding << 1
+        | state.is_moving_knight << 2
+        | state.is_road_building << 3
+        | state.is_resolving_trade << 4
+        | actions << 5
+    )
+    acceptees = sum(
+        1 << index for index, accepted in enumerate(state.acceptees) if accepted
+    )
+    chunks = [
+        HEADER.pack(MAGIC, VERSION),
+        encode_map(board.map),
+        STATE_FIELDS.pack(
+            len(colors),
+            state.discard_limit,
+            state.num_turns,
+            state.current_player_index,
+            state.current_turn_index,
+            PROMPT_INDEX[state.current_prompt],
+            flags,
+            state.free_roads_available,
+            acceptees,
+            *state.current_trade,
+            *state.resource_freqdeck,
+            *board.robber_coordinate,
+            NO_COLOR if board.road_color is None else COLOR_INDEX[board.road_color],
+            board.road_length,
+            len(state.development_listdeck),
+            len(state.actions),
+        ),
+        bytes(COLOR_INDEX[color] for color in colors),
+        struct.pack(f"<{len(state.player_state_array)}h", *state.player_state_array),
+        bytes(state.development_listdeck),
+    ]
+
+    for color in colors:
+        chunks.append(
+            COLOR_MASKS.pack(
+                node_mask_bytes(board.settlement_masks.get(color, 0)),
+                node_mask_bytes(board.city_masks.get(color, 0)),
+                edge_mask_bytes(board.road_masks.get(color, 0)),
+                node_mask_bytes(board.network_masks.get(color, 0)),
+                edge_mask_bytes(board.buildable_edge_masks.get(color, 0)),
+            )
+        )
+        roads, settlements, cities = state.buildings_by_color[color]
+        chunks.append(bytes((len(roads), len(settlements), len(cities))))
+        chunks.append(bytes(itertools.chain.from_iterable(roads)))
+        chunks.append(bytes(settlements) + bytes(cities))
+
+        components = board.component_masks.get(color, ())
+        chunks.append(bytes((len(components),)))
+        chunks.extend(node_mask_bytes(nodes) for nodes in components)
+
+    # road_lengths is in insertion order, which breaks longest road ties
+    chunks.append(bytes((len(board.road_lengths),)))
+    for color, length in board.road_lengths.items():
+        chunks.append(bytes((COLOR_INDEX[color], length)))
+    chunks.append(node_mask_bytes(board.buildable_node_mask))
+
+    # the generator isn't drawn from, so it doesn't need forking (see .rng)
+    _, internal_state, gauss_next = state._rng.getstate()
+    chunks.append(
+        RNG_STATE.pack(*internal_state, gauss_next is not None, gauss_next or 0.0)
+    )
+
+    if actions:
+        chunks.extend(pack_action(action) for action in state.actions)
+    return b"".join(chunks)
+
+
+class _Reader:
+    """Cursor over a snapshot"""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+
+    def unpack(self, fields: struct.Struct):
+        values = fields.unpack_from(self.data, self.offset)
+        self.offset += fields.size
+        return values
+
+    def take(self, size: int) -> bytes:
+        if self.offset + size > len(self.data):
+            raise ValueError("snapshot is truncated")
+        chunk = self.data[self.offset : self.offset + size]
+        self.offset += size
+        return chunk
+
+
+def load_state(
+    data: bytes,
+    players: Optional[Iterable[Player]] = None,
+    actions: Optional[Iterable[Action]] = None,
+) -> State:
+    """Loads a snapshot saved with dump_state.
+
+    Args:
+        data (bytes): The snapshot.
+        players (Iterable[Player], optional): Players to seat again (by color,
+            in the saved seating order) in .players. Defaults to None (no
+            players; enough for states that are only read or searched).
+        actions (Iterable[Action], optional): Action log to use if the
+            snapshot was saved without its own, e.g. that of the game it is
+            from. Only the first len(saved log) actions are taken. Defaults
+            to None (an empty log).
+
+    Raises:
+        ValueError: If data isn't a (valid) snapshot of this version.
+
+    Returns:
+        State: The state, as it was saved.
+    """
+    try:
+        return _load_state(_Reader(data), players, actions)
+    except (struct.error, IndexError, KeyError) as error:
+        raise ValueError(f"Corrupt state snapshot ({error!r})") from error
+
+
+def _load_state(reader: _Reader, players, actions) -> State:
+    magic, version = reader.unpack(HEADER)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a state snapshot (of version {VERSION})")
+    (map_type_index,) = reader.take(1)
+    map_type = MAP_TYPES[map_type_index]
+    catan_map = decode_map(map_type, reader.take(record_size(MAP_TEMPLATES[map_type])))
+
+    fields = reader.unpack(STATE_FIELDS)
+    (
+        num_players,
+        discard_limit,
+        num_turns,
+        current_player_index,
+        current_turn_index,
+        prompt_index,
+        flags,
+        free_roads_available,
+        acceptees,
+    ) = fields[:9]
+    current_trade = fields[9:20]
+    resource_freqdeck = list(fields[20:25])
+    robber_coordinate = fields[25:28]
+    road_color_index, road_length, num_dev_cards, num_actions = fields[28:]
+
+    state = State([], None, initialize=False)
+    state.colors = tuple(COLORS[index] for index in reader.take(num_players))
+    state.color_to_index = {color: i for i, color in enumerate(state.colors)}
+    if players is None:
+        state.players = []
+    else:
+        by_color = {player.color: player for player in players}
+        state.players = [by_color[color] for color in state.colors]
+    state.discard_limit = discard_limit
+
+    row_fields = struct.Struct(f"<{num_players * NUM_PLAYER_STATE_FIELDS}h")
+    player_state_array: List = list(reader.unpack(row_fields))
+    for offset in range(0, len(player_state_array), NUM_PLAYER_STATE_FIELDS):
+        for index in BOOL_FIELDS:
+            player_state_array[offset + index] = bool(
+                player_state_array[offset + index]
+            )
+    state.player_state_array = player_state_array
+    state.resource_freqdeck = resource_freqdeck
+    state.development_listdeck = list(reader.take(num_dev_cards))
+
+    board = Board(catan_map, initialize=False)
+    board.map = catan_map
+    board.buildings = dict()
+    board.roads = dict()
+    board.component_masks = defaultdict(tuple)
+    board.settlement_masks = defaultdict(int)
+    board.city_masks = defaultdict(int)
+    board.road_masks = defaultdict(int)
+    board.network_masks = defaultdict(int)
+    board.buildable_edge_masks = defaultdict(int)
+    board.occupied_node_mask = 0
+    board.occupied_edge_mask = 0
+    board.payouts = dict()
+    board.tile_colors = dict()
+    state.buildings_by_color = dict()
+    for color in state.colors:
+        settlements, cities, roads, network, buildable_edges = (
+            int.from_bytes(mask, "little") for mask in reader.unpack(COLOR_MASKS)
+        )
+        board.settlement_masks[color] = settlements
+        board.city_masks[color] = cities
+        board.road_masks[color] = roads
+        board.network_masks[color] = network
+        board.buildable_edge_masks[color] = buildable_edges
+        board.occupied_node_mask |= settlements | cities
+        board.occupied_edge_mask |= roads
+        for node_id in iter_bits(settlements):
+            board.buildings[node_id] = (color, SETTLEMENT)
+            board._add_payouts(color, node_id, SETTLEMENT)
+            board._add_tile_colors(color, node_id)
+        for node_id in iter_bits(cities):
+            board.buildings[node_id] = (color, CITY)
+            board._add_payouts(color, node_id, CITY)
+            board._add_tile_colors(color, node_id)
+        for index in iter_bits(roads):
+            a, b = EDGE_IDS[index]
+            board.roads[(a, b)] = board.roads[(b, a)] = color
+
+        num_roads, num_settlements, num_cities = reader.take(3)
+        road_nodes = reader.take(2 * num_roads)
+        node_ids = tuple(reader.take(num_settlements + num_cities))
+        state.buildings_by_color[color] = (
+            tuple(zip(road_nodes[::2], road_nodes[1::2])),
+            node_ids[:num_settlements],
+            node_ids[num_settlements:],
+        )
+
+        (num_components,) = reader.take(1)
+        board.component_masks[color] = tuple(
+            int.from_bytes(reader.take(NODE_MASK_SIZE), "little")
+            for _ in range(num_components)
+        )
+
+    board.road_lengths = defaultdict(int)
+    (num_road_lengths,) = reader.take(1)
+    for _ in range(num_road_lengths):
+        color_index, length = reader.take(2)
+        board.road_lengths[COLORS[color_index]] = length
+    board.road_color = (
+        None if road_color_index == NO_COLOR else COLORS[road_color_index]
+    )
+    board.road_length = road_length
+    board.buildable_node_mask = int.from_bytes(reader.take(NODE_MASK_SIZE), "little")
+    board.board_buildable_ids = set(iter_bits(board.buildable_node_mask))
+    board.land_edges_mask = get_land_edges_mask(catan_map.land_nodes)
+    board.robber_coordinate = robber_coordinate
+    board.zobrist = compute_board_zobrist(board)
+    state.board = board
+
+    *internal_state, has_gauss_next, gauss_next = reader.unpack(RNG_STATE)
+    rng = random.Random.__new__(random.Random)  # skips seeding from os
+    rng.setstate(
+        (
+            random.Random.VERSION,
+            tuple(internal_state),
+            gauss_next if has_gauss_next else None,
+        )
+    )
+    state.rng = rng
+
+    if flags >> 5 & 1:
+        data, offset = reader.data, reader.offset
+        decoded = []
+        for _ in range(num_actions):
+            end = offset + 1 + data[offset]
+            decoded.append(unpack_action(data[offset + 1 : end]))
+            offset = end
+        reader.offset = offset
+        state.actions = ActionLog(decoded)
+    elif actions is not None:
+        state.actions = ActionLog(itertools.islice(actions, num_actions))
+    else:
+        state.actions = ActionLog()
+    if reader.offset != len(reader.data):
+        raise ValueError("Corrupt state snapshot (trailing data)")
+
+    state.num_turns = num_turns
+    state.current_player_index = current_player_index
+    state.current_turn_index = current_turn_index
+    state.current_prompt = PROMPTS[prompt_index]
+    state.is_initial_build_phase = bool(flags & 1)
+    state.is_discarding = bool(flags >> 1 & 1)
+    state.is_moving_knight = bool(flags >> 2 & 1)
+    state.is_road_building = bool(flags >> 3 & 1)
+    state.is_resolving_trade = bool(flags >> 4 & 1)
+    state.free_roads_available = free_roads_available
+    state.current_trade = current_trade
+    state.acceptees = tuple(bool(acceptees >> i & 1) for i in range(num_players))
+    state.playable_actions = None  # regenerated on first read
+    return state
+
+
+# ===== Games
+def dump_game(game: Game, actions: bool = True) -> bytes:
+    """Saves game (its id, seed, victory points to win and state) into a
+    snapshot. See dump_state for the arguments. Engine stats (see
+    Game.stats) are not saved: they time the process that played."""
+    seed_bytes = game.seed.to_bytes(
+        game.seed.bit_length() // 8 + 1, "little", signed=True
+    )
+    id_bytes = game.id.encode("utf-8")
+    return b"".join(
+        (
+            GAME_FIELDS.pack(
+                GAME_MAGIC, VERSION, game.vps_to_win, len(seed_bytes), len(id_bytes)
+            ),
+            seed_bytes,
+            id_bytes,
+            dump_state(game.state, actions),
+        )
+    )
+
+
+def load_game(
+    data: bytes,
+    players: Optional[Iterable[Player]] = None,
+    actions: Optional[Iterable[Action]] = None,
+    collect_stats: bool = False,
+) -> Game:
+    """Loads a snapshot saved with dump_game. See load_state for the
+    arguments (players are needed to play the game on). Stats aren't in
+    snapshots: pass collect_stats=True to collect them from here on, like
+    Game(collect_stats=True)."""
+    reader = _Reader(data)
+    try:
+        magic, version, vps_to_win, seed_size, id_size = reader.unpack(GAME_FIELDS)
+    except struct.error as error:
+        raise ValueError(f"Corrupt game snapshot ({error!r})") from error
+    if magic != GAME_MAGIC or version != VERSION:
+        raise ValueError(f"Not a game snapshot (of version {VERSION})")
+
+    game = Game(players=[], initialize=False)
+    game.vps_to_win = vps_to_win
+    game.seed = int.from_bytes(reader.take(seed_size), "little", signed=True)
+    game.id = reader.take(id_size).decode("utf-8")
+    game.state = load_state(data[reader.offset :], players, actions)
+    if collect_stats:
+        game.state.stats = game.state.board.stats = EngineStats()
+    return game
@@ -3,19 +3,21 @@ Module with main State class and main apply_action call (game controller).
 """
 
 import random
-import pickle
-from collections import defaultdict
-from typing import Any, List, Tuple, Dict, Iterable
+from time import perf_counter
+from typing import Any, List, Optional, Tuple, Dict, Iterable
 
 from catanatron.models.map import BASE_MAP_TEMPLATE, CatanMap
+from catanatron.models.action_log import ActionLog
 from catanatron.models.board import Board
 from catanatron.models.enums import (
+    CARD_NAMES,
     DEVELOPMENT_CARDS,
+    KNIGHT,
     MONOPOLY,
+    ROAD_BUILDING,
     RESOURCES,
     YEAR_OF_PLENTY,
     SETTLEMENT,
-    CITY,
     Action,
     ActionPrompt,
     ActionType,
@@ -26,7 +28,6 @@ from catanatron.models.decks import (
     SETTLEMENT_COST_FREQDECK,
     draw_from_listdeck,
     freqdeck_add,
-    freqdeck_can_draw,
     freqdeck_contains,
     freqdeck_draw,
     freqdeck_from_listdeck,
@@ -39,7 +40,11 @@ from catanatron.models.actions import (
     generate_playable_actions,
     road_building_possibilities,
 )
+from catanatron.models import zobrist
+from catanatron.engine_stats import EngineStats
 from catanatron.state_functions import (
+    PLAYER_STATE_FIELDS,
+    PlayerStateView,
     build_city,
     build_road,
     build_settlement,
@@ -49,18 +54,19 @@ from catanatron.state_functions import (
     player_can_afford_dev_card,
     player_can_play_dev,
     player_clean_turn,
+    player_roll,
     player_freqdeck_add,
     player_deck_draw,
     player_deck_random_draw,
     player_deck_replenish,
     player_freqdeck_subtract,
     player_deck_to_array,
-    player_key,
     player_num_resource_cards,
+    player_key,
+    player_offset,
     player_resource_freqdeck_contains,
 )
 from catanatron.models.player import Color, Player
-from catanatron.models.enums import FastResource
 
 # These will be prefixed by P0_, P1_, ...
 # Create Player State blueprint
@@ -78,10 +84,12 @@ PLAYER_INITIAL_STATE = {
     "LONGEST_ROAD_LENGTH": 0,
 }
 for resource in RESOURCES:
-    PLAYER_INITIAL_STATE[f"{resource}_IN_HAND"] = 0
+    PLAYER_INITIAL_STATE[f"{CARD_NAMES[resource]}_IN_HAND"] = 0
 for dev_card in DEVELOPMENT_CARDS:
-    PLAYER_INITIAL_STATE[f"{dev_card}_IN_HAND"] = 0
-    PLAYER_INITIAL_STATE[f"PLAYED_{dev_card}"] = 0
+    PLAYER_INITIAL_STATE[f"{CARD_NAMES[dev_card]}_IN_HAND"] = 0
+    PLAYER_INITIAL_STATE[f"PLAYED_{CARD_NAMES[dev_card]}"] = 0
+# Same blueprint, laid out as a row of State.player_state_array
+PLAYER_INITIAL_ROW = [PLAYER_INITIAL_STATE[field] for field in PLAYER_STATE_FIELDS]
 
 
 class State:
@@ -94,9 +102,12 @@ class State:
             information that can be easily copiable.
         board (Board): Board state. Settlement locations, cities,
             roads, ect... See Board class.
-        player_state (Dict[str, Any]): See PLAYER_INITIAL_STATE. It will
-            contain one of each key in PLAYER_INITIAL_STATE but prefixed
-            with "P<index_of_player>".
+        player_state_array (List[Any]): Flat list with one row of
+            PLAYER_STATE_FIELDS per player, in seating order. Use the functions
+            in state_functions.py to read and mutate it.
+        player_state (Mapping[str, Any]): Read-only view of player_state_array
+            (see PlayerStateView). It will contain one of each key in
+            PLAYER_INITIAL_STATE but prefixed with "P<index_of_player>".
             Example: { P0_HAS_ROAD: False, P1_SETTLEMENTS_AVAILABLE: 18, ... }
         color_to_index (Dict[Color, int]): Color to seating location cache
         colors (Tuple[Color]): Represents seating order.
@@ -104,10 +115,13 @@ class State:
             Each element is the amount of [WOOD, BRICK, SHEEP, WHEAT, ORE].
         development_listdeck (List[FastDevCard]): Represents development cards in
             the bank. Already shuffled.
-        buildings_by_color (Dict[Color, Dict[FastBuildingType, List]]): Cache of
-            buildings. Can be used like: `buildings_by_color[Color.RED][SETTLEMENT]`
-            to get a list of all node ids where RED has settlements.
-        actions (List[Action]): Log of all actions taken. Fully-specified actions.
+        buildings_by_color (Dict[Color, Tuple[Tuple]]): Cache of buildings, indexed
+            by building type. Can be used like:
+            `buildings_by_color[Color.RED][SETTLEMENT]` to get a tuple of all node
+            ids where RED has settlements. Tuples are replaced (not mutated) on
+            build, so copies share them.
+        actions (ActionLog): Log of all actions taken. Fully-specified actions.
+            List-like and append-only; copies share it (see action_log.py).
         num_turns (int): number of turns thus far
         current_player_index (int): index per colors array of player that should be
             making a decision now. Not necesarilly the same as current_turn_index
@@ -122,6 +136,11 @@ class State:
         free_roads_available (int): Number of roads available left in Road Building
             phase.
         playable_actions (List[Action]): List of playable actions by current player.
+            Lazily generated; see the property.
+        rng (random.Random): Random number generator of this game (seating,
+            shuffles, dice, discards and steals). Copies fork it; see the property.
+        stats (EngineStats): Instrumentation of the engine (see engine_stats.py)
+            shared by copies, or None (the default) to not collect any.
     """
 
     def __init__(
@@ -130,31 +149,38 @@ class State:
         catan_map=None,
         discard_limit=7,
         initialize=True,
+        rng: Optional[random.Random] = None,
     ):
+        self.stats: Optional[EngineStats] = None
         if initialize:
-            self.players = random.sample(players, len(players))
+            # Defaults to a generator seeded from the random module, so that
+            # random.seed() still reproduces states created without one.
+            self._rng = (
+                rng if rng is not None else random.Random(random.getrandbits(64))
+            )
+            self._rng_shared = False
+
+            self.players = self._rng.sample(players, len(players))
             self.colors = tuple([player.color for player in self.players])
-            self.board = Board(catan_map or CatanMap.from_template(BASE_MAP_TEMPLATE))
+            self.board = Board(
+                catan_map or CatanMap.from_template(BASE_MAP_TEMPLATE, self._rng)
+            )
             self.discard_limit = discard_limit
 
-            # feature-ready dictionary
-            self.player_state = dict()
-            for index in range(len(self.colors)):
-                for key, value in PLAYER_INITIAL_STATE.items():
-                    self.player_state[f"P{index}_{key}"] = value
+            self.player_state_array = PLAYER_INITIAL_ROW * len(self.colors)
             self.color_to_index = {
                 color: index for index, color in enumerate(self.colors)
             }
 
             self.resource_freqdeck = starting_resource_bank()
             self.development_listdeck = starting_devcard_bank()
-            random.shuffle(self.development_listdeck)
+            self._rng.shuffle(self.development_listdeck)
 
             # Auxiliary attributes to implement game logic
-            self.buildings_by_color: Dict[Color, Dict[Any, Any]] = {
-                p.color: defaultdict(list) for p in players
+            self.buildings_by_color: Dict[Color, Tuple[Tuple[Any, ...], ...]] = {
+                p.color: ((), (), ()) for p in players
             }
-            self.actions: List[Action] = []  # log of all action taken by players
+            self.actions = ActionLog()  # log of all action taken by players
             self.num_turns = 0  # num_completed_turns
 
             # Current prompt / player
@@ -174,7 +200,71 @@ class State:
             self.current_trade: Tuple = (0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
             self.acceptees = tuple(False for _ in self.colors)
 
-            self.playable_actions = generate_playable_actions(self)
+            self._playable_actions = None
+
+    @property
+    def playable_actions(self) -> List[Action]:
+        """Playable actions by current player. Generated on first read after
+        the state changes (apply_action invalidates them), so states that are
+        only evaluated (e.g. search leaves) never pay for move generation."""
+        if self._playable_actions is None:
+            if self.stats is None:
+                self._playable_actions = generate_playable_actions(self)
+            else:
+                start = perf_counter()
+                self._playable_actions = generate_playable_actions(self)
+                self.stats.record(
+                    "generate_playable_actions",
+                    self.current_prompt.value,
+                    perf_counter() - start,
+                )
+        return self._playable_actions
+
+    @playable_actions.setter
+    def playable_actions(self, value):
+        """Overrides the actions. Setting None marks them for regeneration."""
+        self._playable_actions = value
+
+    @property
+    def rng(self) -> random.Random:
+        """Random number generator of this state. A copy starts with the same
+        generator state as the original (so both would roll the same dice);
+        the generator is only duplicated on the first draw after copying, so
+        copies that never draw (e.g. search nodes) don't pay for it."""
+        if self._rng_shared:
+            rng = random.Random.__new__(random.Random)  # skips seeding from os
+            rng.setstate(self._rng.getstate())
+            self._rng = rng
+            self._rng_shared = False
+        return self._rng
+
+    @rng.setter
+    def rng(self, value: random.Random):
+        """Replaces the generator (e.g. to reseed a playout copy)"""
+        self._rng = value
+        self._rng_shared = False
+
+    @property
+    def player_state(self):
+        """Feature-ready dict-like view of player_state_array"""
+        return PlayerStateView(self)
+
+    def zobrist_key(self) -> int:
+        """64-bit Zobrist key of this state, for transposition tables and
+        deduplication. Equal states (regardless of the order of the actions
+        that led to them) have equal keys. Ignores .actions and .num_turns.
+
+        Set catanatron.models.zobrist.VERIFY_KEYS = True to check it against
+        a from-scratch computation on every call.
+        """
+        key = zobrist.fold_state_keys(self, self.board.zobrist)
+        if zobrist.VERIFY_KEYS:
+            expected = zobrist.compute_zobrist_key(self)
+            if key != expected:
+                raise AssertionError(
+                    f"Zobrist key out of sync: {key} != {expected} (recomputed)"
+                )
+        return key
 
     def current_player(self):
         """Helper for accessing Player instance who should decide next"""
@@ -197,16 +287,15 @@ class State:
 
         state_copy.board = self.board.copy()
 
-        state_copy.player_state = self.player_state.copy()
+        state_copy.player_state_array = self.player_state_array.copy()
         state_copy.color_to_index = self.color_to_index
         state_copy.colors = self.colors  # immutable
 
         state_copy.resource_freqdeck = self.resource_freqdeck.copy()
         state_copy.development_listdeck = self.development_listdeck.copy()
 
-        state_copy.buildings_by_color = pickle.loads(
-            pickle.dumps(self.buildings_by_color)
-        )
+        # per-type tuples are immutable, so they can be shared
+        state_copy.buildings_by_color = self.buildings_by_color.copy()
         state_copy.actions = self.actions.copy()
         state_copy.num_turns = self.num_turns
 
@@ -226,17 +315,26 @@ class State:
         state_copy.current_trade = self.current_trade
         state_copy.acceptees = self.acceptees
 
-        state_copy.playable_actions = self.playable_actions
+        state_copy._playable_actions = self._playable_actions
+        state_copy.stats = self.stats
+
+        # Both share the generator until one of them draws (see .rng)
+        self._rng_shared = True
+        state_copy._rng = self._rng
+        state_copy._rng_shared = True
         return state_copy
 
 
-def roll_dice():
+def roll_dice(rng: random.Random):
     """Yields two random numbers
 
+    Args:
+        rng (random.Random): Generator to draw from (e.g. state.rng).
+
     Returns:
         tuple[int, int]: 2-tuple of random numbers from 1 to 6 inclusive.
     """
-    return (random.randint(1, 6), random.randint(1, 6))
+    return (rng.randint(1, 6), rng.randint(1, 6))
 
 
 def yield_resources(board: Board, resource_freqdeck, number):
@@ -253,43 +351,39 @@ def yield_resources(board: Board, resource_freqdeck, number):
             Second is an array of resources that couldn't be yieleded
             because they depleted.
     """
-    intented_payout: Dict[Color, Dict[FastResource, int]] = defaultdict(
-        lambda: defaultdict(int)
-    )
-    resource_totals: Dict[FastResource, int] = defaultdict(int)
-    for coordinate, tile in board.map.land_tiles.items():
-        if tile.number != number or board.robber_coordinate == coordinate:
-            continue  # doesn't yield
-
-        for _, node_id in tile.nodes.items():
+    # board.payouts ignores the robber; take back what the robbed tile yields
+    intented_payout: Dict[Color, List[int]] = {
+        color: list(freqdeck)
+        for color, freqdeck in board.payouts.get(number, {}).items()
+    }
+    robbed_tile = board.map.land_tiles[board.robber_coordinate]
+    if robbed_tile.number == number:
+        for node_id in robbed_tile.nodes.values():
             building = board.buildings.get(node_id, None)
-            assert tile.resource is not None
-            if building is None:
-                continue
-            elif building[1] == SETTLEMENT:
-                intented_payout[building[0]][tile.resource] += 1
-                resource_totals[tile.resource] += 1
-            elif building[1] == CITY:
-                intented_payout[building[0]][tile.resource] += 2
-                resource_totals[tile.resource] += 2
+            if building is not None:
+                color, building_type = building
+                # SETTLEMENT and CITY codes are the amount of cards they yield
+                intented_payout[color][robbed_tile.resource] -= building_type
+                if sum(intented_payout[color]) == 0:
+                    del intented_payout[color]
+
+    resource_totals = [0, 0, 0, 0, 0]
+    for player_payout in intented_payout.values():
+        for resource in RESOURCES:
+            resource_totals[resource] += player_payout[resource]
 
     # for each resource, check enough in deck to yield.
     depleted = []
     for resource in RESOURCES:
-        total = resource_totals[resource]
-        if not freqdeck_can_draw(resource_freqdeck, total, resource):
+        if resource_freqdeck[resource] < resource_totals[resource]:
             depleted.append(resource)
 
     # build final data color => freqdeck structure
-    payout = {}
-    for player, player_payout in intented_payout.items():
-        payout[player] = [0, 0, 0, 0, 0]
-
-        for resource, count in player_payout.items():
-            if resource not in depleted:
-                freqdeck_replenish(payout[player], count, resource)
+    for resource in depleted:
+        for player_payout in intented_payout.values():
+            player_payout[resource] = 0
 
-    return payout, depleted
+    return intented_payout, depleted
 
 
 def advance_turn(state, direction=1):
@@ -304,19 +398,22 @@ def next_player_index(state, direction=1):
     return (state.current_player_index + direction) % len(state.colors)
 
 
-def apply_action(state: State, action: Action):
+def apply_action(state: State, action: Action, log: bool = True):
     """Main controller call. Follows redux-like pattern and
     routes the given action to the appropiate state-changing calls.
 
     Responsible for maintaining:
         .current_player_index, .current_turn_index,
-        .current_prompt (and similars), .playable_actions.
+        .current_prompt (and similars). Invalidates .playable_actions.
 
     Appends given action to the list of actions, as fully-specified action.
 
     Args:
         state (State): State to mutate
         action (Action): Action to carry out
+        log (bool, optional): If False, the action isn't fully specified nor
+            appended to state.actions (for callers that never read the log).
+            Defaults to True.
 
     Raises:
         ValueError: If invalid action given
@@ -324,12 +421,14 @@ def apply_action(state: State, action: Action):
     Returns:
         Action: Fully-specified action
     """
+    stats = state.stats
+    if stats is not None:
+        start = perf_counter()
 
     if action.action_type == ActionType.END_TURN:
         player_clean_turn(state, action.color)
         advance_turn(state)
         state.current_prompt = ActionPrompt.PLAY_TURN
-        state.playable_actions = generate_playable_actions(state)
     elif action.action_type == ActionType.BUILD_SETTLEMENT:
         node_id = action.value
         if state.is_initial_build_phase:
@@ -340,15 +439,14 @@ def apply_action(state: State, action: Action):
             # yield resources if second settlement
             is_second_house = len(buildings) == 2
             if is_second_house:
-                key = player_key(state, action.color)
+                offset = player_offset(state, action.color)
                 for tile in state.board.map.adjacent_tiles[node_id]:
                     if tile.resource != None:
                         freqdeck_draw(state.resource_freqdeck, 1, tile.resource)  # type: ignore
-                        state.player_state[f"{key}_{tile.resource}_IN_HAND"] += 1
+                        state.player_state_array[offset + tile.resource] += 1
 
             # state.current_player_index stays the same
             state.current_prompt = ActionPrompt.BUILD_INITIAL_ROAD
-            state.playable_actions = generate_playable_actions(state)
         else:
             (
                 previous_road_color,
@@ -363,7 +461,6 @@ def apply_action(state: State, action: Action):
 
             # state.current_player_index stays the same
             # state.current_prompt stays as PLAY
-            state.playable_actions = generate_playable_actions(state)
     elif action.action_type == ActionType.BUILD_ROAD:
         edge = action.value
         if state.is_initial_build_phase:
@@ -391,7 +488,6 @@ def apply_action(state: State, action: Action):
             else:
                 advance_turn(state, -1)
                 state.current_prompt = ActionPrompt.BUILD_INITIAL_SETTLEMENT
-            state.playable_actions = generate_playable_actions(state)
         elif state.is_road_building and state.free_roads_available > 0:
             result = state.board.build_road(action.color, edge)
             previous_road_color, road_color, road_lengths = result
@@ -407,7 +503,6 @@ def apply_action(state: State, action: Action):
                 state.free_roads_available = 0
                 # state.current_player_index stays the same
                 # state.current_prompt stays as PLAY
-            state.playable_actions = generate_playable_actions(state)
         else:
             result = state.board.build_road(action.color, edge)
             previous_road_color, road_color, road_lengths = result
@@ -416,7 +511,6 @@ def apply_action(state: State, action: Action):
 
             # state.current_player_index stays the same
             # state.current_prompt stays as PLAY
-            state.playable_actions = generate_playable_actions(state)
     elif action.action_type == ActionType.BUILD_CITY:
         node_id = action.value
         state.board.build_city(action.color, node_id)
@@ -427,7 +521,6 @@ def apply_action(state: State, action: Action):
 
         # state.current_player_index stays the same
         # state.current_prompt stays as PLAY
-        state.playable_actions = generate_playable_actions(state)
     elif action.action_type == ActionType.BUY_DEVELOPMENT_CARD:
         if len(state.development_listdeck) == 0:
             raise ValueError("No more development cards")
@@ -445,17 +538,17 @@ def apply_action(state: State, action: Action):
             state.resource_freqdeck, DEVELOPMENT_CARD_COST_FREQDECK
         )
 
-        action = Action(action.color, action.action_type, card)
+        if log:
+            action = Action(action.color, action.action_type, card)
         # state.current_player_index stays the same
         # state.current_prompt stays as PLAY
-        state.playable_actions = generate_playable_actions(state)
     elif action.action_type == ActionType.ROLL:
-        key = player_key(state, action.color)
-        state.player_state[f"{key}_HAS_ROLLED"] = True
+        player_roll(state, action.color)
 
-        dices = action.value or roll_dice()
+        dices = action.value or roll_dice(state.rng)
         number = dices[0] + dices[1]
-        action = Action(action.color, action.action_type, dices)
+        if log:
+            action = Action(action.color, action.action_type, dices)
 
         if number == 7:
             discarders = [
@@ -472,9 +565,17 @@ def apply_action(state: State, action: Action):
                 # state.current_player_index stays the same
                 state.current_prompt = ActionPrompt.MOVE_ROBBER
                 state.is_moving_knight = True
-            state.playable_actions = generate_playable_actions(state)
         else:
-            payout, _ = yield_resources(state.board, state.resource_freqdeck, number)
+            if stats is None:
+                payout, _ = yield_resources(
+                    state.board, state.resource_freqdeck, number
+                )
+            else:
+                yield_start = perf_counter()
+                payout, _ = yield_resources(
+                    state.board, state.resource_freqdeck, number
+                )
+                stats.record("yield_resources", "roll", perf_counter() - yield_start)
             for color, resource_freqdeck in payout.items():
                 # Atomically add to player's hand and remove from bank
                 player_freqdeck_add(state, color, resource_freqdeck)
@@ -484,20 +585,20 @@ def apply_action(state: State, action: Action):
 
             # state.current_player_index stays the same
             state.current_prompt = ActionPrompt.PLAY_TURN
-            state.playable_actions = generate_playable_actions(state)
     elif action.action_type == ActionType.DISCARD:
         hand = player_deck_to_array(state, action.color)
         num_to_discard = len(hand) // 2
         if action.value is None:
             # TODO: Forcefully discard randomly so that decision tree doesnt explode in possibilities.
-            discarded = random.sample(hand, k=num_to_discard)
+            discarded = state.rng.sample(hand, k=num_to_discard)
         else:
             discarded = action.value  # for replay functionality
         to_discard = freqdeck_from_listdeck(discarded)
 
         player_freqdeck_subtract(state, action.color, to_discard)
         state.resource_freqdeck = freqdeck_add(state.resource_freqdeck, to_discard)
-        action = Action(action.color, action.action_type, discarded)
+        if log:
+            action = Action(action.color, action.action_type, discarded)
 
         # Advance turn
         discarders_left = [
@@ -512,35 +613,32 @@ def apply_action(state: State, action: Action):
             state.current_prompt = ActionPrompt.MOVE_ROBBER
             state.is_discarding = False
             state.is_moving_knight = True
-
-        state.playable_actions = generate_playable_actions(state)
     elif action.action_type == ActionType.MOVE_ROBBER:
         (coordinate, robbed_color, robbed_resource) = action.value
         state.board.robber_coordinate = coordinate
         if robbed_color is not None:
             if robbed_resource is None:
                 robbed_resource = player_deck_random_draw(state, robbed_color)
-                action = Action(
-                    action.color,
-                    action.action_type,
-                    (coordinate, robbed_color, robbed_resource),
-                )
+                if log:
+                    action = Action(
+                        action.color,
+                        action.action_type,
+                        (coordinate, robbed_color, robbed_resource),
+                    )
             else:  # for replay functionality
                 player_deck_draw(state, robbed_color, robbed_resource)
             player_deck_replenish(state, action.color, robbed_resource)
 
         # state.current_player_index stays the same
         state.current_prompt = ActionPrompt.PLAY_TURN
-        state.playable_actions = generate_playable_actions(state)
     elif action.action_type == ActionType.PLAY_KNIGHT_CARD:
-        if not player_can_play_dev(state, action.color, "KNIGHT"):
+        if not player_can_play_dev(state, action.color, KNIGHT):
             raise ValueError("Player cant play knight card now")
 
-        play_dev_card(state, action.color, "KNIGHT")
+        play_dev_card(state, action.color, KNIGHT)
 
         # state.current_player_index stays the same
         state.current_prompt = ActionPrompt.MOVE_ROBBER
-        state.playable_actions = generate_playable_actions(state)
     elif action.action_type == ActionType.PLAY_YEAR_OF_PLENTY:
         cards_selected = freqdeck_from_listdeck(action.value)
         if not player_can_play_dev(state, action.color, YEAR_OF_PLENTY):
@@ -555,7 +653,6 @@ def apply_action(state: State, action: Action):
 
         # state.current_player_index stays the same
         state.current_prompt = ActionPrompt.PLAY_TURN
-        state.playable_actions = generate_playable_actions(state)
     elif action.action_type == ActionType.PLAY_MONOPOLY:
         mono_resource = action.value
         cards_stolen = [0, 0, 0, 0, 0]
@@ -563,10 +660,9 @@ def apply_action(state: State, action: Action):
             raise ValueError("Player cant play monopoly now")
         for color in state.colors:
             if not color == action.color:
-                key = player_key(state, color)
-                number_of_cards_to_steal = state.player_state[
-                    f"{key}_{mono_resource}_IN_HAND"
-                ]
+                number_of_cards_to_steal = player_num_resource_cards(
+                    state, color, mono_resource
+                )
                 freqdeck_replenish(
                     cards_stolen, number_of_cards_to_steal, mono_resource
                 )
@@ -576,18 +672,16 @@ def apply_action(state: State, action: Action):
 
         # state.current_player_index stays the same
         state.current_prompt = ActionPrompt.PLAY_TURN
-        state.playable_actions = generate_playable_actions(state)
     elif action.action_type == ActionType.PLAY_ROAD_BUILDING:
-        if not player_can_play_dev(state, action.color, "ROAD_BUILDING"):
+        if not player_can_play_dev(state, action.color, ROAD_BUILDING):
             raise ValueError("Player cant play road building now")
 
-        play_dev_card(state, action.color, "ROAD_BUILDING")
+        play_dev_card(state, action.color, ROAD_BUILDING)
         state.is_road_building = True
         state.free_roads_available = 2
 
         # state.current_player_index stays the same
         state.current_prompt = ActionPrompt.PLAY_TURN
-        state.playable_actions = generate_playable_actions(state)
     elif action.action_type == ActionType.MARITIME_TRADE:
         trade_offer = action.value
         offering = freqdeck_from_listdeck(
@@ -605,7 +699,6 @@ def apply_action(state: State, action: Action):
 
         # state.current_player_index stays the same
         state.current_prompt = ActionPrompt.PLAY_TURN
-        state.playable_actions = generate_playable_actions(state)
     elif action.action_type == ActionType.OFFER_TRADE:
         state.is_resolving_trade = True
         state.current_trade = (*action.value, state.current_turn_index)
@@ -615,8 +708,6 @@ def apply_action(state: State, action: Action):
             i for i, c in enumerate(state.colors) if c != action.color
         )  # cant ask yourself
         state.current_prompt = ActionPrompt.DECIDE_TRADE
-
-        state.playable_actions = generate_playable_actions(state)
     elif action.action_type == ActionType.ACCEPT_TRADE:
         # add yourself to self.acceptees
         index = state.colors.index(action.color)
@@ -637,8 +728,6 @@ def apply_action(state: State, action: Action):
             # .is_resolving_trade, .current_trade, .acceptees stay the same
             state.current_player_index = state.current_turn_index
             state.current_prompt = ActionPrompt.DECIDE_ACCEPTEES
-
-        state.playable_actions = generate_playable_actions(state)
     elif action.action_type == ActionType.REJECT_TRADE:
         try:
             # keep going around table w/o asking yourself or players that have answered
@@ -660,8 +749,6 @@ def apply_action(state: State, action: Action):
                 # .is_resolving_trade, .current_trade, .acceptees stay the same
                 state.current_player_index = state.current_turn_index
                 state.current_prompt = ActionPrompt.DECIDE_ACCEPTEES
-
-        state.playable_actions = generate_playable_actions(state)
     elif action.action_type == ActionType.CONFIRM_TRADE:
         # apply trade
         offering = action.value[:5]
@@ -685,10 +772,100 @@ def apply_action(state: State, action: Action):
         raise ValueError("Unknown ActionType " + str(action.action_type))
 
     # TODO: Think about possible-action/idea vs finalized-action design
-    state.actions.append(action)
+    if log:
+        state.actions.append(action)
+    state.playable_actions = None  # regenerated when next read
+    if stats is not None:
+        stats.record("apply_action", action.action_type.value, perf_counter() - start)
     return action
 
 
+def apply_action_undoable(state: State, action: Action):
+    """Like apply_action, but also returns a journal to undo it with.
+
+    The journal keeps the containers apply_action may mutate (the state
+    gets fresh copies to work on) plus all scalar fields. Board containers
+    and the random number generator are shared copy-on-write, so journaling
+    them costs nothing unless the action builds (or draws). Useful for
+    make/unmake search on a single State.
+
+    Args:
+        state (State): State to mutate
+        action (Action): Action to carry out
+
+    Returns:
+        Tuple[Action, Tuple]: Fully-specified action and journal to pass
+            to undo_action. Journals must be undone in LIFO order.
+    """
+    board_journal = state.board.checkpoint()
+    journal = (
+        board_journal,
+        state.player_state_array,
+        state.resource_freqdeck,
+        state.development_listdeck,
+        state.buildings_by_color,
+        len(state.actions),
+        state.num_turns,
+        state.current_player_index,
+        state.current_turn_index,
+        state.current_prompt,
+        state.is_initial_build_phase,
+        state.is_discarding,
+        state.is_moving_knight,
+        state.is_road_building,
+        state.free_roads_available,
+        state.is_resolving_trade,
+        state.current_trade,
+        state.acceptees,
+        state._playable_actions,
+        state._rng,
+        state._rng_shared,
+    )
+    state._rng_shared = True  # so rolls and steals draw from a copy
+    state.player_state_array = state.player_state_array.copy()
+    state.resource_freqdeck = state.resource_freqdeck.copy()
+    state.development_listdeck = state.development_listdeck.copy()
+    state.buildings_by_color = state.buildings_by_color.copy()
+
+    try:
+        action = apply_action(state, action)
+    except Exception:
+        undo_action(state, journal)
+        raise
+    return action, journal
+
+
+def undo_action(state: State, journal):
+    """Restores state to how it was before apply_action_undoable returned
+    this journal."""
+    (
+        board_journal,
+        state.player_state_array,
+        state.resource_freqdeck,
+        state.development_listdeck,
+        state.buildings_by_color,
+        num_actions,
+        state.num_turns,
+        state.current_player_index,
+        state.current_turn_index,
+        state.current_prompt,
+        state.is_initial_build_phase,
+        state.is_discarding,
+        state.is_moving_knight,
+        state.is_road_building,
+        state.free_roads_available,
+        state.is_resolving_trade,
+        state.current_trade,
+        state.acceptees,
+        state._playable_actions,
+        state._rng,
+        state._rng_shared,
+    ) = journal
+    state.actions.truncate(num_actions)
+
+    state.board.restore(board_journal)
+
+
 def reset_trading_state(state):
     state.is_resolving_trade = False
     state.current_trade = (0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
@@ -3,11 +3,16 @@ Functions that mutate the given state accordingly. Core of game logic.
 Some are helpers to _read_ information from state and keep the rest
 of the code decoupled from state representation.
 """
-import random
+import functools
+from collections.abc import Mapping
 from typing import Optional
 
 from catanatron.models.decks import ROAD_COST_FREQDECK, freqdeck_add
 from catanatron.models.enums import (
+    CARD_NAMES,
+    DEVELOPMENT_CARDS,
+    KNIGHT,
+    RESOURCES,
     VICTORY_POINT,
     WOOD,
     BRICK,
@@ -20,45 +25,118 @@ from catanatron.models.enums import (
     FastResource,
 )
 
+# ===== Player State Layout
+# Player state is stored in a flat list (State.player_state_array) with one
+# fixed-size row of fields per player, in seating order. Hands come first, so
+# that a card's code is its offset in the row and a player's resource freqdeck
+# is just a slice of it.
+PLAYER_STATE_FIELDS = (
+    *[f"{CARD_NAMES[card]}_IN_HAND" for card in RESOURCES + DEVELOPMENT_CARDS],
+    *[f"PLAYED_{CARD_NAMES[card]}" for card in DEVELOPMENT_CARDS],
+    "VICTORY_POINTS",
+    "ROADS_AVAILABLE",
+    "SETTLEMENTS_AVAILABLE",
+    "CITIES_AVAILABLE",
+    "HAS_ROAD",
+    "HAS_ARMY",
+    "HAS_ROLLED",
+    "HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN",
+    "ACTUAL_VICTORY_POINTS",
+    "LONGEST_ROAD_LENGTH",
+)
+NUM_PLAYER_STATE_FIELDS = len(PLAYER_STATE_FIELDS)
+PLAYER_STATE_INDEX = {field: i for i, field in enumerate(PLAYER_STATE_FIELDS)}
+
+PLAYED_KNIGHT_INDEX = PLAYER_STATE_INDEX["PLAYED_KNIGHT"]
+PLAYED_ROAD_BUILDING_INDEX = PLAYER_STATE_INDEX["PLAYED_ROAD_BUILDING"]
+VICTORY_POINTS_INDEX = PLAYER_STATE_INDEX["VICTORY_POINTS"]
+ROADS_AVAILABLE_INDEX = PLAYER_STATE_INDEX["ROADS_AVAILABLE"]
+SETTLEMENTS_AVAILABLE_INDEX = PLAYER_STATE_INDEX["SETTLEMENTS_AVAILABLE"]
+CITIES_AVAILABLE_INDEX = PLAYER_STATE_INDEX["CITIES_AVAILABLE"]
+HAS_ROAD_INDEX = PLAYER_STATE_INDEX["HAS_ROAD"]
+HAS_ARMY_INDEX = PLAYER_STATE_INDEX["HAS_ARMY"]
+HAS_ROLLED_INDEX = PLAYER_STATE_INDEX["HAS_ROLLED"]
+HAS_PLAYED_DEV_INDEX = PLAYER_STATE_INDEX["HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN"]
+ACTUAL_VICTORY_POINTS_INDEX = PLAYER_STATE_INDEX["ACTUAL_VICTORY_POINTS"]
+LONGEST_ROAD_LENGTH_INDEX = PLAYER_STATE_INDEX["LONGEST_ROAD_LENGTH"]
+# PLAYED_<dev_card> lives at PLAYED_OFFSET + dev_card
+PLAYED_OFFSET = PLAYED_KNIGHT_INDEX - KNIGHT
+
+
+class PlayerStateView(Mapping):
+    """Read-only dict-like view over State.player_state_array.
+
+    Exposes the legacy keys (e.g. "P0_WOOD_IN_HAND") for feature extractors,
+    JSON serialization and other callers that still address player state by
+    string. To mutate player state, use the functions in this module.
+    """
+
+    def __init__(self, state):
+        self._state = state
+        self._index = player_state_key_index(len(state.colors))
+
+    def __getitem__(self, key):
+        return self._state.player_state_array[self._index[key]]
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+@functools.lru_cache(maxsize=None)
+def player_state_key_index(num_players):
+    """Returns {"P0_WOOD_IN_HAND": 0, ...} for all players' fields"""
+    return {
+        f"P{index}_{field}": index * NUM_PLAYER_STATE_FIELDS + offset
+        for index in range(num_players)
+        for offset, field in enumerate(PLAYER_STATE_FIELDS)
+    }
+
 
 def maintain_longest_road(state, previous_road_color, road_color, road_lengths):
+    player_state = state.player_state_array
     for color, length in road_lengths.items():
-        key = player_key(state, color)
-        state.player_state[f"{key}_LONGEST_ROAD_LENGTH"] = length
+        player_state[player_offset(state, color) + LONGEST_ROAD_LENGTH_INDEX] = length
     if road_color is None:
         return  # do nothing
 
     if previous_road_color != road_color:
-        winner_key = player_key(state, road_color)
-        state.player_state[f"{winner_key}_HAS_ROAD"] = True
-        state.player_state[f"{winner_key}_VICTORY_POINTS"] += 2
-        state.player_state[f"{winner_key}_ACTUAL_VICTORY_POINTS"] += 2
+        winner = player_offset(state, road_color)
+        player_state[winner + HAS_ROAD_INDEX] = True
+        player_state[winner + VICTORY_POINTS_INDEX] += 2
+        player_state[winner + ACTUAL_VICTORY_POINTS_INDEX] += 2
         if previous_road_color is not None:
-            loser_key = player_key(state, previous_road_color)
-            state.player_state[f"{loser_key}_HAS_ROAD"] = False
-            state.player_state[f"{loser_key}_VICTORY_POINTS"] -= 2
-            state.player_state[f"{loser_key}_ACTUAL_VICTORY_POINTS"] -= 2
+            loser = player_offset(state, previous_road_color)
+            player_state[loser + HAS_ROAD_INDEX] = False
+            player_state[loser + VICTORY_POINTS_INDEX] -= 2
+            player_state[loser + ACTUAL_VICTORY_POINTS_INDEX] -= 2
 
 
 def maintain_largest_army(state, color, previous_army_color, previous_army_size):
-    candidate_size = get_played_dev_cards(state, color, "KNIGHT")
+    player_state = state.player_state_array
+    candidate_size = get_played_dev_cards(state, color, KNIGHT)
     if candidate_size >= 3:
         if previous_army_color is None:
-            winner_key = player_key(state, color)
-            state.player_state[f"{winner_key}_HAS_ARMY"] = True
-            state.player_state[f"{winner_key}_VICTORY_POINTS"] += 2
-            state.player_state[f"{winner_key}_ACTUAL_VICTORY_POINTS"] += 2
+            winner = player_offset(state, color)
+            player_state[winner + HAS_ARMY_INDEX] = True
+            player_state[winner + VICTORY_POINTS_INDEX] += 2
+            player_state[winner + ACTUAL_VICTORY_POINTS_INDEX] += 2
         elif previous_army_size < candidate_size and previous_army_color != color:
             # switch, remove previous points and award to new king
-            winner_key = player_key(state, color)
-            state.player_state[f"{winner_key}_HAS_ARMY"] = True
-            state.player_state[f"{winner_key}_VICTORY_POINTS"] += 2
-            state.player_state[f"{winner_key}_ACTUAL_VICTORY_POINTS"] += 2
+            winner = player_offset(state, color)
+            player_state[winner + HAS_ARMY_INDEX] = True
+            player_state[winner + VICTORY_POINTS_INDEX] += 2
+            player_state[winner + ACTUAL_VICTORY_POINTS_INDEX] += 2
             if previous_army_color is not None:
-                loser_key = player_key(state, previous_army_color)
-                state.player_state[f"{loser_key}_HAS_ARMY"] = False
-                state.player_state[f"{loser_key}_VICTORY_POINTS"] -= 2
-                state.player_state[f"{loser_key}_ACTUAL_VICTORY_POINTS"] -= 2
+                loser = player_offset(state, previous_army_color)
+                player_state[loser + HAS_ARMY_INDEX] = False
+                player_state[loser + VICTORY_POINTS_INDEX] -= 2
+                player_state[loser + ACTUAL_VICTORY_POINTS_INDEX] -= 2
         # else: someone else has army and we dont compete
 
 
@@ -67,72 +145,75 @@ def player_key(state, color):
     return f"P{state.color_to_index[color]}"
 
 
+def player_offset(state, color):
+    """Index in state.player_state_array where color's row starts"""
+    return state.color_to_index[color] * NUM_PLAYER_STATE_FIELDS
+
+
 def get_enemy_colors(colors, player_color):
     return filter(lambda c: c != player_color, colors)
 
 
 def get_actual_victory_points(state, color):
-    key = player_key(state, color)
-    return state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"]
+    offset = player_offset(state, color)
+    return state.player_state_array[offset + ACTUAL_VICTORY_POINTS_INDEX]
 
 
 def get_visible_victory_points(state, color):
-    key = player_key(state, color)
-    return state.player_state[f"{key}_VICTORY_POINTS"]
+    offset = player_offset(state, color)
+    return state.player_state_array[offset + VICTORY_POINTS_INDEX]
 
 
 def get_longest_road_color(state):
+    player_state = state.player_state_array
     for index in range(len(state.colors)):
-        if state.player_state[f"P{index}_HAS_ROAD"]:
+        if player_state[index * NUM_PLAYER_STATE_FIELDS + HAS_ROAD_INDEX]:
             return state.colors[index]
     return None
 
 
 def get_largest_army(state):
+    player_state = state.player_state_array
     for index in range(len(state.colors)):
-        if state.player_state[f"P{index}_HAS_ARMY"]:
+        offset = index * NUM_PLAYER_STATE_FIELDS
+        if player_state[offset + HAS_ARMY_INDEX]:
             return (
                 state.colors[index],
-                state.player_state[f"P{index}_PLAYED_KNIGHT"],
+                player_state[offset + PLAYED_KNIGHT_INDEX],
             )
     return None, None
 
 
 def player_has_rolled(state, color):
-    key = player_key(state, color)
-    return state.player_state[f"{key}_HAS_ROLLED"]
+    offset = player_offset(state, color)
+    return state.player_state_array[offset + HAS_ROLLED_INDEX]
 
 
 def get_longest_road_length(state, color):
-    key = player_key(state, color)
-    return state.player_state[key + "_LONGEST_ROAD_LENGTH"]
+    offset = player_offset(state, color)
+    return state.player_state_array[offset + LONGEST_ROAD_LENGTH_INDEX]
 
 
 def get_played_dev_cards(state, color, dev_card=None):
-    key = player_key(state, color)
+    offset = player_offset(state, color)
     if dev_card is None:
-        return (
-            state.player_state[f"{key}_PLAYED_KNIGHT"]
-            + state.player_state[f"{key}_PLAYED_MONOPOLY"]
-            + state.player_state[f"{key}_PLAYED_ROAD_BUILDING"]
-            + state.player_state[f"{key}_PLAYED_YEAR_OF_PLENTY"]
+        return sum(
+            state.player_state_array[
+                offset + PLAYED_KNIGHT_INDEX : offset + PLAYED_ROAD_BUILDING_INDEX + 1
+            ]
         )
     else:
-        return state.player_state[f"{key}_PLAYED_{dev_card}"]
+        return state.player_state_array[offset + PLAYED_OFFSET + dev_card]
 
 
 def get_dev_cards_in_hand(state, color, dev_card=None):
-    key = player_key(state, color)
+    offset = player_offset(state, color)
     if dev_card is None:
-        return (
-            state.player_state[f"{key}_KNIGHT_IN_HAND"]
-            + state.player_state[f"{key}_MONOPOLY_IN_HAND"]
-            + state.player_state[f"{key}_ROAD_BUILDING_IN_HAND"]
-            + state.player_state[f"{key}_YEAR_OF_PLENTY_IN_HAND"]
-            + state.player_state[f"{key}_VICTORY_POINT_IN_HAND"]
+        return sum(
+            state.player_state_array[offset + KNIGHT : offset + VICTORY_POINT + 1]
         )
     else:
-        return state.player_state[f"{key}_{dev_card}_IN_HAND"]
+        return state.player_state_array[offset + dev_card]
 
 
 def get_player_buildings(state, color_param, building_type_param):
@@ -141,190 +222,196 @@ def get_player_buildings(state, color_param, building_type_param):
 
 def get_player_freqdeck(state, color):
     """Returns a 'freqdeck' of a player's resource hand."""
-    key = player_key(state, color)
-    return [
-        state.player_state[f"{key}_WOOD_IN_HAND"],
-        state.player_state[f"{key}_BRICK_IN_HAND"],
-        state.player_state[f"{key}_SHEEP_IN_HAND"],
-        state.player_state[f"{key}_WHEAT_IN_HAND"],
-        state.player_state[f"{key}_ORE_IN_HAND"],
-    ]
+    offset = player_offset(state, color)
+    return state.player_state_array[offset + WOOD : offset + ORE + 1]
 
 
 # ===== State Mutators
+def add_player_building(state, color, building_type, building):
+    """Records building under color. Per-type tuples are replaced, never
+    mutated, so State copies can share them."""
+    by_type = list(state.buildings_by_color[color])
+    by_type[building_type] = by_type[building_type] + (building,)
+    state.buildings_by_color[color] = tuple(by_type)
+
+
 def build_settlement(state, color, node_id, is_free):
-    state.buildings_by_color[color][SETTLEMENT].append(node_id)
+    add_player_building(state, color, SETTLEMENT, node_id)
 
-    key = player_key(state, color)
-    state.player_state[f"{key}_SETTLEMENTS_AVAILABLE"] -= 1
+    player_state = state.player_state_array
+    offset = player_offset(state, color)
+    player_state[offset + SETTLEMENTS_AVAILABLE_INDEX] -= 1
 
-    state.player_state[f"{key}_VICTORY_POINTS"] += 1
-    state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"] += 1
+    player_state[offset + VICTORY_POINTS_INDEX] += 1
+    player_state[offset + ACTUAL_VICTORY_POINTS_INDEX] += 1
 
     if not is_free:
-        state.player_state[f"{key}_WOOD_IN_HAND"] -= 1
-        state.player_state[f"{key}_BRICK_IN_HAND"] -= 1
-        state.player_state[f"{key}_SHEEP_IN_HAND"] -= 1
-        state.player_state[f"{key}_WHEAT_IN_HAND"] -= 1
+        player_state[offset + WOOD] -= 1
+        player_state[offset + BRICK] -= 1
+        player_state[offset + SHEEP] -= 1
+        player_state[offset + WHEAT] -= 1
 
 
 def build_road(state, color, edge, is_free):
-    state.buildings_by_color[color][ROAD].append(edge)
+    add_player_building(state, color, ROAD, edge)
 
-    key = player_key(state, color)
-    state.player_state[f"{key}_ROADS_AVAILABLE"] -= 1
+    player_state = state.player_state_array
+    offset = player_offset(state, color)
+    player_state[offset + ROADS_AVAILABLE_INDEX] -= 1
     if not is_free:
-        state.player_state[f"{key}_WOOD_IN_HAND"] -= 1
-        state.player_state[f"{key}_BRICK_IN_HAND"] -= 1
+        player_state[offset + WOOD] -= 1
+        player_state[offset + BRICK] -= 1
         state.resource_freqdeck = freqdeck_add(
             state.resource_freqdeck, ROAD_COST_FREQDECK
         )  # replenish bank
 
 
 def build_city(state, color, node_id):
-    state.buildings_by_color[color][SETTLEMENT].remove(node_id)
-    state.buildings_by_color[color][CITY].append(node_id)
+    roads, settlements, cities = state.buildings_by_color[color]
+    settlements = tuple(n for n in settlements if n != node_id)
+    state.buildings_by_color[color] = (roads, settlements, cities + (node_id,))
 
-    key = player_key(state, color)
-    state.player_state[f"{key}_SETTLEMENTS_AVAILABLE"] += 1
-    state.player_state[f"{key}_CITIES_AVAILABLE"] -= 1
+    player_state = state.player_state_array
+    offset = player_offset(state, color)
+    player_state[offset + SETTLEMENTS_AVAILABLE_INDEX] += 1
+    player_state[offset + CITIES_AVAILABLE_INDEX] -= 1
 
-    state.player_state[f"{key}_VICTORY_POINTS"] += 1
-    state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"] += 1
+    player_state[offset + VICTORY_POINTS_INDEX] += 1
+    player_state[offset + ACTUAL_VICTORY_POINTS_INDEX] += 1
 
-    state.player_state[f"{key}_WHEAT_IN_HAND"] -= 2
-    state.player_state[f"{key}_ORE_IN_HAND"] -= 3
+    player_state[offset + WHEAT] -= 2
+    player_state[offset + ORE] -= 3
 
 
 # ===== Deck Functions
 def player_can_afford_dev_card(state, color):
-    key = player_key(state, color)
+    player_state = state.player_state_array
+    offset = player_offset(state, color)
     return (
-        state.player_state[f"{key}_SHEEP_IN_HAND"] >= 1
-        and state.player_state[f"{key}_WHEAT_IN_HAND"] >= 1
-        and state.player_state[f"{key}_ORE_IN_HAND"] >= 1
+        player_state[offset + SHEEP] >= 1
+        and player_state[offset + WHEAT] >= 1
+        and player_state[offset + ORE] >= 1
     )
 
 
 def player_resource_freqdeck_contains(state, color, freqdeck):
-    key = player_key(state, color)
+    player_state = state.player_state_array
+    offset = player_offset(state, color)
     return (
-        state.player_state[f"{key}_WOOD_IN_HAND"] >= freqdeck[0]
-        and state.player_state[f"{key}_BRICK_IN_HAND"] >= freqdeck[1]
-        and state.player_state[f"{key}_SHEEP_IN_HAND"] >= freqdeck[2]
-        and state.player_state[f"{key}_WHEAT_IN_HAND"] >= freqdeck[3]
-        and state.player_state[f"{key}_ORE_IN_HAND"] >= freqdeck[4]
+        player_state[offset + WOOD] >= freqdeck[0]
+        and player_state[offset + BRICK] >= freqdeck[1]
+        and player_state[offset + SHEEP] >= freqdeck[2]
+        and player_state[offset + WHEAT] >= freqdeck[3]
+        and player_state[offset + ORE] >= freqdeck[4]
     )
 
 
 def player_can_play_dev(state, color, dev_card):
-    key = player_key(state, color)
+    player_state = state.player_state_array
+    offset = player_offset(state, color)
     return (
-        not state.player_state[f"{key}_HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN"]
-        and state.player_state[f"{key}_{dev_card}_IN_HAND"] >= 1
+        not player_state[offset + HAS_PLAYED_DEV_INDEX]
+        and player_state[offset + dev_card] >= 1
     )
 
 
 def player_freqdeck_add(state, color, freqdeck):
-    key = player_key(state, color)
-    state.player_state[f"{key}_WOOD_IN_HAND"] += freqdeck[0]
-    state.player_state[f"{key}_BRICK_IN_HAND"] += freqdeck[1]
-    state.player_state[f"{key}_SHEEP_IN_HAND"] += freqdeck[2]
-    state.player_state[f"{key}_WHEAT_IN_HAND"] += freqdeck[3]
-    state.player_state[f"{key}_ORE_IN_HAND"] += freqdeck[4]
+    player_state = state.player_state_array
+    offset = player_offset(state, color)
+    player_state[offset + WOOD] += freqdeck[0]
+    player_state[offset + BRICK] += freqdeck[1]
+    player_state[offset + SHEEP] += freqdeck[2]
+    player_state[offset + WHEAT] += freqdeck[3]
+    player_state[offset + ORE] += freqdeck[4]
 
 
 def player_freqdeck_subtract(state, color, freqdeck):
-    key = player_key(state, color)
-    state.player_state[f"{key}_WOOD_IN_HAND"] -= freqdeck[0]
-    state.player_state[f"{key}_BRICK_IN_HAND"] -= freqdeck[1]
-    state.player_state[f"{key}_SHEEP_IN_HAND"] -= freqdeck[2]
-    state.player_state[f"{key}_WHEAT_IN_HAND"] -= freqdeck[3]
-    state.player_state[f"{key}_ORE_IN_HAND"] -= freqdeck[4]
+    player_state = state.player_state_array
+    offset = player_offset(state, color)
+    player_state[offset + WOOD] -= freqdeck[0]
+    player_state[offset + BRICK] -= freqdeck[1]
+    player_state[offset + SHEEP] -= freqdeck[2]
+    player_state[offset + WHEAT] -= freqdeck[3]
+    player_state[offset + ORE] -= freqdeck[4]
 
 
 def buy_dev_card(state, color, dev_card):
-    key = player_key(state, color)
+    player_state = state.player_state_array
+    offset = player_offset(state, color)
 
-    assert state.player_state[f"{key}_SHEEP_IN_HAND"] >= 1
-    assert state.player_state[f"{key}_WHEAT_IN_HAND"] >= 1
-    assert state.player_state[f"{key}_ORE_IN_HAND"] >= 1
+    assert player_state[offset + SHEEP] >= 1
+    assert player_state[offset + WHEAT] >= 1
+    assert player_state[offset + ORE] >= 1
 
-    state.player_state[f"{key}_{dev_card}_IN_HAND"] += 1
+    player_state[offset + dev_card] += 1
     if dev_card == VICTORY_POINT:
-        state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"] += 1
+        player_state[offset + ACTUAL_VICTORY_POINTS_INDEX] += 1
 
-    state.player_state[f"{key}_SHEEP_IN_HAND"] -= 1
-    state.player_state[f"{key}_WHEAT_IN_HAND"] -= 1
-    state.player_state[f"{key}_ORE_IN_HAND"] -= 1
+    player_state[offset + SHEEP] -= 1
+    player_state[offset + WHEAT] -= 1
+    player_state[offset + ORE] -= 1
 
 
 def player_num_resource_cards(state, color, card: Optional[FastResource] = None):
-    key = player_key(state, color)
+    offset = player_offset(state, color)
     if card is None:
-        return (
-            state.player_state[f"{key}_WOOD_IN_HAND"]
-            + state.player_state[f"{key}_BRICK_IN_HAND"]
-            + state.player_state[f"{key}_SHEEP_IN_HAND"]
-            + state.player_state[f"{key}_WHEAT_IN_HAND"]
-            + state.player_state[f"{key}_ORE_IN_HAND"]
-        )
+        return sum(state.player_state_array[offset + WOOD : offset + ORE + 1])
     else:
-        return state.player_state[f"{key}_{card}_IN_HAND"]
+        return state.player_state_array[offset + card]
 
 
 def player_num_dev_cards(state, color):
-    key = player_key(state, color)
-    return (
-        state.player_state[f"{key}_YEAR_OF_PLENTY_IN_HAND"]
-        + state.player_state[f"{key}_MONOPOLY_IN_HAND"]
-        + state.player_state[f"{key}_VICTORY_POINT_IN_HAND"]
-        + state.player_state[f"{key}_KNIGHT_IN_HAND"]
-        + state.player_state[f"{key}_ROAD_BUILDING_IN_HAND"]
-    )
+    offset = player_offset(state, color)
+    return sum(state.player_state_array[offset + KNIGHT : offset + VICTORY_POINT + 1])
 
 
 def player_deck_to_array(state, color):
-    key = player_key(state, color)
+    player_state = state.player_state_array
+    offset = player_offset(state, color)
     return (
-        state.player_state[f"{key}_WOOD_IN_HAND"] * [WOOD]
-        + state.player_state[f"{key}_BRICK_IN_HAND"] * [BRICK]
-        + state.player_state[f"{key}_SHEEP_IN_HAND"] * [SHEEP]
-        + state.player_state[f"{key}_WHEAT_IN_HAND"] * [WHEAT]
-        + state.player_state[f"{key}_ORE_IN_HAND"] * [ORE]
+        player_state[offset + WOOD] * [WOOD]
+        + player_state[offset + BRICK] * [BRICK]
+        + player_state[offset + SHEEP] * [SHEEP]
+        + player_state[offset + WHEAT] * [WHEAT]
+        + player_state[offset + ORE] * [ORE]
     )
 
 
 def player_deck_draw(state, color, card, amount=1):
-    key = player_key(state, color)
-    assert state.player_state[f"{key}_{card}_IN_HAND"] >= amount
-    state.player_state[f"{key}_{card}_IN_HAND"] -= amount
+    index = player_offset(state, color) + card
+    assert state.player_state_array[index] >= amount
+    state.player_state_array[index] -= amount
 
 
 def player_deck_replenish(state, color, resource, amount=1):
-    key = player_key(state, color)
-    state.player_state[f"{key}_{resource}_IN_HAND"] += amount
+    index = player_offset(state, color) + resource
+    state.player_state_array[index] += amount
 
 
 def player_deck_random_draw(state, color):
     deck_array = player_deck_to_array(state, color)
-    resource = random.choice(deck_array)
+    resource = state.rng.choice(deck_array)
     player_deck_draw(state, color, resource)
     return resource
 
 
 def play_dev_card(state, color, dev_card):
-    if dev_card == "KNIGHT":
+    if dev_card == KNIGHT:
         previous_army_color, previous_army_size = get_largest_army(state)
-    key = player_key(state, color)
     player_deck_draw(state, color, dev_card)
-    state.player_state[f"{key}_HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN"] = True
-    state.player_state[f"{key}_PLAYED_{dev_card}"] += 1
-    if dev_card == "KNIGHT":
+    offset = player_offset(state, color)
+    state.player_state_array[offset + HAS_PLAYED_DEV_INDEX] = True
+    state.player_state_array[offset + PLAYED_OFFSET + dev_card] += 1
+    if dev_card == KNIGHT:
         maintain_largest_army(state, color, previous_army_color, previous_army_size)  # type: ignore
 
 
+def player_roll(state, color):
+    offset = player_offset(state, color)
+    state.player_state_array[offset + HAS_ROLLED_INDEX] = True
+
+
 def player_clean_turn(state, color):
-    key = player_key(state, color)
-    state.player_state[f"{key}_HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN"] = False
-    state.player_state[f"{key}_HAS_ROLLED"] = False
+    offset = player_offset(state, color)
+    state.player_state_array[offset + HAS_PLAYED_DEV_INDEX] = False
+    state.player_state_array[offset + HAS_ROLLED_INDEX] = False
@@ -22,5 +22,6 @@ setuptools.setup(
         "Operating System :: OS Independent",
     ],
     python_requires=">=3.6",
-    install_requires=["networkx"],
+    install_requires=[],
+    extras_require={"batch": ["numpy"]},
 )
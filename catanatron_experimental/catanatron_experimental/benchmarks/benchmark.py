@@ -1,4 +1,3 @@
-from catanatron.models.board import STATIC_GRAPH
 import pickle
 import timeit
 import time
@@ -79,7 +78,7 @@ end = time.time()
 print("graph = nx.DiGraph(a)", end - start, "seconds")
 
 start = time.time()
-STATIC_GRAPH.copy()
+graph.copy()
 end = time.time()
 print("graph.copy()", end - start, "seconds")
 
@@ -68,6 +68,15 @@ class VpDistributionAccumulator(GameAccumulator):
 
         self.num_games += 1
 
+    def merge(self, other):
+        for color in other.cities:
+            self.cities[color] += other.cities[color]
+            self.settlements[color] += other.settlements[color]
+            self.devvps[color] += other.devvps[color]
+            self.longest[color] += other.longest[color]
+            self.largest[color] += other.largest[color]
+        self.num_games += other.num_games
+
     def get_avg_cities(self, color=None):
         if color is None:
             return sum(self.cities.values()) / self.num_games
@@ -127,6 +136,16 @@ class StatisticsAccumulator(GameAccumulator):
             points = get_actual_victory_points(game.state, color)
             self.results_by_player[color].append(points)
 
+    def merge(self, other):
+        for color, wins in other.wins.items():
+            self.wins[color] += wins
+        self.turns.extend(other.turns)
+        self.ticks.extend(other.ticks)
+        self.durations.extend(other.durations)
+        self.games.extend(other.games)
+        for color, results in other.results_by_player.items():
+            self.results_by_player[color].extend(results)
+
     def get_avg_ticks(self):
         return sum(self.ticks) / len(self.ticks)
 
@@ -2,7 +2,7 @@ from collections import namedtuple
 
 from rich.table import Table
 
-from catanatron.models.player import HumanPlayer
+from catanatron.models.player import Color, HumanPlayer
 from catanatron.models.player import RandomPlayer
 from catanatron.players.weighted_random import WeightedRandomPlayer
 
@@ -50,7 +50,12 @@ from catanatron_experimental.machine_learning.players.playouts import (
 CliPlayer = namedtuple("CliPlayer", ["code", "name", "description", "import_fn"])
 CLI_PLAYERS = [
     CliPlayer("R", "RandomPlayer", "Chooses actions at random.", RandomPlayer),
-    CliPlayer("H", "HumanPlayer", "Human player that selects which action to take using standard input", HumanPlayer),
+    CliPlayer(
+        "H",
+        "HumanPlayer",
+        "Human player that selects which action to take using standard input",
+        HumanPlayer,
+    ),
     CliPlayer(
         "W",
         "WeightedRandomPlayer",
@@ -121,6 +126,23 @@ def register_accumulator(accumulator_class):
     CUSTOM_ACCUMULATORS.append(accumulator_class)
 
 
+def build_players(player_keys):
+    """Players of comma-separated CLI codes (e.g. "R,G:25,AB:2:C,W"), seated
+    in Color order. Unknown codes are skipped."""
+    players = []
+    colors = [c for c in Color]
+    for i, key in enumerate(player_keys.split(",")):
+        parts = key.split(":")
+        code = parts[0]
+        for cli_player in CLI_PLAYERS:
+            if cli_player.code == code:
+                params = [colors[i]] + parts[1:]
+                player = cli_player.import_fn(*params)
+                players.append(player)
+                break
+    return players
+
+
 def player_help_table():
     table = Table(title="Player Legend")
     table.add_column("CODE", justify="center", style="cyan", no_wrap=True)
@@ -3,9 +3,12 @@ from catanatron.game import GameAccumulator
 
 class SimulationAccumulator(GameAccumulator):
     def before_all(self):
-        """Called before all games in a catanatron-play simulation."""
+        """Called before all games in a catanatron-play simulation.
+        With --parallel, also in each worker before its share of games."""
         pass
 
     def after_all(self):
-        """Called after all games in a catanatron-play simulation."""
+        """Called after all games in a catanatron-play simulation.
+        With --parallel, also in each worker after its share of games, and
+        then (in the main process) after merging workers' (see merge)."""
         pass
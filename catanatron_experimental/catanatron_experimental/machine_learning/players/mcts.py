@@ -2,8 +2,6 @@ import math
 import time
 from collections import defaultdict
 
-import numpy as np
-
 from catanatron.game import Game
 from catanatron.models.player import Player
 from catanatron_experimental.machine_learning.players.playouts import run_playout
@@ -78,7 +76,7 @@ class StateNode:
         children = self.children[action]
         children_states = list(map(lambda c: c[0], children))
         children_probas = list(map(lambda c: c[1], children))
-        return np.random.choice(children_states, 1, p=children_probas)[0]
+        return self.game.state.rng.choices(children_states, children_probas)[0]
 
     def choose_best_action(self):
         scores = []
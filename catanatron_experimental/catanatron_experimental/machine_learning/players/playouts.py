@@ -1,5 +1,6 @@
 import time
 import random
+import itertools
 import multiprocessing
 from collections import Counter
 
@@ -55,25 +56,33 @@ class GreedyPlayoutsPlayer(Player):
 
 def run_playouts(action_applied_game_copy, num_playouts):
     start = time.time()
+    # seeded here (not in workers), so playouts only depend on the game
+    rng = action_applied_game_copy.state.rng
     params = []
     for _ in range(num_playouts):
-        params.append(action_applied_game_copy)
+        params.append((action_applied_game_copy, rng.getrandbits(64)))
     if USE_MULTIPROCESSING:
         with multiprocessing.Pool(NUM_WORKERS) as p:
-            counter = Counter(p.map(run_playout, params))
+            counter = Counter(p.starmap(run_playout, params))
     else:
-        counter = Counter(map(run_playout, params))
+        counter = Counter(itertools.starmap(run_playout, params))
     duration = time.time() - start
     # print(f"{num_playouts} playouts took: {duration}. Results: {counter}")
     return counter
 
 
-def run_playout(action_applied_game_copy):
+def run_playout(action_applied_game_copy, seed=None):
+    """Plays a copy of the game out at random, with dice (and choices) seeded
+    with seed. Defaults to a seed drawn from the game's generator."""
+    if seed is None:
+        seed = action_applied_game_copy.state.rng.getrandbits(64)
     game_copy = action_applied_game_copy.copy()
+    # copies share the dice of the original; draw fresh ones for each playout
+    game_copy.state.rng = random.Random(seed)
     game_copy.play(decide_fn=decide_fn)
     return game_copy.winning_color()
 
 
 def decide_fn(self, game, playable_actions):
-    index = random.randrange(0, len(playable_actions))
+    index = game.state.rng.randrange(0, len(playable_actions))
     return playable_actions[index]
@@ -1,14 +1,12 @@
-import random
-
 from catanatron.state_functions import (
     get_longest_road_length,
     get_played_dev_cards,
-    player_key,
+    get_visible_victory_points,
     player_num_dev_cards,
     player_num_resource_cards,
 )
 from catanatron.models.player import Player
-from catanatron.models.enums import RESOURCES, SETTLEMENT, CITY
+from catanatron.models.enums import CARD_NAMES, KNIGHT, RESOURCES, SETTLEMENT, CITY
 from catanatron_gym.features import (
     build_production_features,
     reachability_features,
@@ -62,17 +60,16 @@ def base_fn(params=DEFAULT_WEIGHTS):
         production = value_production(our_production_sample, "P0")
         enemy_production = value_production(enemy_production_sample, "P1", False)
 
-        key = player_key(game.state, p0_color)
         longest_road_length = get_longest_road_length(game.state, p0_color)
 
         reachability_sample = reachability_features(game, p0_color, 2)
-        features = [f"P0_0_ROAD_REACHABLE_{resource}" for resource in RESOURCES]
+        features = [f"P0_0_ROAD_REACHABLE_{CARD_NAMES[r]}" for r in RESOURCES]
         reachable_production_at_zero = sum([reachability_sample[f] for f in features])
-        features = [f"P0_1_ROAD_REACHABLE_{resource}" for resource in RESOURCES]
+        features = [f"P0_1_ROAD_REACHABLE_{CARD_NAMES[r]}" for r in RESOURCES]
         reachable_production_at_one = sum([reachability_sample[f] for f in features])
 
         hand_sample = resource_hand_features(game, p0_color)
-        features = [f"P0_{resource}_IN_HAND" for resource in RESOURCES]
+        features = [f"P0_{CARD_NAMES[r]}_IN_HAND" for r in RESOURCES]
         distance_to_city = (
             max(2 - hand_sample["P0_WHEAT_IN_HAND"], 0)
             + max(3 - hand_sample["P0_ORE_IN_HAND"], 0)
@@ -103,7 +100,7 @@ def base_fn(params=DEFAULT_WEIGHTS):
         )
 
         return float(
-            game.state.player_state[f"{key}_VICTORY_POINTS"] * params["public_vps"]
+            get_visible_victory_points(game.state, p0_color) * params["public_vps"]
             + production * params["production"]
             + enemy_production * params["enemy_production"]
             + reachable_production_at_zero * params["reachable_production_0"]
@@ -115,7 +112,7 @@ def base_fn(params=DEFAULT_WEIGHTS):
             + discard_penalty
             + longest_road_length * longest_road_factor
             + player_num_dev_cards(game.state, p0_color) * params["hand_devs"]
-            + get_played_dev_cards(game.state, p0_color, "KNIGHT") * params["army_size"]
+            + get_played_dev_cards(game.state, p0_color, KNIGHT) * params["army_size"]
         )
 
     return fn
@@ -162,17 +159,17 @@ class ValueFunctionPlayer(Player):
         if len(playable_actions) == 1:
             return playable_actions[0]
 
-        if self.epsilon is not None and random.random() < self.epsilon:
-            return random.choice(playable_actions)
+        if self.epsilon is not None and game.state.rng.random() < self.epsilon:
+            return game.state.rng.choice(playable_actions)
 
         best_value = float("-inf")
         best_action = None
         for action in playable_actions:
-            game_copy = game.copy()
-            game_copy.execute(action)
-
+            _, journal = game.execute_undoable(action)
             value_fn = get_value_fn(self.value_fn_builder_name, self.params)
-            value = value_fn(game_copy, self.color)
+            value = value_fn(game, self.color)
+            game.undo(journal)
+
             if value > best_value:
                 best_value = value
                 best_action = action
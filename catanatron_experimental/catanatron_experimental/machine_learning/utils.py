@@ -2,7 +2,7 @@ import os
 
 import numpy as np
 
-from catanatron.state import player_key
+from catanatron.state_functions import get_actual_victory_points
 from catanatron_experimental.utils import ensure_dir
 
 DISCOUNT_FACTOR = 0.99
@@ -135,8 +135,7 @@ def get_tournament_return(game, p0_color, discount_factor):
     """A way to say winning is important, no matter how long it takes, and
     getting close to winning is a secondary metric"""
     episode_return = p0_color == game.winning_color()
-    key = player_key(game.state, p0_color)
-    points = game.state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"]
+    points = get_actual_victory_points(game.state, p0_color)
     episode_return = episode_return * 1000 + min(points, 10)
     return episode_return * discount_factor**game.state.num_turns
 
@@ -145,8 +144,7 @@ def get_victory_points_return(game, p0_color):
     # This discount factor (0.9999) ensures a game won in less turns
     #   is better, and still a Game with 9vps is less than 10vps,
     #   no matter turns.
-    key = player_key(game.state, p0_color)
-    points = game.state.player_state[f"{key}_ACTUAL_VICTORY_POINTS"]
+    points = get_actual_victory_points(game.state, p0_color)
     episode_return = min(points, 10)
     return episode_return * 0.9999**game.state.num_turns
 
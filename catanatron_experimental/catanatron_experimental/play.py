@@ -1,7 +1,11 @@
 import os
+import sys
+import random
+import traceback
 import importlib.util
-from dataclasses import dataclass
-from typing import Literal, Union
+import multiprocessing
+from dataclasses import dataclass, replace
+from typing import Dict, Literal, Optional, Tuple, Union
 
 import click
 from rich.console import Console
@@ -13,9 +17,11 @@ from rich.console import Console
 from rich.theme import Theme
 from rich.text import Text
 
-from catanatron.game import Game
+from catanatron.engine_stats import EngineStats
+from catanatron.game import Game, GameAccumulator
 from catanatron.models.player import Color
 from catanatron.models.map import build_map
+from catanatron.models.map_bank import MapBank
 from catanatron.state_functions import get_actual_victory_points
 
 # try to suppress TF output before any potentially tf-importing modules
@@ -23,8 +29,8 @@ os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"
 from catanatron_experimental.utils import ensure_dir, formatSecs
 from catanatron_experimental.cli.cli_players import (
     CUSTOM_ACCUMULATORS,
+    build_players,
     player_help_table,
-    CLI_PLAYERS,
 )
 from catanatron_experimental.cli.accumulators import (
     JsonDataAccumulator,
@@ -58,7 +64,7 @@ class CustomTimeRemainingColumn(TimeRemainingColumn):
         return super().render(task)
 
 
-@click.command()
+@click.group(invoke_without_command=True)
 @click.option("-n", "--num", default=5, help="Number of games to play.")
 @click.option(
     "--players",
@@ -115,6 +121,43 @@ class CustomTimeRemainingColumn(TimeRemainingColumn):
     type=click.Choice(["BASE", "MINI", "TOURNAMENT"], case_sensitive=False),
     help="Sets Map to use. MINI is a 7-tile smaller version. TOURNAMENT uses a fixed balanced map.",
 )
+@click.option(
+    "--map-bank",
+    default=None,
+    help="""
+        Path to a map bank file (see catanatron.models.map_bank). Game i plays
+        on map id i (wrapping around), instead of on a freshly shuffled map.
+        Overrides --config-map.
+        """,
+)
+@click.option(
+    "--stats",
+    default=False,
+    is_flag=True,
+    help="""
+        Instrument the engine and print where its time went (counts and times
+        of apply_action, move generation, copies, longest road and yields).
+        """,
+)
+@click.option(
+    "--seed",
+    default=None,
+    type=int,
+    help="""
+        Seed of the batch. Game i (from 0) plays with seed + i, the same in
+        any number of workers. Defaults to a random seed.
+        """,
+)
+@click.option(
+    "--parallel",
+    "--workers",
+    "workers",
+    default=1,
+    help="""
+        Number of processes to play games in. Each plays a share of the
+        games with its own accumulators, which are merged at the end.
+        """,
+)
 @click.option(
     "--quiet",
     default=False,
@@ -128,7 +171,9 @@ class CustomTimeRemainingColumn(TimeRemainingColumn):
     help="Show player codes and exits.",
     is_flag=True,
 )
+@click.pass_context
 def simulate(
+    ctx,
     num,
     players,
     code,
@@ -139,6 +184,10 @@ def simulate(
     config_discard_limit,
     config_vps_to_win,
     config_map,
+    map_bank,
+    stats,
+    seed,
+    workers,
     quiet,
     help_players,
 ):
@@ -151,44 +200,156 @@ def simulate(
         catanatron-play --players=R,R,R,R --num=1000\n
         catanatron-play --players=W,W,R,R --num=50000 --output=data/ --csv\n
         catanatron-play --players=VP,F --num=10 --output=data/ --json\n
-        catanatron-play --players=W,F,AB:3 --num=1 --csv --json --db --quiet
+        catanatron-play --players=W,F,AB:3 --num=1 --csv --json --db --quiet\n
+        catanatron-play --players=AB:2,AB:2 --num=10000 --parallel=64 --seed=0\n
+        catanatron-play plan experiment/ --players=AB:2,F --num=100000 --shards=64\n
+
+    To split a simulation across hosts, see the plan, run-shard and merge
+    commands (e.g. catanatron-play plan --help).
     """
-    if code:
-        abspath = os.path.abspath(code)
-        spec = importlib.util.spec_from_file_location("module.name", abspath)
-        if spec is not None and spec.loader is not None:
-            user_module = importlib.util.module_from_spec(spec)
-            spec.loader.exec_module(user_module)
+    if ctx.invoked_subcommand is not None:
+        return  # e.g. plan, run-shard or merge
+    import_code(code)
 
     if help_players:
         return Console().print(player_help_table())
     if output and not (json or csv):
         return print("--output requires either --json or --csv to be set")
 
-    player_keys = players.split(",")
-    players = []
-    colors = [c for c in Color]
-    for i, key in enumerate(player_keys):
-        parts = key.split(":")
-        code = parts[0]
-        for cli_player in CLI_PLAYERS:
-            if cli_player.code == code:
-                params = [colors[i]] + parts[1:]
-                player = cli_player.import_fn(*params)
-                players.append(player)
-                break
-
+    players = build_players(players)
     output_options = OutputOptions(output, csv, json, db)
-    game_config = GameConfigOptions(config_discard_limit, config_vps_to_win, config_map)
+    game_config = GameConfigOptions(
+        config_discard_limit, config_vps_to_win, config_map, map_bank, stats, seed
+    )
     play_batch(
         num,
         players,
         output_options,
         game_config,
         quiet,
+        workers,
     )
 
 
+@simulate.command()
+@click.argument("directory")
+@click.option(
+    "--players",
+    "lineups",
+    multiple=True,
+    required=True,
+    help="Players of a lineup, as in catanatron-play. Repeat for more lineups.",
+)
+@click.option("-n", "--num", default=1000, help="Number of games per lineup.")
+@click.option("--shards", default=1, help="Number of shards per lineup.")
+@click.option("--seed", default=None, type=int, help="Seed of game 0.")
+@click.option("--config-discard-limit", default=7)
+@click.option("--config-vps-to-win", default=10)
+@click.option(
+    "--config-map",
+    default="BASE",
+    type=click.Choice(["BASE", "MINI", "TOURNAMENT"], case_sensitive=False),
+)
+@click.option("--map-bank", default=None, help="Game i plays on map i of bank.")
+def plan(
+    directory,
+    lineups,
+    num,
+    shards,
+    seed,
+    config_discard_limit,
+    config_vps_to_win,
+    config_map,
+    map_bank,
+):
+    """Plans an experiment (lineups x maps x seeds) in DIRECTORY, split into
+    shards to play with run-shard (e.g. on separate hosts)."""
+    from catanatron_experimental.sharding import plan as plan_experiment
+
+    game_config = GameConfigOptions(
+        config_discard_limit, config_vps_to_win, config_map, map_bank
+    )
+    try:
+        manifest = plan_experiment(directory, lineups, num, shards, game_config, seed)
+    except ValueError as error:
+        raise click.ClickException(str(error))
+    console.print(
+        f"Planned {len(manifest['shards'])} shards "
+        f"(0-{len(manifest['shards']) - 1}) in [green]{directory}[/green]"
+    )
+
+
+@simulate.command("run-shard")
+@click.argument("directory")
+@click.option(
+    "--shard", "shard_ids", type=click.IntRange(min=0), multiple=True, required=True
+)
+@click.option(
+    "--logs",
+    default=False,
+    is_flag=True,
+    help="Also save a compact snapshot of each game (see catanatron.snapshot).",
+)
+@click.option(
+    "--code",
+    default=None,
+    help="Path to file with custom Players to import and use.",
+)
+def run_shard(directory, shard_ids, logs, code):
+    """Plays shards of the experiment in DIRECTORY, saving their results
+    there. Run one per core (shards are independent)."""
+    from catanatron_experimental.sharding import run_shard as run_experiment_shard
+
+    import_code(code)
+    for shard_id in shard_ids:
+        try:
+            result = run_experiment_shard(directory, shard_id, logs)
+        except ValueError as error:
+            raise click.ClickException(str(error))
+        console.print(
+            f"Shard {shard_id}: played {result['summary']['num_games']} games"
+        )
+
+
+@simulate.command()
+@click.argument("directory")
+def merge(directory):
+    """Merges results of shards of the experiment in DIRECTORY (those done
+    so far) into results.json, and prints them."""
+    from catanatron_experimental.sharding import merge as merge_experiment
+
+    results = merge_experiment(directory)
+    console.print(
+        f"Merged {len(results['shards'])} shards "
+        f"({len(results['missing_shards'])} missing)"
+    )
+    for lineup in results["lineups"]:
+        summary = lineup["summary"]
+        if summary["num_finished"] == 0:
+            console.print(f"{lineup['players']}: no finished games")
+            continue
+        codes = lineup["players"].split(",")
+        rows = [
+            (
+                f"{rich_color(Color(color))} {code}",
+                stats["wins"],
+                stats["avg_vp"],
+                stats["avg_settlements"],
+                stats["avg_cities"],
+                stats["avg_longest"],
+                stats["avg_largest"],
+                stats["avg_dev_vps"],
+            )
+            for code, (color, stats) in zip(codes, summary["players"].items())
+        ]
+        console.print(player_summary_table(rows, title=lineup["players"]))
+        console.print(
+            game_summary_table(
+                summary["avg_ticks"], summary["avg_turns"], summary["avg_duration"]
+            )
+        )
+
+
 @dataclass(frozen=True)
 class OutputOptions:
     """Class to keep track of output CLI flags"""
@@ -204,6 +365,36 @@ class GameConfigOptions:
     discard_limit: int = 7
     vps_to_win: int = 10
     catan_map: Literal["BASE", "TOURNAMENT", "MINI"] = "BASE"
+    map_bank: Union[str, None] = None  # path; overrides catan_map
+    collect_stats: bool = False  # see Game.stats
+    seed: Union[int, None] = None  # game i plays with seed + i
+
+
+@dataclass(frozen=True)
+class GameResult:
+    """What play_batch reports of each game (so workers don't send games)"""
+
+    winning_color: Optional[Color]
+    colors: Tuple[Color, ...]
+    num_turns: int
+    victory_points: Dict[Color, int]
+    link: Union[str, None] = None  # see DatabaseAccumulator
+    stats: Optional[EngineStats] = None
+
+    @staticmethod
+    def from_game(game, accumulators=[]):
+        links = [a.link for a in accumulators if isinstance(a, DatabaseAccumulator)]
+        return GameResult(
+            game.winning_color(),
+            tuple(game.state.colors),
+            game.state.num_turns,
+            {
+                color: get_actual_victory_points(game.state, color)
+                for color in game.state.colors
+            },
+            links[-1] if len(links) > 0 else None,
+            game.stats(),
+        )
 
 
 COLOR_TO_RICH_STYLE = {
@@ -226,20 +417,64 @@ def rich_color(color):
     return f"[{style}]{color.value}[/{style}]"
 
 
-def play_batch_core(num_games, players, game_config, accumulators=[]):
+def import_code(code):
+    """Imports file at path code (e.g. to register players and accumulators)"""
+    if code:
+        abspath = os.path.abspath(code)
+        spec = importlib.util.spec_from_file_location("module.name", abspath)
+        if spec is not None and spec.loader is not None:
+            user_module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(user_module)
+
+
+def play_batch_core(num_games, players, game_config, accumulators=[], shard=(0, 1)):
+    """Plays games shard[0], shard[0] + shard[1], ... (all by default) of
+    num_games, yielding each when finished."""
+    return play_games(
+        batch_games(num_games, game_config, shard), players, game_config, accumulators
+    )
+
+
+def batch_games(num_games, game_config, shard=(0, 1)):
+    """[index, seed, map id] of games shard[0], shard[0] + shard[1], ... of
+    num_games. Game i plays with seed + i and on map i % len(bank) of the map
+    bank; seed and map id are None without a seed or a map bank."""
+    num_maps = len(MapBank(game_config.map_bank)) if game_config.map_bank else None
+    return [
+        [
+            i,
+            None if game_config.seed is None else game_config.seed + i,
+            None if num_maps is None else i % num_maps,
+        ]
+        for i in range(shard[0], num_games, shard[1])
+    ]
+
+
+def play_games(games, players, game_config, accumulators=[]):
+    """Plays the given [index, seed, map id] games (see batch_games),
+    yielding each when finished. Without a map bank, seeded games shuffle
+    game_config.catan_map with map_rng(seed)."""
     for accumulator in accumulators:
         if isinstance(accumulator, SimulationAccumulator):
             accumulator.before_all()
 
-    for _ in range(num_games):
+    map_bank = MapBank(game_config.map_bank) if game_config.map_bank else None
+    for _, seed, map_id in games:
         for player in players:
             player.reset_state()
-        catan_map = build_map(game_config.catan_map)
+        if map_bank is not None:
+            catan_map = map_bank.build_map(map_id)
+        elif seed is not None:
+            catan_map = build_map(game_config.catan_map, map_rng(seed))
+        else:
+            catan_map = build_map(game_config.catan_map)
         game = Game(
             players,
+            seed=seed,
             discard_limit=game_config.discard_limit,
             vps_to_win=game_config.vps_to_win,
             catan_map=catan_map,
+            collect_stats=game_config.collect_stats,
         )
         game.play(accumulators)
         for player in players:
@@ -251,19 +486,17 @@ def play_batch_core(num_games, players, game_config, accumulators=[]):
             accumulator.after_all()
 
 
-def play_batch(
-    num_games,
-    players,
-    output_options=None,
-    game_config=None,
-    quiet=False,
-):
-    output_options = output_options or OutputOptions()
-    game_config = game_config or GameConfigOptions()
+def map_rng(seed):
+    """Generator that shuffles the map of the game with this seed. Seeded
+    apart from the game's own generator (string seeds are hashed with
+    SHA-512), so seating and dice don't replay the draws that laid out the
+    map."""
+    return random.Random(f"map:{seed}")
 
-    statistics_accumulator = StatisticsAccumulator()
-    vp_accumulator = VpDistributionAccumulator()
-    accumulators = [statistics_accumulator, vp_accumulator]
+
+def build_accumulators(players, output_options, game_config):
+    """Accumulators of a play_batch: statistics and VP distribution first"""
+    accumulators = [StatisticsAccumulator(), VpDistributionAccumulator()]
     if output_options.output:
         ensure_dir(output_options.output)
     if output_options.output and output_options.csv:
@@ -274,9 +507,114 @@ def play_batch(
         accumulators.append(DatabaseAccumulator())
     for accumulator_class in CUSTOM_ACCUMULATORS:
         accumulators.append(accumulator_class(players=players, game_config=game_config))
+    return accumulators
+
+
+def play_batch_parallel(
+    num_games, players, output_options, game_config, accumulators, workers
+):
+    """Like play_batch_core, but yields GameResults of games played in worker
+    processes, as they finish. Each worker plays every workers-th game with
+    its own accumulators (see build_accumulators). When done, those that
+    implement GameAccumulator.merge are merged into accumulators.
+
+    Games are always seeded (see GameConfigOptions.seed), so workers don't
+    share the random sequence they inherit."""
+    if game_config.seed is None:
+        game_config = replace(game_config, seed=random.randrange(sys.maxsize))
+
+    for accumulator in accumulators:
+        if isinstance(accumulator, SimulationAccumulator):
+            accumulator.before_all()
+
+    context = multiprocessing.get_context()
+    queue = context.Queue()
+    # not daemonic, so players can start processes of their own (e.g. G)
+    processes = [
+        context.Process(
+            target=_play_shard,
+            args=(queue, (i, workers), num_games, players, output_options, game_config),
+        )
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        remaining = workers
+        while remaining > 0:
+            kind, payload = queue.get()
+            if kind == "game":
+                yield payload
+            elif kind == "error":
+                raise RuntimeError(f"Simulation worker failed:\n{payload}")
+            else:  # worker is done
+                for index, accumulator in payload:
+                    accumulators[index].merge(accumulator)
+                remaining -= 1
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+    for accumulator in accumulators:
+        if isinstance(accumulator, SimulationAccumulator):
+            accumulator.after_all()
+
+
+def _play_shard(queue, shard, num_games, players, output_options, game_config):
+    try:
+        accumulators = build_accumulators(players, output_options, game_config)
+        for game in play_batch_core(
+            num_games, players, game_config, accumulators, shard
+        ):
+            queue.put(("game", GameResult.from_game(game, accumulators)))
+
+        for accumulator in accumulators:
+            if isinstance(accumulator, StatisticsAccumulator):
+                accumulator.games = []  # don't send the whole batch back
+        # others (e.g. files or database writers) have nothing to send back
+        mergeable = [
+            (index, accumulator)
+            for index, accumulator in enumerate(accumulators)
+            if type(accumulator).merge is not GameAccumulator.merge
+        ]
+        queue.put(("done", mergeable))
+    except BaseException:
+        queue.put(("error", traceback.format_exc()))
+
+
+def play_batch(
+    num_games,
+    players,
+    output_options=None,
+    game_config=None,
+    quiet=False,
+    workers=1,
+):
+    """Plays num_games games (see play_batch_core), printing tables unless
+    quiet. Returns (wins, VPs by player, finished games). With workers > 1,
+    games are played in worker processes (see play_batch_parallel), which
+    don't send Games back, so the list of finished games is empty."""
+    output_options = output_options or OutputOptions()
+    game_config = game_config or GameConfigOptions()
+
+    accumulators = build_accumulators(players, output_options, game_config)
+    statistics_accumulator, vp_accumulator = accumulators[:2]
+    workers = min(workers, num_games)
+    if workers > 1:
+        results = play_batch_parallel(
+            num_games, players, output_options, game_config, accumulators, workers
+        )
+    else:
+        results = (
+            GameResult.from_game(game, accumulators)
+            for game in play_batch_core(num_games, players, game_config, accumulators)
+        )
 
     if quiet:
-        for _ in play_batch_core(num_games, players, game_config, accumulators):
+        for _ in results:
             pass
         return (
             dict(statistics_accumulator.wins),
@@ -297,6 +635,7 @@ def play_batch(
     if output_options.db:
         table.add_column("LINK", overflow="fold")
 
+    engine_stats = EngineStats()
     with Progress(
         "[progress.description]{task.description}",
         BarColumn(),
@@ -312,24 +651,23 @@ def play_batch(
             for player in players
         ]
 
-        for i, game in enumerate(
-            play_batch_core(num_games, players, game_config, accumulators)
-        ):
-            winning_color = game.winning_color()
+        for i, result in enumerate(results):
+            winning_color = result.winning_color
+            if game_config.collect_stats:
+                engine_stats.merge(result.stats)
 
             if (num_games - last_n) < (i + 1):
-                seating = ",".join([rich_color(c) for c in game.state.colors])
+                seating = ",".join([rich_color(c) for c in result.colors])
                 row = [
                     str(i + 1),
                     seating,
-                    str(game.state.num_turns),
+                    str(result.num_turns),
                 ]
                 for player in players:  # should be in column order
-                    points = get_actual_victory_points(game.state, player.color)
-                    row.append(str(points))
+                    row.append(str(result.victory_points[player.color]))
                 row.append(rich_color(winning_color))
                 if output_options.db:
-                    row.append(accumulators[-1].link)
+                    row.append(result.link)
 
                 table.add_row(*row)
 
@@ -344,45 +682,34 @@ def play_batch(
     console.print(table)
 
     # ===== PLAYER SUMMARY
-    table = Table(title="Player Summary", box=box.MINIMAL)
-    table.add_column("", no_wrap=True)
-    table.add_column("WINS", justify="right")
-    table.add_column("AVG VP", justify="right")
-    table.add_column("AVG SETTLES", justify="right")
-    table.add_column("AVG CITIES", justify="right")
-    table.add_column("AVG ROAD", justify="right")
-    table.add_column("AVG ARMY", justify="right")
-    table.add_column("AVG DEV VP", justify="right")
+    rows = []
     for player in players:
         vps = statistics_accumulator.results_by_player[player.color]
-        avg_vps = sum(vps) / len(vps)
-        avg_settlements = vp_accumulator.get_avg_settlements(player.color)
-        avg_cities = vp_accumulator.get_avg_cities(player.color)
-        avg_largest = vp_accumulator.get_avg_largest(player.color)
-        avg_longest = vp_accumulator.get_avg_longest(player.color)
-        avg_devvps = vp_accumulator.get_avg_devvps(player.color)
-        table.add_row(
-            rich_player_name(player),
-            str(statistics_accumulator.wins[player.color]),
-            f"{avg_vps:.2f}",
-            f"{avg_settlements:.2f}",
-            f"{avg_cities:.2f}",
-            f"{avg_longest:.2f}",
-            f"{avg_largest:.2f}",
-            f"{avg_devvps:.2f}",
+        rows.append(
+            (
+                rich_player_name(player),
+                statistics_accumulator.wins[player.color],
+                sum(vps) / len(vps),
+                vp_accumulator.get_avg_settlements(player.color),
+                vp_accumulator.get_avg_cities(player.color),
+                vp_accumulator.get_avg_longest(player.color),
+                vp_accumulator.get_avg_largest(player.color),
+                vp_accumulator.get_avg_devvps(player.color),
+            )
         )
-    console.print(table)
+    console.print(player_summary_table(rows))
 
     # ===== GAME SUMMARY
-    avg_ticks = f"{statistics_accumulator.get_avg_ticks():.2f}"
-    avg_turns = f"{statistics_accumulator.get_avg_turns():.2f}"
-    avg_duration = formatSecs(statistics_accumulator.get_avg_duration())
-    table = Table(box=box.MINIMAL, title="Game Summary")
-    table.add_column("AVG TICKS", justify="right")
-    table.add_column("AVG TURNS", justify="right")
-    table.add_column("AVG DURATION", justify="right")
-    table.add_row(avg_ticks, avg_turns, avg_duration)
-    console.print(table)
+    console.print(
+        game_summary_table(
+            statistics_accumulator.get_avg_ticks(),
+            statistics_accumulator.get_avg_turns(),
+            statistics_accumulator.get_avg_duration(),
+        )
+    )
+
+    if game_config.collect_stats:
+        console.print(engine_stats_table(engine_stats))
 
     if output_options.output and output_options.csv:
         console.print(f"GZIP CSVs saved at: [green]{output_options.output}[/green]")
@@ -394,5 +721,51 @@ def play_batch(
     )
 
 
+def player_summary_table(rows, title="Player Summary"):
+    """Rows are (name, wins, avg VP, avg settlements, avg cities, avg longest
+    road, avg largest army, avg dev VPs)"""
+    table = Table(title=title, box=box.MINIMAL)
+    table.add_column("", no_wrap=True)
+    table.add_column("WINS", justify="right")
+    table.add_column("AVG VP", justify="right")
+    table.add_column("AVG SETTLES", justify="right")
+    table.add_column("AVG CITIES", justify="right")
+    table.add_column("AVG ROAD", justify="right")
+    table.add_column("AVG ARMY", justify="right")
+    table.add_column("AVG DEV VP", justify="right")
+    for name, wins, *averages in rows:
+        table.add_row(name, str(wins), *[f"{average:.2f}" for average in averages])
+    return table
+
+
+def game_summary_table(avg_ticks, avg_turns, avg_duration, title="Game Summary"):
+    table = Table(box=box.MINIMAL, title=title)
+    table.add_column("AVG TICKS", justify="right")
+    table.add_column("AVG TURNS", justify="right")
+    table.add_column("AVG DURATION", justify="right")
+    table.add_row(f"{avg_ticks:.2f}", f"{avg_turns:.2f}", formatSecs(avg_duration))
+    return table
+
+
+def engine_stats_table(engine_stats):
+    table = Table(title="Engine Stats", box=box.MINIMAL)
+    table.add_column("SECTION", no_wrap=True)
+    table.add_column("KEY", no_wrap=True)
+    table.add_column("COUNT", justify="right")
+    table.add_column("TOTAL", justify="right")
+    table.add_column("AVG (us)", justify="right")
+    for section, by_key in sorted(engine_stats.to_dict().items()):
+        entries = sorted(by_key.items(), key=lambda e: -e[1]["seconds"])
+        for key, entry in entries:
+            table.add_row(
+                section,
+                key,
+                str(entry["count"]),
+                formatSecs(entry["seconds"]),
+                f"{entry['seconds'] / entry['count'] * 1e6:.1f}",
+            )
+    return table
+
+
 if __name__ == "__main__":
     simulate()
@@ -0,0 +1,315 @@
+"""
+Splits a large simulation (player lineups x maps x seeds) into shards that
+can run on separate hosts, and merges their results. A directory (shared, or
+copied around) is the only transport:
+
+    experiment/manifest.json      what to play (see plan)
+    experiment/shards/0003.json   results of shard 3 (see run_shard)
+    experiment/shards/0003.games  optional game logs (see read_game_logs)
+    experiment/results.json       merged tables (see merge)
+
+The manifest lists the [index, seed, map id] of each game of each shard,
+and run_shard plays exactly those. Like in catanatron-play (see
+batch_games), game i of a lineup plays with seed + i, on map i % len(bank)
+of a map bank or else on a map shuffled by map_rng(seed + i), and shard k
+of S plays games k, k + S, ... of its lineup. So every lineup plays the
+same maps and seeds, and results don't depend on how games were sharded.
+
+Example:
+    catanatron-play plan experiment/ --players=AB:2,F --players=F,AB:2 \\
+        --num=100000 --shards=64 --map-bank=base.bank
+    catanatron-play run-shard experiment/ --shard=3  # on any host, per shard
+    catanatron-play merge experiment/  # any time; recomputes from shards
+"""
+
+import hashlib
+import json
+import os
+import random
+import struct
+import sys
+import time
+from collections import defaultdict
+from dataclasses import asdict, replace
+
+from catanatron.game import GameAccumulator
+from catanatron.models.enums import CITY, SETTLEMENT, VICTORY_POINT
+from catanatron.models.player import Color
+from catanatron.snapshot import dump_game
+from catanatron.state_functions import (
+    get_actual_victory_points,
+    get_dev_cards_in_hand,
+    get_largest_army,
+    get_longest_road_color,
+    get_player_buildings,
+)
+from catanatron_experimental.cli.cli_players import build_players
+from catanatron_experimental.play import GameConfigOptions, batch_games, play_games
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+RESULTS_FILE = "results.json"
+SHARDS_DIRECTORY = "shards"
+LOG_RECORD_SIZE = struct.Struct("<I")  # length prefix of each game snapshot
+
+
+def plan(directory, lineups, num_games, num_shards, game_config, seed=None):
+    """Writes the manifest of an experiment into directory, and returns it.
+
+    Args:
+        directory (str): Experiment directory (created if needed).
+        lineups (List[str]): Comma-separated CLI player codes of each lineup
+            (e.g. "AB:2,F"), as in catanatron-play --players.
+        num_games (int): Games per lineup.
+        num_shards (int): Shards per lineup.
+        game_config (GameConfigOptions): Rules and map (or map bank). A
+            relative map_bank path is stored relative to directory.
+        seed (int, optional): Seed of game 0. Defaults to a random seed.
+
+    Raises:
+        ValueError: If directory already has a different manifest.
+    """
+    seed = seed if seed is not None else random.randrange(sys.maxsize)
+    config = asdict(game_config)
+    config.pop("seed")  # per game, below
+    config.pop("collect_stats")
+    if game_config.map_bank is not None:
+        config["map_bank"] = os.path.relpath(game_config.map_bank, directory)
+
+    shards = []
+    for lineup_index in range(len(lineups)):
+        for k in range(min(num_shards, num_games)):
+            games = batch_games(
+                num_games, replace(game_config, seed=seed), (k, num_shards)
+            )
+            shards.append(
+                {"lineup": lineup_index, "shard": [k, num_shards], "games": games}
+            )
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "game_config": config,
+        "lineups": list(lineups),
+        "num_games": num_games,
+        "seed": seed,
+        "shards": shards,  # [index, seed, map id] of each game
+    }
+
+    data = json.dumps(manifest, indent=1).encode("utf-8")
+    path = os.path.join(directory, MANIFEST_FILE)
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            if f.read() != data:
+                raise ValueError(f"{path} already exists, with another plan")
+    os.makedirs(os.path.join(directory, SHARDS_DIRECTORY), exist_ok=True)
+    _write_atomically(path, data)
+    return manifest
+
+
+def load_manifest(directory):
+    """Returns (manifest, digest) of the experiment in directory. Shard
+    results carry the digest of the manifest they were played from."""
+    with open(os.path.join(directory, MANIFEST_FILE), "rb") as f:
+        data = f.read()
+    manifest = json.loads(data)
+    if manifest.get("version") != MANIFEST_VERSION:
+        raise ValueError(f"Unsupported manifest version: {manifest.get('version')}")
+    return manifest, hashlib.sha256(data).hexdigest()
+
+
+def shard_path(directory, shard_id, extension="json"):
+    return os.path.join(directory, SHARDS_DIRECTORY, f"{shard_id:04d}.{extension}")
+
+
+def run_shard(directory, shard_id, logs=False):
+    """Plays shard shard_id of the experiment in directory and writes its
+    results (see shard_path), replacing any previous ones. Returns them.
+
+    Args:
+        logs (bool, optional): Also save a compact snapshot of each game
+            (see catanatron.snapshot.dump_game, and read_game_logs).
+
+    Raises:
+        ValueError: If the manifest has no shard shard_id.
+    """
+    manifest, digest = load_manifest(directory)
+    if not 0 <= shard_id < len(manifest["shards"]):
+        raise ValueError(
+            f"No shard {shard_id} (shards are 0-{len(manifest['shards']) - 1})"
+        )
+    shard = manifest["shards"][shard_id]
+    players = build_players(manifest["lineups"][shard["lineup"]])
+    config = dict(manifest["game_config"])
+    if config["map_bank"] is not None:
+        config["map_bank"] = os.path.join(directory, config["map_bank"])
+    game_config = GameConfigOptions(**config)
+
+    recorder = GameRecorder(shard["games"])
+    games = play_games(shard["games"], players, game_config, [recorder])
+    log_path = shard_path(directory, shard_id, "games")
+    if logs:
+        with open(log_path + ".tmp", "wb") as f:
+            for game in games:
+                data = dump_game(game)
+                f.write(LOG_RECORD_SIZE.pack(len(data)) + data)
+        os.replace(log_path + ".tmp", log_path)
+    else:
+        for _ in games:
+            pass
+
+    result = {
+        "manifest": digest,
+        "shard": shard_id,
+        "lineup": shard["lineup"],
+        "summary": summarize(recorder.records, len(players)),
+        "games": recorder.records,
+    }
+    data = json.dumps(result).encode("utf-8")
+    _write_atomically(shard_path(directory, shard_id), data)
+    return result
+
+
+def read_game_logs(path):
+    """Yields snapshots of the games in a shard's game log. Load them with
+    catanatron.snapshot.load_game (passing players to keep playing)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    offset = 0
+    while offset < len(data):
+        (size,) = LOG_RECORD_SIZE.unpack_from(data, offset)
+        offset += LOG_RECORD_SIZE.size
+        yield data[offset : offset + size]
+        offset += size
+
+
+def merge(directory):
+    """Merges the shard results found in directory (ignoring those of other
+    manifests) into per-lineup tables, and writes them to results.json.
+    Recomputed from the shards' games every time, so it can be run again
+    as shards come in, and gives the same results for the same shards.
+
+    Returns:
+        dict: With "shards" merged, "missing_shards" and "lineups" (with
+        their "players" codes and a "summary", see summarize).
+    """
+    manifest, digest = load_manifest(directory)
+    records = defaultdict(list)
+    merged = []
+    for shard_id, shard in enumerate(manifest["shards"]):
+        path = shard_path(directory, shard_id)
+        if not os.path.exists(path):
+            continue
+        with open(path, "rb") as f:
+            result = json.loads(f.read())
+        if result["manifest"] != digest:
+            continue  # stale, from another plan
+        records[shard["lineup"]].extend(result["games"])
+        merged.append(shard_id)
+
+    lineups = []
+    for lineup_index, lineup in enumerate(manifest["lineups"]):
+        games = sorted(records[lineup_index], key=lambda record: record["index"])
+        lineups.append(
+            {
+                "players": lineup,
+                "summary": summarize(games, len(lineup.split(","))),
+            }
+        )
+    results = {
+        "manifest": digest,
+        "shards": merged,
+        "missing_shards": sorted(set(range(len(manifest["shards"]))) - set(merged)),
+        "lineups": lineups,
+    }
+    data = json.dumps(results, indent=1).encode("utf-8")
+    _write_atomically(os.path.join(directory, RESULTS_FILE), data)
+    return results
+
+
+class GameRecorder(GameAccumulator):
+    """Records what summarize needs of each of the [index, seed, map id]
+    games played (in order), as JSON-ready dicts"""
+
+    def __init__(self, games):
+        self.games = games
+        self.records = []
+
+    def before(self, game):
+        self.start = time.time()
+
+    def after(self, game):
+        duration = time.time() - self.start
+        index, seed, map_id = self.games[len(self.records)]
+        state = game.state
+        largest_army_color = get_largest_army(state)[0]
+        longest_road_color = get_longest_road_color(state)
+        winning_color = game.winning_color()
+        self.records.append(
+            {
+                "index": index,
+                "seed": seed,
+                "map_id": map_id,
+                "winner": None if winning_color is None else winning_color.value,
+                "turns": state.num_turns,
+                "ticks": len(state.actions),
+                "duration": duration,
+                "players": {
+                    color.value: {
+                        "vp": get_actual_victory_points(state, color),
+                        "settlements": len(
+                            get_player_buildings(state, color, SETTLEMENT)
+                        ),
+                        "cities": len(get_player_buildings(state, color, CITY)),
+                        "longest": longest_road_color == color,
+                        "largest": largest_army_color == color,
+                        "dev_vps": get_dev_cards_in_hand(state, color, VICTORY_POINT),
+                    }
+                    for color in state.colors
+                },
+            }
+        )
+
+
+def summarize(records, num_players):
+    """Win, VP and duration tables of games (as recorded by GameRecorder).
+    Like catanatron-play, averages only count games that finished.
+
+    Returns:
+        dict: "num_games", "num_finished", "avg_ticks", "avg_turns",
+        "avg_duration" and "players", with "wins", "avg_vp",
+        "avg_settlements", "avg_cities", "avg_longest", "avg_largest" and
+        "avg_dev_vps" by color (seated in Color order, like build_players).
+    """
+    finished = [record for record in records if record["winner"] is not None]
+    num_finished = len(finished)
+
+    def average(values):
+        values = list(values)
+        return sum(values) / len(values) if len(values) > 0 else None
+
+    players = {}
+    for color in list(Color)[:num_players]:
+        stats = [record["players"][color.value] for record in finished]
+        players[color.value] = {
+            "wins": sum(record["winner"] == color.value for record in finished),
+            "avg_vp": average(s["vp"] for s in stats),
+            "avg_settlements": average(s["settlements"] for s in stats),
+            "avg_cities": average(s["cities"] for s in stats),
+            "avg_longest": average(s["longest"] for s in stats),
+            "avg_largest": average(s["largest"] for s in stats),
+            "avg_dev_vps": average(s["dev_vps"] for s in stats),
+        }
+    return {
+        "num_games": len(records),
+        "num_finished": num_finished,
+        "avg_ticks": average(record["ticks"] for record in finished),
+        "avg_turns": average(record["turns"] for record in finished),
+        "avg_duration": average(record["duration"] for record in finished),
+        "players": players,
+    }
+
+
+def _write_atomically(path, data):
+    """So readers (e.g. merge) never see a partially written file"""
+    with open(path + ".tmp", "wb") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
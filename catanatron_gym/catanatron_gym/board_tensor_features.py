@@ -1,4 +1,3 @@
-import networkx as nx
 import numpy as np
 
 from catanatron.state_functions import get_player_buildings
@@ -11,7 +10,7 @@ from catanatron.models.enums import (
     ROAD,
 )
 from catanatron.models.coordinate_system import offset_to_cube
-from catanatron.models.board import STATIC_GRAPH
+from catanatron.models.topology import STATIC_TOPOLOGY, shortest_path
 from catanatron.models.map import number_probability
 from catanatron_gym.features import get_feature_ordering, iter_players
 
@@ -76,7 +75,7 @@ def init_board_tensor_map():
         (73, 59),
         (72, 60),
     ]
-    paths = [nx.shortest_path(STATIC_GRAPH, a, b) for (a, b) in pairs]
+    paths = [shortest_path(STATIC_TOPOLOGY, a, b) for (a, b) in pairs]
 
     node_map = {}
     edge_map = {}
@@ -5,6 +5,7 @@ import numpy as np
 from catanatron.game import Game
 from catanatron.models.player import Color, Player, RandomPlayer
 from catanatron.models.map import BASE_MAP_TEMPLATE, NUM_NODES, LandTile, build_map
+from catanatron.models.map_bank import MapBank
 from catanatron.models.enums import RESOURCES, Action, ActionType
 from catanatron.models.board import get_edges
 from catanatron_gym.features import (
@@ -62,11 +63,13 @@ ACTIONS_ARRAY = [
     (ActionType.END_TURN, None),
 ]
 ACTION_SPACE_SIZE = len(ACTIONS_ARRAY)
+ACTIONS_INDEX = {action: i for i, action in enumerate(ACTIONS_ARRAY)}
 ACTION_TYPES = [i for i in ActionType]
+ACTION_TYPES_INDEX = {action_type: i for i, action_type in enumerate(ACTION_TYPES)}
 
 
 def to_action_type_space(action):
-    return ACTION_TYPES.index(action.action_type)
+    return ACTION_TYPES_INDEX[action.action_type]
 
 
 def normalize_action(action):
@@ -87,7 +90,7 @@ def normalize_action(action):
 def to_action_space(action):
     """maps action to space_action equivalent integer"""
     normalized = normalize_action(action)
-    return ACTIONS_ARRAY.index((normalized.action_type, normalized.value))
+    return ACTIONS_INDEX[(normalized.action_type, normalized.value)]
 
 
 def from_action_space(action_int, playable_actions):
@@ -135,6 +138,11 @@ class CatanatronEnv(gym.Env):
         self.invalid_action_reward = self.config.get("invalid_action_reward", -1)
         self.reward_function = self.config.get("reward_function", simple_reward)
         self.map_type = self.config.get("map_type", "BASE")
+        self.map_bank = self.config.get("map_bank", None)
+        if isinstance(self.map_bank, str):
+            self.map_bank = MapBank(self.map_bank)
+        if self.map_bank is not None:
+            self.map_type = self.map_bank.map_type
         self.vps_to_win = self.config.get("vps_to_win", 10)
         self.enemies = self.config.get("enemies", [RandomPlayer(Color.RED)])
         self.representation = self.config.get("representation", "vector")
@@ -217,7 +225,14 @@ class CatanatronEnv(gym.Env):
     ):
         super().reset(seed=seed)
 
-        catan_map = build_map(self.map_type)
+        if self.map_bank is not None:
+            # options={"map_id": ...} picks a map; defaults to a random one
+            map_id = (options or {}).get("map_id")
+            if map_id is None:
+                map_id = int(self.np_random.integers(len(self.map_bank)))
+            catan_map = self.map_bank.build_map(map_id)
+        else:
+            catan_map = build_map(self.map_type)
         for player in self.players:
             player.reset_state()
         self.game = Game(
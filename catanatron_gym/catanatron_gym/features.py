@@ -1,20 +1,34 @@
 from typing import Any, List, Literal, Tuple
 import functools
 from collections import Counter
+from collections import deque
 from catanatron.models.decks import freqdeck_count
 
-import networkx as nx
-
 from catanatron.state_functions import (
+    get_dev_cards_in_hand,
+    get_played_dev_cards,
     get_player_buildings,
     player_key,
     player_num_dev_cards,
     player_num_resource_cards,
 )
-from catanatron.models.board import STATIC_GRAPH, get_edges, get_node_distances
+from catanatron.models.board import get_edges, get_node_distances
+from catanatron import game as game_module
+from catanatron import state as state_module
+from catanatron import state_functions as state_functions_module
+from catanatron.cache import cached_table
+from catanatron.models import board as board_module
+from catanatron.models import decks as decks_module
+from catanatron.models import enums
+from catanatron.models import map as map_module
+from catanatron.models import player as player_module
+from catanatron.models import topology as topology_module
 from catanatron.models.map import NUM_TILES, CatanMap, build_map
+from catanatron.models.topology import STATIC_TOPOLOGY
 from catanatron.models.player import Color, SimplePlayer
 from catanatron.models.enums import (
+    BUILDING_NAMES,
+    CARD_NAMES,
     DEVELOPMENT_CARDS,
     RESOURCES,
     SETTLEMENT,
@@ -95,27 +109,28 @@ def resource_hand_features(game: Game, p0_color: Color):
     # TODO: P1_ROAD_BUILDINGS_INFERENCE, P1_KNIGHT_INFERENCE, ...
 
     state = game.state
-    player_state = state.player_state
 
     features = {}
     for i, color in iter_players(game.state.colors, p0_color):
-        key = player_key(game.state, color)
-
         if color == p0_color:
             for resource in RESOURCES:
-                features[f"P0_{resource}_IN_HAND"] = player_state[
-                    key + f"_{resource}_IN_HAND"
-                ]
+                features[
+                    f"P0_{CARD_NAMES[resource]}_IN_HAND"
+                ] = player_num_resource_cards(state, color, resource)
             for card in DEVELOPMENT_CARDS:
-                features[f"P0_{card}_IN_HAND"] = player_state[key + f"_{card}_IN_HAND"]
-            features[f"P0_HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN"] = player_state[
-                key + "_HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN"
+                features[f"P0_{CARD_NAMES[card]}_IN_HAND"] = get_dev_cards_in_hand(
+                    state, color, card
+                )
+            features[f"P0_HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN"] = state.player_state[
+                player_key(state, color) + "_HAS_PLAYED_DEVELOPMENT_CARD_IN_TURN"
             ]
 
         for card in DEVELOPMENT_CARDS:
             if card == VICTORY_POINT:
                 continue  # cant play VPs
-            features[f"P{i}_{card}_PLAYED"] = player_state[key + f"_PLAYED_{card}"]
+            features[f"P{i}_{CARD_NAMES[card]}_PLAYED"] = get_played_dev_cards(
+                state, color, card
+            )
 
         features[f"P{i}_NUM_RESOURCES_IN_HAND"] = player_num_resource_cards(
             state, color
@@ -133,7 +148,9 @@ def map_tile_features(catan_map: CatanMap, robber_coordinate):
 
     for tile_id, tile in catan_map.tiles_by_id.items():
         for resource in RESOURCES:
-            features[f"TILE{tile_id}_IS_{resource}"] = tile.resource == resource
+            features[f"TILE{tile_id}_IS_{CARD_NAMES[resource]}"] = (
+                tile.resource == resource
+            )
         features[f"TILE{tile_id}_IS_DESERT"] = tile.resource == None
         features[f"TILE{tile_id}_PROBA"] = (
             0 if tile.resource is None else number_probability(tile.number)
@@ -155,7 +172,9 @@ def map_port_features(catan_map):
     features = {}
     for port_id, port in catan_map.ports_by_id.items():
         for resource in RESOURCES:
-            features[f"PORT{port_id}_IS_{resource}"] = port.resource == resource
+            features[f"PORT{port_id}_IS_{CARD_NAMES[resource]}"] = (
+                port.resource == resource
+            )
         features[f"PORT{port_id}_IS_THREE_TO_ONE"] = port.resource is None
     return features
 
@@ -171,7 +190,7 @@ def initialize_graph_features_template(num_players, catan_map: CatanMap):
     for i in range(num_players):
         for node_id in range(len(catan_map.land_nodes)):
             for building in [SETTLEMENT, CITY]:
-                features[f"NODE{node_id}_P{i}_{building}"] = False
+                features[f"NODE{node_id}_P{i}_{BUILDING_NAMES[building]}"] = False
         for edge in get_edges(catan_map.land_nodes):
             features[f"EDGE{edge}_P{i}_ROAD"] = False
     return features
@@ -231,7 +250,7 @@ def build_production_features(consider_robber):
                     production += 2 * get_node_production(
                         game.state.board.map, node_id, resource
                     )
-                features[f"{prefix}P{i}_{resource}_PRODUCTION"] = production
+                features[f"{prefix}P{i}_{CARD_NAMES[resource]}_PRODUCTION"] = production
 
         return features
 
@@ -303,7 +322,7 @@ def iter_level_nodes(enemy_nodes, enemy_roads, num_roads, zero_nodes):
 
             # here we can assume node is empty or owned
             expandable = []
-            for neighbor_id in STATIC_GRAPH.neighbors(node_id):
+            for neighbor_id in STATIC_TOPOLOGY.neighbors[node_id]:
                 edge = (node_id, neighbor_id)
                 can_follow_edge = edge not in enemy_roads
                 if can_follow_edge:
@@ -324,7 +343,7 @@ def get_owned_or_buildable(game, color, board_buildable):
     return frozenset(
         get_player_buildings(game.state, color, SETTLEMENT)
         + get_player_buildings(game.state, color, CITY)
-        + board_buildable
+        + tuple(board_buildable)
     )
 
 
@@ -342,7 +361,9 @@ def reachability_features(game: Game, p0_color: Color, levels=REACHABLE_FEATURES
             game.state.board.map,
         )
         for resource in RESOURCES:
-            features[f"P{i}_0_ROAD_REACHABLE_{resource}"] = production[resource]
+            features[f"P{i}_0_ROAD_REACHABLE_{CARD_NAMES[resource]}"] = production[
+                resource
+            ]
 
         # do rest of layers
         enemy_nodes = frozenset(
@@ -361,9 +382,9 @@ def reachability_features(game: Game, p0_color: Color, levels=REACHABLE_FEATURES
                 game.state.board.map,
             )
             for resource in RESOURCES:
-                features[f"P{i}_{level}_ROAD_REACHABLE_{resource}"] = production[
-                    resource
-                ]
+                features[
+                    f"P{i}_{level}_ROAD_REACHABLE_{CARD_NAMES[resource]}"
+                ] = production[resource]
 
     return features
 
@@ -385,7 +406,8 @@ def expansion_features(game: Game, p0_color: Color):
     empty_edges = set(get_edges(game.state.board.map.land_nodes))
     for i, color in iter_players(game.state.colors, p0_color):
         empty_edges.difference_update(get_player_buildings(game.state, color, ROAD))
-    searchable_subgraph = STATIC_GRAPH.edge_subgraph(empty_edges)
+    searchable_edges = empty_edges | {(b, a) for a, b in empty_edges}
+    searchable_node_ids = {node_id for edge in empty_edges for node_id in edge}
 
     board_buildable_node_ids = game.state.board.buildable_node_ids(
         p0_color, True
@@ -394,12 +416,6 @@ def expansion_features(game: Game, p0_color: Color):
     for i, color in iter_players(game.state.colors, p0_color):
         expandable_node_ids = get_player_expandable_nodes(game, color)
 
-        def skip_blocked_by_enemy(neighbor_ids):
-            for node_id in neighbor_ids:
-                node_color = game.state.board.get_node_color(node_id)
-                if node_color is None or node_color == color:
-                    yield node_id  # not owned by enemy, can explore
-
         # owned_edges = get_player_buildings(state, color, ROAD)
         dis_res_prod = {
             distance: {k: 0 for k in RESOURCES}
@@ -415,36 +431,45 @@ def expansion_features(game: Game, p0_color: Color):
                         production, dis_res_prod[0][resource]
                     )
 
-            if node_id not in searchable_subgraph.nodes():
+            if node_id not in searchable_node_ids:
                 continue  # must be internal node, no need to explore
 
-            bfs_iteration = nx.bfs_edges(
-                searchable_subgraph,
-                node_id,
-                depth_limit=MAX_EXPANSION_DISTANCE - 1,
-                sort_neighbors=skip_blocked_by_enemy,
-            )
-
+            # bfs over empty edges (up to MAX_EXPANSION_DISTANCE - 1 away),
+            #   not going into nodes owned by enemies.
             paths = {node_id: []}
-            for edge in bfs_iteration:
-                a, b = edge
-                path_until_now = paths[a]
-                distance = len(path_until_now) + 1
-                paths[b] = paths[a] + [b]
+            agenda = deque([(node_id, MAX_EXPANSION_DISTANCE - 1)])
+            while agenda:
+                a, depth = agenda.popleft()
+                for b in STATIC_TOPOLOGY.neighbors[a]:
+                    if b in paths or (a, b) not in searchable_edges:
+                        continue
+                    node_color = game.state.board.get_node_color(b)
+                    if node_color is not None and node_color != color:
+                        continue  # owned by enemy, can't explore
 
-                if b not in board_buildable_node_ids:
-                    continue
+                    path_until_now = paths[a]
+                    distance = len(path_until_now) + 1
+                    paths[b] = paths[a] + [b]
+                    if depth > 1:
+                        agenda.append((b, depth - 1))
 
-                # means we can get to node b, at distance=d, starting from path[0]
-                for resource in RESOURCES:
-                    production = get_node_production(game.state.board.map, b, resource)
-                    dis_res_prod[distance][resource] = max(
-                        production, dis_res_prod[distance][resource]
-                    )
+                    if b not in board_buildable_node_ids:
+                        continue
+
+                    # means we can get to node b, at distance=d, starting from path[0]
+                    for resource in RESOURCES:
+                        production = get_node_production(
+                            game.state.board.map, b, resource
+                        )
+                        dis_res_prod[distance][resource] = max(
+                            production, dis_res_prod[distance][resource]
+                        )
 
         for distance, res_prod in dis_res_prod.items():
             for resource, prod in res_prod.items():
-                features[f"P{i}_{resource}_AT_DISTANCE_{int(distance)}"] = prod
+                features[
+                    f"P{i}_{CARD_NAMES[resource]}_AT_DISTANCE_{int(distance)}"
+                ] = prod
 
     return features
 
@@ -457,7 +482,7 @@ def port_distance_features(game: Game, p0_color: Color):
     resources_and_none: List[Any] = RESOURCES.copy()
     resources_and_none += [None]
     for resource_or_none in resources_and_none:
-        port_name = resource_or_none or "3:1"
+        port_name = "3:1" if resource_or_none is None else CARD_NAMES[resource_or_none]
         for i, color in iter_players(game.state.colors, p0_color):
             expandable_node_ids = get_player_expandable_nodes(game, color)
             if len(expandable_node_ids) == 0:
@@ -485,7 +510,7 @@ def game_features(game: Game, p0_color: Color):
         "IS_DISCARDING": ActionType.DISCARD in possibilities,
     }
     for resource in RESOURCES:
-        features[f"BANK_{resource}"] = freqdeck_count(
+        features[f"BANK_{CARD_NAMES[resource]}"] = freqdeck_count(
             game.state.resource_freqdeck, resource
         )
     return features
@@ -527,6 +552,26 @@ def create_sample_vector(game, p0_color, features=None):
 def get_feature_ordering(
     num_players=4, map_type: Literal["BASE", "MINI", "TOURNAMENT"] = "BASE"
 ):
+    # Loaded from the on-disk cache, instead of creating a Game on every import
+    return cached_table(
+        f"feature_ordering-{num_players}-{map_type}",
+        lambda: build_feature_ordering(num_players, map_type),
+        [  # everything building a Game and its sample reads
+            __file__,
+            game_module.__file__,
+            state_module.__file__,
+            state_functions_module.__file__,
+            board_module.__file__,
+            decks_module.__file__,
+            enums.__file__,
+            map_module.__file__,
+            player_module.__file__,
+            topology_module.__file__,
+        ],
+    )
+
+
+def build_feature_ordering(num_players, map_type):
     players = [
         SimplePlayer(Color.RED),
         SimplePlayer(Color.BLUE),
@@ -1,5 +1,6 @@
 import json
 
+from catanatron.batch import BatchedGames
 from catanatron.game import Game
 from catanatron.json import GameEncoder
 from catanatron.models.player import Color, SimplePlayer, RandomPlayer
@@ -116,3 +117,14 @@ def test_same_turn_alphabeta_speed(benchmark):
         return game
 
     result = benchmark(_play_game, game)
+
+
+def test_batched_random_playouts_speed(benchmark):
+    colors = [Color.RED, Color.BLUE, Color.WHITE, Color.ORANGE]
+    states = [
+        Game([RandomPlayer(color) for color in colors], seed=seed).state
+        for seed in range(64)
+    ]
+
+    winners = benchmark(lambda: BatchedGames(states, seed=RANDOM_SEED).play())
+    assert len(winners) == 64
@@ -0,0 +1,63 @@
+import pickle
+
+import pytest
+
+from catanatron.game import Game
+from catanatron.models.action_log import ActionLog
+from catanatron.models.enums import Action, ActionType
+from catanatron.models.player import Color, RandomPlayer
+
+
+def roll(value):
+    return Action(Color.RED, ActionType.ROLL, value)
+
+
+def test_action_log_behaves_like_a_list():
+    log = ActionLog()
+    expected = []
+    copies = []
+    for i in range(100):
+        log.append(roll(i))
+        expected.append(roll(i))
+        if i % 3 == 0:
+            copies.append((log.copy(), list(expected)))
+
+    assert log == expected
+    assert len(log) == 100
+    assert [log[i] for i in range(-100, 100)] == expected + expected
+    assert log[10:20] == expected[10:20]
+    with pytest.raises(IndexError):
+        log[100]
+
+    # copies are unaffected by later appends, and vice versa
+    for log_copy, prefix in copies:
+        assert log_copy == prefix
+        log_copy.append(roll(-1))
+    assert log == expected
+
+
+def test_action_log_truncate():
+    log = ActionLog(roll(i) for i in range(10))
+    log_copy = log.copy()
+    log.append(roll(10))
+    log.copy()
+    log.append(roll(11))
+
+    log.truncate(11)
+    assert log == [roll(i) for i in range(11)]
+    log.truncate(5)
+    assert log == [roll(i) for i in range(5)]
+    log.append(roll(-1))
+    assert log == [roll(i) for i in range(5)] + [roll(-1)]
+    assert log_copy == [roll(i) for i in range(10)]
+
+
+def test_game_copies_share_action_log():
+    game = Game([RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)], seed=3)
+    game.play()
+    game_copy = game.copy()
+    assert game_copy.state.actions == game.state.actions
+    assert game_copy.state.actions._frozen is game.state.actions._frozen
+
+    unpickled = pickle.loads(pickle.dumps(game))
+    assert unpickled.state.actions == game.state.actions
@@ -1,3 +1,4 @@
+from catanatron.state_functions import player_num_resource_cards
 from catanatron.state import (
     State,
     build_city,
@@ -14,8 +15,13 @@ from catanatron.models.actions import (
     city_possibilities,
     robber_possibilities,
     maritime_trade_possibilities,
+    get_action_space,
+    encode_action,
+    decode_action,
+    generate_playable_action_ids,
 )
 from catanatron.models.enums import (
+    Action,
     BRICK,
     ORE,
     RESOURCES,
@@ -23,7 +29,9 @@ from catanatron.models.enums import (
     WHEAT,
     WOOD,
 )
-from catanatron.models.player import Color, SimplePlayer
+from catanatron.models.player import Color, RandomPlayer, SimplePlayer
+from catanatron.models.map import build_map
+from catanatron.game import Game
 from catanatron.models.decks import (
     SETTLEMENT_COST_FREQDECK,
     starting_resource_bank,
@@ -137,6 +145,30 @@ def test_robber_possibilities():
     )
 
 
+def test_robber_possibilities_match_buildings_on_tiles():
+    players = [RandomPlayer(color) for color in Color]
+    game = Game(players, seed=3)
+    while game.winning_color() is None:
+        game.play_tick()
+        state, board = game.state, game.state.board
+        for coordinate, tile in board.map.land_tiles.items():
+            colors = {
+                board.buildings[node_id][0]
+                for node_id in tile.nodes.values()
+                if node_id in board.buildings
+            }
+            assert set(board.tile_colors.get(tile.id, ())) == colors
+
+    color = state.current_color()
+    for coordinate, victim, _ in [
+        action.value for action in robber_possibilities(state, color)
+    ]:
+        assert coordinate != board.robber_coordinate
+        assert victim is None or (
+            victim != color and player_num_resource_cards(state, victim) > 0
+        )
+
+
 def test_building_settlement_gives_vp():
     players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
     state = State(players)
@@ -206,6 +238,29 @@ def test_maritime_possibities_respect_bank_not_having_cards():
     assert len(maritime_trade_possibilities(state, player.color)) == 0
 
 
+def test_memoized_possibilities_are_not_shared_lists():
+    player = SimplePlayer(Color.RED)
+    state = State([player])
+    player_deck_replenish(state, player.color, WHEAT, 4)
+    possibilities = maritime_trade_possibilities(state, player.color)
+    possibilities.clear()
+    assert len(maritime_trade_possibilities(state, player.color)) == 4
+
+    port_node_id = min(state.board.map.port_nodes[None])  # 3:1 port
+    state.board.build_settlement(Color.RED, port_node_id, initial_build_phase=True)
+    state.resource_freqdeck[BRICK] = 0
+    assert maritime_trade_possibilities(state, player.color) == [
+        Action(Color.RED, ActionType.MARITIME_TRADE, (WHEAT,) * 3 + (None, card))
+        for card in RESOURCES
+        if card not in (WHEAT, BRICK)
+    ]
+
+    actions = year_of_plenty_possibilities(Color.RED, [19, 0, 1, 0, 0])
+    assert actions == year_of_plenty_possibilities(Color.RED, [2, 0, 1, 0, 0])
+    actions.clear()
+    assert len(year_of_plenty_possibilities(Color.RED, [2, 0, 1, 0, 0])) == 4
+
+
 def test_year_of_plenty_same_resource():
     bank = [0, 0, 0, 1, 0]
 
@@ -222,9 +277,42 @@ def test_can_trade_with_port():
     state.board.build_settlement(Color.RED, 26, initial_build_phase=True)
 
     port_tile = state.board.map.tiles[(3, -3, 0)]  # port with node_id=25,26
-    resource_out = port_tile.resource or WHEAT  # type: ignore
+    resource_out = WHEAT if port_tile.resource is None else port_tile.resource
     num_out = 3 if port_tile.resource is None else 2  # type: ignore
     player_deck_replenish(state, Color.RED, resource_out, num_out)
 
     possibilities = maritime_trade_possibilities(state, Color.RED)
     assert len(possibilities) == 4
+
+
+def test_action_encoding_round_trips_playable_actions():
+    players = [
+        RandomPlayer(Color.RED),
+        RandomPlayer(Color.BLUE),
+        RandomPlayer(Color.WHITE),
+    ]
+    game = Game(players, seed=2, catan_map=build_map("MINI"))
+    action_space = get_action_space(game.state)
+    assert len(set(action_space)) == len(action_space)
+    while game.winning_color() is None and game.state.num_turns < 300:
+        action_ids = generate_playable_action_ids(game.state)
+        assert len(set(action_ids)) == len(action_ids)
+        for action_id, action in zip(action_ids, game.state.playable_actions):
+            assert decode_action(game.state, action_id) == action
+
+        action = game.play_tick()  # logged actions encode their decision
+        assert encode_action(game.state, action) < len(action_space)
+
+
+def test_action_encoding_of_trade_responses():
+    state = State([SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)])
+    state.current_trade = (1, 0, 0, 0, 0, 0, 1, 0, 0, 0, 0)
+    enemy = state.colors[1]
+    for action_type, value in [
+        (ActionType.ACCEPT_TRADE, state.current_trade),
+        (ActionType.REJECT_TRADE, state.current_trade),
+        (ActionType.CONFIRM_TRADE, (*state.current_trade[:10], enemy)),
+        (ActionType.CANCEL_TRADE, None),
+    ]:
+        action = Action(state.colors[0], action_type, value)
+        assert decode_action(state, encode_action(state, action)) == action
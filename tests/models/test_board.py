@@ -1,9 +1,10 @@
 import pytest
 
 from catanatron.models.map import MINI_MAP_TEMPLATE, CatanMap
-from catanatron.models.enums import RESOURCES
-from catanatron.models.board import Board, get_node_distances
-from catanatron.models.player import Color
+from catanatron.models.enums import RESOURCES, SETTLEMENT, CITY
+from catanatron.game import Game
+from catanatron.models.board import Board, get_edges, get_node_distances, EDGE_BITS
+from catanatron.models.player import Color, RandomPlayer
 
 
 def test_initial_build_phase_bypasses_restrictions():
@@ -238,6 +239,23 @@ def test_three_connected_components_bc_enemy_cut_road():
     assert len(components) == 3
 
 
+def test_cutting_a_cycle_keeps_one_component():
+    board = Board()
+    board.build_settlement(Color.RED, 3, initial_build_phase=True)
+    for edge in [(3, 4), (4, 5), (5, 0), (0, 1), (1, 2), (2, 3)]:
+        board.build_road(Color.RED, edge)
+    board.build_settlement(Color.BLUE, 21, initial_build_phase=True)
+    board.build_road(Color.BLUE, (21, 16))
+    board.build_road(Color.BLUE, (16, 5))
+    assert board.road_lengths[Color.RED] == 6
+
+    board.build_settlement(Color.BLUE, 5)  # cycle is cut, but still connected
+    assert board.find_connected_components(Color.RED) == [{0, 1, 2, 3, 4, 5}]
+    assert board.component_index(Color.RED, 5) == 0
+    assert board.component_index(Color.RED, 16) is None
+    assert board.road_lengths[Color.RED] == 5
+
+
 def test_connected_components():
     board = Board()
     assert board.find_connected_components(Color.RED) == []
@@ -356,4 +374,99 @@ def test_many_buildings():
     assert len(board.find_connected_components(Color.ORANGE)) == 3
 
 
+def test_copy_on_write_isolates_boards():
+    board = Board()
+    board.build_settlement(Color.RED, 3, initial_build_phase=True)
+    board.build_road(Color.RED, (3, 4))
+    assert (2, 3) in board.buildable_edges(Color.RED)  # populate shared cache
+
+    board_copy = board.copy()
+    assert board_copy.roads is board.roads  # shared until first write
+
+    board_copy.build_road(Color.RED, (3, 2))
+    board_copy.build_settlement(Color.BLUE, 5, initial_build_phase=True)
+    board.build_city(Color.RED, 3)
+
+    assert (3, 2) not in board.roads
+    assert (2, 3) in board.buildable_edges(Color.RED)
+    assert 5 not in board.buildings and 5 in board.board_buildable_ids
+    assert board.find_connected_components(Color.RED) == [{3, 4}]
+    assert board_copy.find_connected_components(Color.RED) == [{2, 3, 4}]
+    assert board_copy.buildings[3] == (Color.RED, SETTLEMENT)
+
+
+def assert_bitboards_match_dicts(board, colors):
+    for color in colors:
+        settlements = cities = roads = network = 0
+        for node_id, (building_color, building_type) in board.buildings.items():
+            if building_color == color and building_type == SETTLEMENT:
+                settlements |= 1 << node_id
+            if building_color == color and building_type == CITY:
+                cities |= 1 << node_id
+        for edge, road_color in board.roads.items():
+            if road_color == color:
+                roads |= EDGE_BITS[edge]
+        for component in board.connected_components[color]:
+            for node_id in component:
+                if not board.is_enemy_node(node_id, color):
+                    network |= 1 << node_id
+        enemy_nodes = board.network_masks[color] & board.enemy_node_mask(color)
+
+        assert board.settlement_masks[color] == settlements
+        assert board.city_masks[color] == cities
+        assert board.road_masks[color] == roads
+        assert board.network_masks[color] & ~enemy_nodes == network
+    assert board.buildable_node_mask == sum(1 << n for n in board.board_buildable_ids)
+
+
+def test_bitboards_match_dict_representation():
+    players = [RandomPlayer(color) for color in [Color.RED, Color.BLUE, Color.WHITE]]
+    game = Game(players, seed=7)
+    while game.winning_color() is None and game.state.num_turns < 200:
+        game.play_tick()
+        assert_bitboards_match_dicts(game.state.board, game.state.colors)
+
+
+def assert_caches_match_recomputation(board, colors):
+    for color in colors:
+        network = set()
+        for component in board.connected_components[color]:
+            network.update(n for n in component if not board.is_enemy_node(n, color))
+        expected_edges = sorted(
+            tuple(sorted(edge))
+            for edge in get_edges(board.map.land_nodes)
+            if edge not in board.roads and (edge[0] in network or edge[1] in network)
+        )
+        expected_ports = {
+            resource
+            for resource, node_ids in board.map.port_nodes.items()
+            if any(board.get_node_color(n) == color for n in node_ids)
+        }
+        assert board.buildable_edges(color) == expected_edges
+        assert board.buildable_node_ids(color) == sorted(
+            network & board.board_buildable_ids
+        )
+        assert board.get_player_port_resources(color) == expected_ports
+
+
+def test_incremental_caches_match_recomputation():
+    players = [RandomPlayer(color) for color in [Color.RED, Color.BLUE, Color.WHITE]]
+    game = Game(players, seed=11)
+    while game.winning_color() is None and game.state.num_turns < 200:
+        game_copy = game.copy()  # shares caches with game
+        game.play_tick()
+        assert_caches_match_recomputation(game.state.board, game.state.colors)
+        assert_caches_match_recomputation(game_copy.state.board, game_copy.state.colors)
+
+
+def test_bitboard_key():
+    board = Board()
+    board_copy = board.copy()
+    assert board.bitboard_key() == board_copy.bitboard_key()
+    assert hash(board.bitboard_key()) == hash(board_copy.bitboard_key())
+
+    board_copy.build_settlement(Color.RED, 3, initial_build_phase=True)
+    assert board.bitboard_key() != board_copy.bitboard_key()
+
+
 # TODO: Test super long road, cut at many places, to yield 5+ component graph
@@ -19,7 +19,7 @@ def test_mini_map_can_be_created():
     assert len(mini.node_production) == 24
 
     resources = [i.resource for i in mini.land_tiles.values()]
-    assert any(isinstance(i, str) for i in resources)
+    assert any(isinstance(i, int) for i in resources)
     assert any(i is None for i in resources)  # theres one desert
 
 
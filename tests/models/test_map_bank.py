@@ -0,0 +1,83 @@
+import pickle
+import random
+
+import pytest
+
+from catanatron.models.map import (
+    BASE_MAP_TEMPLATE,
+    CatanMap,
+    LandTile,
+    Port,
+    initialize_tiles,
+)
+from catanatron.models.map_bank import MapBank, write_map_bank
+from catanatron.models.player import Color, RandomPlayer
+from catanatron_experimental.play import GameConfigOptions, play_batch_core
+from catanatron_gym.envs.catanatron_env import CatanatronEnv
+
+
+def assert_same_map(catan_map, expected):
+    assert catan_map.tiles.keys() == expected.tiles.keys()
+    for coordinate, tile in expected.tiles.items():
+        other = catan_map.tiles[coordinate]
+        assert type(other) == type(tile)
+        assert (other.nodes, other.edges) == (tile.nodes, tile.edges)
+        if isinstance(tile, (LandTile, Port)):
+            assert (other.id, other.resource) == (tile.id, tile.resource)
+        if isinstance(tile, LandTile):
+            assert other.number == tile.number
+    assert catan_map.port_nodes == expected.port_nodes
+    assert catan_map.land_nodes == expected.land_nodes
+    assert catan_map.node_production == expected.node_production
+
+
+def test_map_bank_builds_same_maps_as_initialize_tiles(tmp_path):
+    path = str(tmp_path / "base.bank")
+    write_map_bank(path, "BASE", 20, seed=3)
+    bank = MapBank(path)
+    assert len(bank) == 20
+    assert bank.map_type == "BASE"
+
+    # maps are drawn like CatanMap.from_template does
+    rng = random.Random(3)
+    for map_id in range(20):
+        expected = CatanMap.from_template(BASE_MAP_TEMPLATE, rng)
+        assert_same_map(bank.build_map(map_id), expected)
+        tiles = initialize_tiles(BASE_MAP_TEMPLATE, *bank.shuffles(map_id))
+        assert_same_map(bank.build_map(map_id), CatanMap.from_tiles(tiles))
+
+    with pytest.raises(IndexError):
+        bank.build_map(20)
+    assert pickle.loads(pickle.dumps(bank)).shuffles(7) == bank.shuffles(7)
+
+
+def test_map_bank_rejects_invalid_files(tmp_path):
+    with pytest.raises(ValueError):
+        write_map_bank(str(tmp_path / "tournament.bank"), "TOURNAMENT", 1)
+
+    path = tmp_path / "mini.bank"
+    write_map_bank(str(path), "MINI", 3)
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        MapBank(str(path))
+
+    path.write_bytes(b"not a map bank at all, but long enough")
+    with pytest.raises(ValueError):
+        MapBank(str(path))
+
+
+def test_play_and_gym_use_map_bank(tmp_path):
+    path = str(tmp_path / "mini.bank")
+    write_map_bank(path, "MINI", 2, seed=0)
+    bank = MapBank(path)
+
+    players = [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    games = list(play_batch_core(3, players, GameConfigOptions(map_bank=path)))
+    for i, game in enumerate(games):
+        assert_same_map(game.state.board.map, bank.build_map(i % 2))
+
+    env = CatanatronEnv({"map_bank": path})
+    env.reset(options={"map_id": 1})
+    assert_same_map(env.game.state.board.map, bank.build_map(1))
+    env.reset(seed=0)
+    assert len(env.game.state.board.map.land_tiles) == 7
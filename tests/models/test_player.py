@@ -4,6 +4,7 @@ from catanatron.state import (
     player_can_play_dev,
     player_deck_replenish,
 )
+from catanatron.models.enums import KNIGHT
 from catanatron.models.player import Color, SimplePlayer
 
 
@@ -11,7 +12,7 @@ def test_playable_cards():
     player = SimplePlayer(Color.RED)
 
     state = State([player])
-    player_deck_replenish(state, Color.RED, "KNIGHT")
+    player_deck_replenish(state, Color.RED, KNIGHT)
     player_clean_turn(state, Color.RED)
 
-    assert player_can_play_dev(state, Color.RED, "KNIGHT")
+    assert player_can_play_dev(state, Color.RED, KNIGHT)
@@ -0,0 +1,56 @@
+import pytest
+
+from catanatron.models.map import BASE_MAP_TEMPLATE, CatanMap
+from catanatron.models.topology import (
+    LAND_TOPOLOGIES,
+    STATIC_TOPOLOGY,
+    bfs_distances,
+    build_map_topology,
+    shortest_path,
+)
+
+
+def test_static_topology_size():
+    assert len(STATIC_TOPOLOGY.node_ids) == 96
+    assert len(STATIC_TOPOLOGY.edges) == 132
+    for node_id in STATIC_TOPOLOGY.node_ids:
+        assert len(STATIC_TOPOLOGY.incident_edges[node_id]) == len(
+            STATIC_TOPOLOGY.neighbors[node_id]
+        )
+
+
+def test_land_topologies():
+    assert len(LAND_TOPOLOGIES["BASE"].node_ids) == 54
+    assert len(LAND_TOPOLOGIES["BASE"].edges) == 72
+    assert len(LAND_TOPOLOGIES["MINI"].node_ids) == 24
+    assert len(LAND_TOPOLOGIES["MINI"].edges) == 30
+
+
+def test_topology_matches_networkx_graph():
+    nx = pytest.importorskip("networkx")
+    graph = nx.Graph()
+    for tile in CatanMap.from_template(BASE_MAP_TEMPLATE).tiles.values():
+        graph.add_nodes_from(tile.nodes.values())
+        graph.add_edges_from(tile.edges.values())
+
+    topology = build_map_topology(CatanMap.from_template(BASE_MAP_TEMPLATE))
+    assert list(topology.node_ids) == list(graph.nodes)
+    assert list(topology.edges) == list(graph.edges)
+    for node_id in graph.nodes:
+        assert list(topology.neighbors[node_id]) == list(graph.neighbors(node_id))
+
+    land = LAND_TOPOLOGIES["BASE"]
+    assert list(land.edges) == list(graph.subgraph(range(54)).edges)
+
+
+def test_bfs_distances_and_shortest_path():
+    distances = bfs_distances(STATIC_TOPOLOGY, 3)
+    assert distances[3] == 0
+    assert distances[2] == 1
+    assert distances[29] == 4
+
+    path = shortest_path(STATIC_TOPOLOGY, 3, 29)
+    assert path[0] == 3 and path[-1] == 29
+    assert len(path) == 5
+    for a, b in zip(path, path[1:]):
+        assert b in STATIC_TOPOLOGY.neighbors[a]
@@ -0,0 +1,53 @@
+from catanatron.game import Game
+from catanatron.state import State, apply_action_undoable, undo_action
+from catanatron.models import zobrist
+from catanatron.models.board import Board
+from catanatron.models.player import Color, RandomPlayer, SimplePlayer
+
+
+def test_zobrist_key_verifies_through_game(monkeypatch):
+    monkeypatch.setattr(zobrist, "VERIFY_KEYS", True)
+    players = [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    game = Game(players, seed=5)
+    while game.winning_color() is None and game.state.num_turns < 200:
+        key = game.state.zobrist_key()
+        assert game.copy().state.zobrist_key() == key
+
+        action = game.state.playable_actions[0]
+        _, journal = apply_action_undoable(game.state, action)
+        undo_action(game.state, journal)
+        assert game.state.zobrist_key() == key
+
+        game.play_tick()
+
+
+def test_board_zobrist_ignores_build_order():
+    board1 = Board()
+    board1.build_settlement(Color.RED, 3, initial_build_phase=True)
+    board1.build_road(Color.RED, (3, 4))
+    board1.build_road(Color.RED, (4, 5))
+
+    board2 = Board(board1.map)
+    board2.build_settlement(Color.RED, 3, initial_build_phase=True)
+    board2.build_road(Color.RED, (3, 2))
+    assert board1.zobrist != board2.zobrist
+
+    board2.build_road(Color.RED, (3, 4))
+    board2.build_road(Color.RED, (4, 5))
+    board1.build_road(Color.RED, (2, 3))
+    assert board1.zobrist == board2.zobrist
+    assert board1.zobrist == zobrist.compute_board_zobrist(board1)
+
+
+def test_zobrist_key_sees_robber_and_hands():
+    state = State([SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)])
+    key = state.zobrist_key()
+
+    state_copy = state.copy()
+    state_copy.player_state_array[0] += 1
+    assert state_copy.zobrist_key() != key
+
+    state_copy = state.copy()
+    state_copy.board.robber_coordinate = (0, 0, 0)
+    if state.board.robber_coordinate != (0, 0, 0):
+        assert state_copy.zobrist_key() != key
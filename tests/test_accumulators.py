@@ -1,8 +1,14 @@
+import multiprocessing
+
 from catanatron import ActionType, Color, RandomPlayer, Game, GameAccumulator
 from catanatron.state_functions import get_actual_victory_points
 from catanatron.game import TURNS_LIMIT
 from catanatron_experimental import SimulationAccumulator
-from catanatron_experimental.play import GameConfigOptions, play_batch_core
+from catanatron_experimental.play import (
+    GameConfigOptions,
+    play_batch,
+    play_batch_core,
+)
 
 
 def test_accumulators():
@@ -84,3 +90,35 @@ def test_simulation_accumulator():
     ]
 
     assert MySimAccumulator.after_all_num_games == 2
+
+
+def test_parallel_play_batch_matches_sequential():
+    players = [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    game_config = GameConfigOptions(catan_map="MINI", vps_to_win=6, seed=7)
+    wins, results_by_player, games = play_batch(
+        6, players, game_config=game_config, quiet=True
+    )
+    parallel_wins, parallel_results_by_player, parallel_games = play_batch(
+        6, players, game_config=game_config, quiet=True, workers=3
+    )
+
+    assert parallel_wins == wins
+    assert len(games) == sum(wins.values())
+    assert parallel_games == []  # workers don't send Games back
+    for color, results in results_by_player.items():
+        assert sorted(parallel_results_by_player[color]) == sorted(results)
+
+
+class PoolPlayer(RandomPlayer):
+    """Starts a process pool, like GreedyPlayoutsPlayer's playouts"""
+
+    def reset_state(self):
+        with multiprocessing.Pool(1) as pool:
+            assert pool.map(abs, [-1]) == [1]
+
+
+def test_parallel_play_batch_allows_players_with_processes():
+    players = [PoolPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    game_config = GameConfigOptions(catan_map="MINI", vps_to_win=6, seed=7)
+    wins, _, _ = play_batch(2, players, game_config=game_config, quiet=True, workers=2)
+    assert sum(wins.values()) <= 2
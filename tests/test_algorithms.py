@@ -181,6 +181,23 @@ def test_largest_army_calculation_on_tie():
     assert color is Color.BLUE and count == 4
 
 
+def test_longest_road_on_cycle():
+    board = Board()
+
+    board.build_settlement(Color.RED, 0, initial_build_phase=True)
+    board.build_road(Color.RED, (0, 1))
+    board.build_road(Color.RED, (1, 2))
+    board.build_road(Color.RED, (2, 3))
+    board.build_road(Color.RED, (3, 4))
+    board.build_road(Color.RED, (4, 5))
+    assert board.road_lengths[Color.RED] == 5
+    board.build_road(Color.RED, (5, 0))  # closes the hexagon; no dead ends
+
+    assert board.road_lengths[Color.RED] == 6
+    assert board.road_color == Color.RED
+    assert len(board.continuous_roads_by_player(Color.RED)[0]) == 6
+
+
 def test_cut_but_not_disconnected():
     board = Board()
 
@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+
+from catanatron.game import Game
+from catanatron.models.actions import generate_playable_action_ids
+from catanatron.models.enums import ActionType
+from catanatron.models.decks import freqdeck_from_listdeck
+from catanatron.models.map import build_map
+from catanatron.models.player import Color, RandomPlayer
+from catanatron.players.weighted_random import WeightedRandomPlayer
+from catanatron.state import apply_action
+from catanatron.batch import BatchedGames, random_policy, weighted_policy
+
+
+def assert_same_state(games, g, state):
+    assert games.player_state[g].ravel().tolist() == state.player_state_array
+    assert games.bank[g].tolist() == state.resource_freqdeck
+    # (replaying BUY_DEVELOPMENT_CARDs draws the logged card, not the top one)
+    deck = games.development_deck[g, : games.development_deck_size[g]]
+    assert sorted(deck.tolist()) == sorted(state.development_listdeck)
+    assert games.current_player[g] == state.current_player_index
+    assert games.current_turn[g] == state.current_turn_index
+    assert games.num_turns[g] == state.num_turns
+    assert games.is_road_building[g] == state.is_road_building
+    assert games.is_discarding[g] == state.is_discarding
+    assert games.is_moving_knight[g] == state.is_moving_knight
+    coordinate = games.land_coordinates[games.robber[g]]
+    assert coordinate == state.board.robber_coordinate
+
+    buildings = {
+        games.land_node_ids[i]: (state.colors[owner], games.node_building[g, i])
+        for i, owner in enumerate(games.node_owner[g])
+        if owner != -1
+    }
+    assert buildings == state.board.buildings
+    roads = {
+        edge: state.colors[owner]
+        for edge, owner in zip(games.land_edges, games.edge_owner[g])
+        if owner != -1
+    }
+    assert roads == {(a, b): c for (a, b), c in state.board.roads.items() if a < b}
+
+
+def replay_in_lockstep(finished_games):
+    """Steps a batch through the logs of finished_games, checking it
+    reaches the same states and playable actions along the way."""
+    replays = [game.copy() for game in finished_games]
+    for game in finished_games:
+        game.play()
+    logs = [
+        game.state.actions[len(replay.state.actions) :]
+        for game, replay in zip(finished_games, replays)
+    ]
+    games = BatchedGames([game.state for game in replays])
+
+    for step in range(max(len(log) for log in logs)):
+        mask = games.legal_mask()
+        columns = np.zeros(games.num_games, np.int64)
+        dice = np.zeros((games.num_games, 2), np.int64)
+        stolen = np.zeros(games.num_games, np.int64)
+        discarded = np.zeros((games.num_games, 5), np.int64)
+        for g, (replay, log) in enumerate(zip(replays, logs)):
+            assert games.done[g] == (step >= len(log))
+            if step >= len(log):
+                continue
+
+            offset = games.current_player[g] * games.block_size
+            expected = sorted(generate_playable_action_ids(replay.state))
+            assert (np.flatnonzero(mask[g]) + offset).tolist() == expected
+
+            action = log[step]
+            columns[g] = games.column(g, action)
+            if action.action_type == ActionType.ROLL:
+                dice[g] = action.value
+            elif action.action_type == ActionType.MOVE_ROBBER and action.value[1]:
+                stolen[g] = action.value[2]
+            elif action.action_type == ActionType.DISCARD:
+                discarded[g] = freqdeck_from_listdeck(action.value)
+            apply_action(replay.state, action)
+
+        games.step(columns, dice, stolen, discarded)
+        for g, replay in enumerate(replays):
+            if step < len(logs[g]):
+                assert_same_state(games, g, replay.state)
+
+    assert games.winning_colors() == [game.winning_color() for game in finished_games]
+
+
+def test_batch_replays_scalar_games():
+    colors = [Color.RED, Color.BLUE, Color.WHITE, Color.ORANGE]
+    finished_games = [
+        Game([RandomPlayer(color) for color in colors], seed=seed) for seed in range(3)
+    ]
+    finished_games.append(
+        Game([WeightedRandomPlayer(color) for color in colors], seed=3)
+    )
+    # batches can also start from the middle of a game
+    for _ in range(300):
+        finished_games[-1].play_tick()
+    replay_in_lockstep(finished_games)
+
+
+def test_batch_replays_mini_map_games():
+    colors = [Color.RED, Color.BLUE]
+    finished_games = [
+        Game([RandomPlayer(c) for c in colors], seed=s, catan_map=build_map("MINI"))
+        for s in range(2)
+    ]
+    replay_in_lockstep(finished_games)
+
+
+def test_batch_plays_to_completion():
+    colors = [Color.RED, Color.BLUE, Color.WHITE]
+    states = [Game([RandomPlayer(c) for c in colors], seed=s).state for s in range(8)]
+    games = BatchedGames(states, seed=0)
+
+    weights = {ActionType.BUILD_CITY: 10000, ActionType.BUILD_SETTLEMENT: 1000}
+    winners = games.play(weighted_policy(weights))
+    assert np.all(games.done)
+    assert len(winners) == 8
+    for g, seat in enumerate(winners):
+        if seat != -1:
+            assert games.player_state[g, seat, :].sum() > 0
+    # cards are conserved (random steals and discards)
+    resources = np.sum(games.player_state[:, :, :5], axis=1) + games.bank
+    assert np.all(resources == 19)
+    dev_cards = np.sum(games.player_state[:, :, 5:15], axis=(1, 2))
+    assert np.all(dev_cards + games.development_deck_size == 25)
+    # the given states are not modified
+    assert all(len(state.actions) == 0 for state in states)
+
+    rerun = BatchedGames(states, seed=0)
+    assert rerun.play(weighted_policy(weights)).tolist() == winners.tolist()
+    assert random_policy(rerun, rerun.legal_mask()).shape == (8,)
+
+
+def test_batch_rejects_mixed_discard_limits():
+    colors = [Color.RED, Color.BLUE]
+    states = [
+        Game([RandomPlayer(c) for c in colors], seed=0, discard_limit=limit).state
+        for limit in [7, 9]
+    ]
+    with pytest.raises(ValueError):
+        BatchedGames(states)
@@ -0,0 +1,61 @@
+import os
+
+from catanatron import cache
+from catanatron.models import map as map_module
+from catanatron.models.map import (
+    BASE_MAP_TEMPLATE,
+    CatanMap,
+    build_map,
+    get_tournament_map,
+)
+from catanatron.models.topology import (
+    STATIC_TOPOLOGY,
+    LAND_TOPOLOGIES,
+    build_map_topology,
+)
+
+
+def test_cached_table(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    source = tmp_path / "source.py"
+    source.write_text("TABLE = 1")
+    calls = []
+
+    def build():
+        calls.append(None)
+        return {"edges": ((0, 1), (1, 2)), "names": ["a", "b"]}
+
+    table = cache.cached_table("table", build, [str(source)])
+    assert cache.cached_table("table", build, [str(source)]) == table
+    assert len(calls) == 1
+
+    # editing a source invalidates the table
+    source.write_text("TABLE = 22")
+    os.utime(source, ns=(0, 0))
+    assert cache.cached_table("table", build, [str(source)]) == table
+    assert len(calls) == 2
+
+    # and corrupt files are rebuilt
+    for path in tmp_path.glob("table-*"):
+        path.write_bytes(b"\x00")
+    assert cache.cached_table("table", build, [str(source)]) == table
+    assert len(calls) == 3
+
+
+def test_cached_table_can_be_disabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", "")
+    assert cache.cached_table("table", lambda: [1, 2], ["does-not-exist"]) == [1, 2]
+
+
+def test_static_tables_match_built_ones():
+    assert STATIC_TOPOLOGY == build_map_topology(
+        CatanMap.from_template(BASE_MAP_TEMPLATE)
+    )
+    assert isinstance(STATIC_TOPOLOGY.neighbors[0], tuple)
+
+
+def test_tournament_map_is_built_lazily_once():
+    assert map_module.TOURNAMENT_MAP is get_tournament_map()
+    assert build_map("TOURNAMENT") is get_tournament_map()
+    assert map_module.TOURNAMENT_MAP_TILES is get_tournament_map().tiles
+    assert len(LAND_TOPOLOGIES["TOURNAMENT"].node_ids) == 54
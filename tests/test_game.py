@@ -1,10 +1,14 @@
+import random
 import pytest
 from unittest.mock import MagicMock, patch
 
 from catanatron.state_functions import (
+    build_settlement,
     get_actual_victory_points,
     get_player_freqdeck,
+    maintain_longest_road,
     player_has_rolled,
+    player_roll,
 )
 from catanatron.game import Game, is_valid_trade
 from catanatron.state import (
@@ -30,6 +34,8 @@ from catanatron.models.enums import (
     ROAD_BUILDING,
 )
 from catanatron.models.player import Color, RandomPlayer, SimplePlayer
+from catanatron.players.search import VictoryPointPlayer
+from catanatron.players.weighted_random import WeightedRandomPlayer
 
 
 def test_initial_build_phase():
@@ -107,6 +113,85 @@ def test_can_play_for_a_bit():  # assert no exception thrown
         game.play_tick()
 
 
+def test_seeded_games_are_reproducible_when_interleaved():
+    colors = [Color.RED, Color.BLUE, Color.WHITE]
+    game1 = Game([RandomPlayer(color) for color in colors], seed=7)
+    game2 = Game([RandomPlayer(color) for color in colors], seed=7)
+    other = Game([RandomPlayer(color) for color in colors], seed=8)
+    while game1.winning_color() is None and game1.state.num_turns < 300:
+        game1.play_tick()
+        other.play_tick()
+        random.random()  # the random module doesn't affect games
+    game2.play()
+
+    assert game1.state.actions == game2.state.actions[: len(game1.state.actions)]
+    assert game1.state.actions != other.state.actions
+
+
+def test_copies_fork_the_random_number_generator():
+    game = Game([RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)], seed=1)
+    for _ in range(30):
+        game.play_tick()
+
+    game_copy = game.copy()
+    game.play()
+    game_copy.play()
+    assert game_copy.state.actions == game.state.actions
+    assert game_copy.state.rng is not game.state.rng
+
+
+def test_turbo_play_matches_normal_play():
+    for seed in range(5):
+        players = [
+            RandomPlayer(Color.RED),
+            WeightedRandomPlayer(Color.BLUE),
+            VictoryPointPlayer(Color.WHITE),
+        ]
+        game = Game(players, seed=seed)
+        turbo_game = Game(players, seed=seed)
+        assert turbo_game.play(turbo=True) == game.play()
+
+        assert turbo_game.state.num_turns == game.state.num_turns
+        assert turbo_game.state.player_state_array == game.state.player_state_array
+        assert turbo_game.state.board.buildings == game.state.board.buildings
+        assert len(turbo_game.state.actions) == 0
+
+    with pytest.raises(ValueError):
+        Game(players).play(accumulators=[MagicMock()], turbo=True)
+
+
+def test_turbo_play_stops_when_a_cut_road_hands_over_the_win():
+    # In these, a settlement cuts a road, giving Longest Road (and the win) to
+    # a player other than the one building it.
+    for seed in [361, 487, 500]:
+        players = [RandomPlayer(color) for color in Color]
+        game = Game(players, seed=seed)
+        turbo_game = Game(players, seed=seed)
+        assert turbo_game.play(turbo=True) == game.play()
+        assert turbo_game.state.num_turns == game.state.num_turns
+
+
+def test_engine_stats():
+    players = [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    assert Game(players).stats() is None
+
+    game = Game(players, seed=0, collect_stats=True)
+    game.play()
+    game.copy().play_tick()  # copies add to the same stats
+    stats = game.stats().to_dict()
+
+    num_actions = len(game.state.actions) + 1
+    assert sum(e["count"] for e in stats["apply_action"].values()) == num_actions
+    assert stats["apply_action"]["ROLL"]["count"] == sum(
+        a.action_type == ActionType.ROLL for a in game.state.actions
+    )
+    assert stats["generate_playable_actions"]["BUILD_INITIAL_SETTLEMENT"]["count"] == 4
+    assert stats["game"]["copy"]["count"] == 1
+    assert stats["longest_road"]["road"]["count"] > 0
+    assert stats["yield_resources"]["roll"]["count"] > 0
+    assert "apply_action" in game.stats().report()
+
+
 @patch("catanatron.state.roll_dice")
 def test_seven_cards_dont_trigger_discarding(fake_roll_dice):
     fake_roll_dice.return_value = (1, 6)
@@ -354,28 +439,26 @@ def test_longest_road_steal():
 
     # p0 has a road of length 4
     board.build_settlement(p0.color, 6, True)
+    build_settlement(game.state, p0.color, 6, True)
     board.build_road(p0.color, (6, 7))
     board.build_road(p0.color, (7, 8))
     board.build_road(p0.color, (8, 9))
     board.build_road(p0.color, (9, 10))
-    game.state.player_state[f'{p0_key}_VICTORY_POINTS'] = 1
-    game.state.player_state[f'{p0_key}_ACTUAL_VICTORY_POINTS'] = 1
 
     # p1 has longest road of lenght 5
     board.build_settlement(p1.color, 28, True)
+    build_settlement(game.state, p1.color, 28, True)
     board.build_road(p1.color, (27, 28))
     board.build_road(p1.color, (28, 29))
     board.build_road(p1.color, (29, 30))
     board.build_road(p1.color, (30, 31))
     board.build_road(p1.color, (31, 32))
-    game.state.player_state[f'{p1_key}_VICTORY_POINTS'] = 3
-    game.state.player_state[f'{p1_key}_ACTUAL_VICTORY_POINTS'] = 3
-    game.state.player_state[f'{p1_key}_HAS_ROAD'] = True
+    maintain_longest_road(game.state, None, p1.color, {p1.color: 5})
 
     # Required to be able to apply actions other than rolling or initial build phase.
     game.state.current_prompt = ActionPrompt.PLAY_TURN
     game.state.is_initial_build_phase = False
-    game.state.player_state[f'{p0_key}_HAS_ROLLED'] = True
+    player_roll(game.state, p0.color)
     game.state.playable_actions = generate_playable_actions(game.state)
 
     # Set up player0 to build two roads and steal longest road.
@@ -1,7 +1,7 @@
 import json
 
 from catanatron.game import Game
-from catanatron.models.enums import ActionType
+from catanatron.models.enums import ORE, SHEEP, ActionType
 from catanatron.models.player import SimplePlayer, Color
 from catanatron.json import GameEncoder, action_from_json
 
@@ -32,4 +32,4 @@ def test_action_from_json():
     action = action_from_json(data)
     assert action.color == Color.RED
     assert action.action_type == ActionType.MARITIME_TRADE
-    assert action.value == ("SHEEP", "SHEEP", "SHEEP", "SHEEP", "ORE")
+    assert action.value == (SHEEP, SHEEP, SHEEP, SHEEP, ORE)
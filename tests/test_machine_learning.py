@@ -5,7 +5,7 @@ import numpy as np
 
 from tests.utils import advance_to_play_turn, build_initial_placements
 from catanatron.state import player_deck_replenish
-from catanatron.models.enums import ORE, Action, ActionType, WHEAT
+from catanatron.models.enums import CARD_NAMES, ORE, Action, ActionType, WHEAT
 from catanatron.models.board import Board, get_edges
 from catanatron.models.map import (
     BASE_MAP_TEMPLATE,
@@ -14,10 +14,13 @@ from catanatron.models.map import (
     NUM_NODES,
     CatanMap,
     NodeRef,
+    build_map,
 )
 from catanatron.game import Game
 from catanatron.models.map import number_probability
-from catanatron.models.player import SimplePlayer, Color
+from catanatron.models.player import RandomPlayer, SimplePlayer, Color
+from catanatron_experimental.machine_learning.players.mcts import MCTSPlayer
+from catanatron_experimental.machine_learning.players.playouts import run_playouts
 from catanatron_gym.features import (
     create_sample,
     expansion_features,
@@ -65,7 +68,7 @@ def test_port_distance_features():
 
     ports = game.state.board.map.port_nodes
     se_port_resource = next(filter(lambda entry: 29 in entry[1], ports.items()))[0]
-    port_name = "3:1" if se_port_resource is None else se_port_resource
+    port_name = "3:1" if se_port_resource is None else CARD_NAMES[se_port_resource]
 
     features = port_distance_features(game, color)
     assert features["P0_HAS_WHEAT_PORT"] == False
@@ -79,9 +82,8 @@ def test_resource_hand_features():
     ]
     game = Game(players)
 
-    red_index = game.state.color_to_index[Color.RED]
-    game.state.player_state[f"P{red_index}_WHEAT_IN_HAND"] = 20
-    player_deck_replenish(game.state, Color.BLUE, "ORE", 17)
+    player_deck_replenish(game.state, Color.RED, WHEAT, 20)
+    player_deck_replenish(game.state, Color.BLUE, ORE, 17)
 
     features = resource_hand_features(game, Color.RED)
     assert features["P0_WHEAT_IN_HAND"] == 20
@@ -110,6 +112,7 @@ def test_expansion_features():
 
     features = expansion_features(game, color)
     assert features["P0_WHEAT_AT_DISTANCE_0"] == 0
+    neighbor_tile_resource = CARD_NAMES[neighbor_tile_resource]
     assert features[f"P0_{neighbor_tile_resource}_AT_DISTANCE_0"] == 0
     assert features[f"P0_{neighbor_tile_resource}_AT_DISTANCE_1"] > 0
 
@@ -187,7 +190,7 @@ def test_tile_features():
     features = tile_features(game, players[0].color)
     tile = game.state.board.map.land_tiles[(0, 0, 0)]
     resource = tile.resource
-    value = resource if resource is not None else "DESERT"
+    value = CARD_NAMES[resource] if resource is not None else "DESERT"
     proba = number_probability(tile.number) if resource is not None else 0
     assert features[f"TILE0_IS_{value}"]
     assert features[f"TILE0_PROBA"] == proba
@@ -496,3 +499,16 @@ def test_iter_players():
     i, c = iterator[3]
     assert i == 3
     assert c == game.state.colors[3]
+
+
+def test_seeded_playouts_are_reproducible():
+    def play(seed, module_seed):
+        random.seed(module_seed)  # the random module doesn't affect playouts
+        players = [MCTSPlayer(Color.RED, 2), RandomPlayer(Color.BLUE)]
+        catan_map = build_map("MINI", random.Random(seed))
+        game = Game(players, seed=seed, catan_map=catan_map, vps_to_win=4)
+        for _ in range(20):
+            game.play_tick()
+        return game.state.actions, run_playouts(game, 10)
+
+    assert play(3, module_seed=1) == play(3, module_seed=2)
@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+
+from catanatron.models.player import Color
+from catanatron.snapshot import load_game
+from catanatron_experimental.cli.cli_players import build_players
+from catanatron_experimental.play import GameConfigOptions, play_batch
+from catanatron_experimental.sharding import (
+    merge,
+    plan,
+    read_game_logs,
+    run_shard,
+    shard_path,
+)
+
+
+def test_sharded_experiment_matches_play_batch(tmp_path):
+    directory = str(tmp_path / "experiment")
+    game_config = GameConfigOptions(catan_map="MINI", vps_to_win=6)
+    manifest = plan(directory, ["R,W", "W,R"], 7, 3, game_config, seed=11)
+    assert len(manifest["shards"]) == 6
+    assert [game[:2] for game in manifest["shards"][1]["games"]] == [
+        [1, 12],
+        [4, 15],
+    ]
+    with pytest.raises(ValueError):
+        plan(directory, ["R,W"], 7, 3, game_config, seed=11)
+    for shard_id in [-1, 6]:
+        with pytest.raises(ValueError):
+            run_shard(directory, shard_id)
+
+    for shard_id in [0, 1, 2]:
+        run_shard(directory, shard_id, logs=shard_id == 1)
+    results = merge(directory)
+    assert results["missing_shards"] == [3, 4, 5]
+    assert results["lineups"][1]["summary"]["num_games"] == 0
+
+    wins, results_by_player, _ = play_batch(
+        7,
+        build_players("R,W"),
+        game_config=GameConfigOptions(catan_map="MINI", vps_to_win=6, seed=11),
+        quiet=True,
+    )
+    summary = results["lineups"][0]["summary"]
+    assert summary["num_games"] == 7
+    for color in [Color.RED, Color.BLUE]:
+        stats = summary["players"][color.value]
+        assert stats["wins"] == wins.get(color, 0)
+        vps = results_by_player[color]
+        assert stats["avg_vp"] == pytest.approx(sum(vps) / len(vps))
+
+    games = [
+        load_game(data) for data in read_game_logs(shard_path(directory, 1, "games"))
+    ]
+    assert [game.seed for game in games] == [12, 15]
+
+    # merging again (e.g. as more shards come in) recomputes the same tables
+    with open(os.path.join(directory, "results.json")) as f:
+        assert json.load(f) == results
+    assert merge(directory) == results
+
+
+def test_run_shard_plays_the_games_of_the_manifest(tmp_path):
+    directory = str(tmp_path / "experiment")
+    game_config = GameConfigOptions(catan_map="MINI", vps_to_win=6)
+    plan(directory, ["R,W"], 4, 2, game_config, seed=11)
+    path = os.path.join(directory, "manifest.json")
+    with open(path) as f:
+        manifest = json.load(f)
+    manifest["shards"][0]["games"] = [[0, 100, None], [2, 50, None]]
+    with open(path, "w") as f:
+        json.dump(manifest, f)
+
+    result = run_shard(directory, 0)
+    assert [(game["index"], game["seed"]) for game in result["games"]] == [
+        (0, 100),
+        (2, 50),
+    ]
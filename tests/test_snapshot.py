@@ -0,0 +1,139 @@
+import pickle
+
+import pytest
+
+from catanatron.game import Game
+from catanatron.models.map import CatanMap, build_map
+from catanatron.models.player import Color, RandomPlayer
+from catanatron.snapshot import dump_game, dump_state, load_game, load_state
+
+
+def nonzero(mapping):
+    return {key: value for key, value in mapping.items() if value}
+
+
+def assert_same_state(state, expected):
+    assert state.zobrist_key() == expected.zobrist_key()
+    assert state.board.bitboard_key() == expected.board.bitboard_key()
+    assert state.player_state_array == expected.player_state_array
+    assert state.player_state == expected.player_state
+    assert state.playable_actions == expected.playable_actions
+    for attribute in [
+        "colors",
+        "resource_freqdeck",
+        "development_listdeck",
+        "buildings_by_color",
+        "num_turns",
+        "current_prompt",
+        "current_trade",
+        "acceptees",
+        "is_initial_build_phase",
+        "is_discarding",
+        "is_moving_knight",
+        "free_roads_available",
+    ]:
+        assert getattr(state, attribute) == getattr(expected, attribute), attribute
+
+    board, expected_board = state.board, expected.board
+    assert [
+        (coordinate, type(tile), getattr(tile, "resource", None))
+        for coordinate, tile in board.map.tiles.items()
+    ] == [
+        (coordinate, type(tile), getattr(tile, "resource", None))
+        for coordinate, tile in expected_board.map.tiles.items()
+    ]
+    assert board.map.node_production == expected_board.map.node_production
+    for attribute in [
+        "buildings",
+        "roads",
+        "payouts",
+        "tile_colors",
+        "board_buildable_ids",
+        "buildable_node_mask",
+        "road_color",
+        "road_length",
+        "robber_coordinate",
+        "zobrist",
+    ]:
+        assert getattr(board, attribute) == getattr(expected_board, attribute)
+    assert list(board.road_lengths.items()) == list(expected_board.road_lengths.items())
+    for attribute in ["connected_components", "network_masks", "buildable_edge_masks"]:
+        assert nonzero(getattr(board, attribute)) == nonzero(
+            getattr(expected_board, attribute)
+        )
+
+
+def test_snapshots_carry_on_like_the_saved_state():
+    players = [RandomPlayer(color) for color in Color]
+    game = Game(players, seed=4)
+    num_ticks = 0
+    while game.winning_color() is None:
+        game.play_tick()
+        num_ticks += 1
+        if num_ticks % 50 != 0:
+            continue
+
+        state = load_state(dump_state(game.state), players)
+        assert_same_state(state, game.state)
+        assert state.actions == game.state.actions
+        assert state.players == game.state.players
+
+        # same generator state, so both play on the same way
+        game_copy = game.copy()
+        loaded_game = Game(players, initialize=False)
+        loaded_game.vps_to_win = game.vps_to_win
+        loaded_game.state = state
+        for _ in range(30):
+            assert loaded_game.play_tick() == game_copy.play_tick()
+
+
+def test_snapshots_without_actions():
+    players = [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    game = Game(players, seed=1, catan_map=build_map("MINI"))
+    for _ in range(100):
+        game.play_tick()
+    data = dump_state(game.state, actions=False)
+    assert len(data) < len(dump_state(game.state))
+
+    log = list(game.state.actions)
+    for _ in range(10):
+        game.play_tick()
+    state = load_state(data, actions=game.state.actions)
+    assert state.actions == log
+    assert len(state.board.map.land_tiles) == 7
+    assert len(load_state(data).actions) == 0
+    assert state.players == []
+
+
+def test_game_snapshots():
+    players = [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    game = Game(
+        players, seed=-(2**70), vps_to_win=6, catan_map=build_map("TOURNAMENT")
+    )
+    game.play()
+    game.state.is_resolving_trade = True
+    game.state.current_trade = (1, 0, 0, 0, 0, 0, 2, 0, 0, 0, 1)
+    game.state.acceptees = (False, True)
+
+    data = dump_game(game)
+    assert len(data) < len(pickle.dumps(game, pickle.HIGHEST_PROTOCOL)) / 2
+    loaded = load_game(data, players)
+    assert (loaded.id, loaded.seed, loaded.vps_to_win) == (game.id, -(2**70), 6)
+    assert loaded.winning_color() == game.winning_color()
+    assert loaded.state.is_resolving_trade
+    assert_same_state(loaded.state, game.state)
+    assert loaded.stats() is None
+    assert load_game(data, players, collect_stats=True).stats() is not None
+
+    with pytest.raises(ValueError):
+        load_state(data)
+    with pytest.raises(ValueError):
+        load_game(data[:-1])
+
+
+def test_snapshots_reject_unsupported_maps():
+    tiles = dict(build_map("BASE").tiles)
+    tiles.popitem()
+    game = Game([RandomPlayer(Color.RED)], catan_map=CatanMap.from_tiles(tiles))
+    with pytest.raises(ValueError):
+        dump_state(game.state)
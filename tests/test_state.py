@@ -1,6 +1,13 @@
 import pytest
 
-from catanatron.state import State, apply_action
+from catanatron.game import Game
+from catanatron.state import (
+    PLAYER_INITIAL_STATE,
+    State,
+    apply_action,
+    apply_action_undoable,
+    undo_action,
+)
 from catanatron.state_functions import (
     get_dev_cards_in_hand,
     player_freqdeck_add,
@@ -22,8 +29,9 @@ from catanatron.models.enums import (
     WOOD,
     YEAR_OF_PLENTY,
 )
-from catanatron.models.player import Color, SimplePlayer
+from catanatron.models.player import Color, RandomPlayer, SimplePlayer
 from catanatron.models.decks import freqdeck_count, freqdeck_from_listdeck
+from catanatron.models.actions import generate_playable_actions
 
 
 def test_buying_road_is_payed_for():
@@ -192,3 +200,105 @@ def test_sequence():
     assert Action(p0_color, ActionType.BUILD_SETTLEMENT, 50) in state.playable_actions
 
     apply_action(state, state.playable_actions[0])
+
+
+def test_player_state_view_reads_from_array():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    state = State(players)
+
+    player_deck_replenish(state, Color.BLUE, WHEAT, 3)
+    key = f"P{state.color_to_index[Color.BLUE]}"
+    assert state.player_state[f"{key}_WHEAT_IN_HAND"] == 3
+    assert state.player_state[f"{key}_ROADS_AVAILABLE"] == 15
+    assert state.player_state[f"{key}_HAS_ROLLED"] is False
+    assert len(dict(state.player_state)) == 2 * len(PLAYER_INITIAL_STATE)
+    assert set(dict(state.player_state)) == {
+        f"P{i}_{field}" for i in range(2) for field in PLAYER_INITIAL_STATE
+    }
+
+
+def test_state_copy_does_not_share_player_state():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    state = State(players)
+    state_copy = state.copy()
+
+    player_deck_replenish(state_copy, Color.RED, ORE, 2)
+    assert player_num_resource_cards(state, Color.RED, ORE) == 0
+    assert player_num_resource_cards(state_copy, Color.RED, ORE) == 2
+
+
+def test_playable_actions_are_generated_lazily():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    game = Game(players, seed=1)
+    for _ in range(20):
+        action = game.state.playable_actions[0]
+        apply_action(game.state, action)
+        assert game.state._playable_actions is None
+
+        state_copy = game.state.copy()
+        assert state_copy.playable_actions == generate_playable_actions(game.state)
+        assert game.state._playable_actions is None  # copy computed its own
+
+
+def state_snapshot(state):
+    board = state.board
+    return (
+        list(state.player_state_array),
+        list(state.resource_freqdeck),
+        list(state.development_listdeck),
+        dict(state.buildings_by_color),
+        list(state.actions),
+        state.num_turns,
+        state.current_player_index,
+        state.current_turn_index,
+        state.current_prompt,
+        state.is_initial_build_phase,
+        state.is_discarding,
+        state.is_moving_knight,
+        state.is_road_building,
+        state.free_roads_available,
+        state.is_resolving_trade,
+        state.current_trade,
+        state.acceptees,
+        list(state.playable_actions),
+        dict(board.buildings),
+        dict(board.roads),
+        {c: list(v) for c, v in board.connected_components.items() if v},
+        set(board.board_buildable_ids),
+        {c: v for c, v in board.road_lengths.items() if v},
+        board.road_color,
+        board.road_length,
+        board.robber_coordinate,
+    )
+
+
+def test_undo_action_restores_state_exactly():
+    players = [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    game = Game(players, seed=123)
+    while game.winning_color() is None and game.state.num_turns < 150:
+        before = state_snapshot(game.state)
+        for action in game.state.playable_actions:
+            _, journal = apply_action_undoable(game.state, action)
+            undo_action(game.state, journal)
+            assert state_snapshot(game.state) == before
+        game.play_tick()
+
+
+def test_undo_action_restores_rng():
+    players = [SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)]
+    game = Game(players, seed=123)
+    while game.state.current_prompt != ActionPrompt.PLAY_TURN:
+        game.play_tick()
+    rng_state = game.state.rng.getstate()
+
+    roll = Action(game.state.current_color(), ActionType.ROLL, None)
+    _, journal = apply_action_undoable(game.state, roll)
+    undo_action(game.state, journal)
+
+    assert game.state.rng.getstate() == rng_state
+
+
+def test_player_state_view_is_read_only():
+    state = State([SimplePlayer(Color.RED), SimplePlayer(Color.BLUE)])
+    with pytest.raises(TypeError):
+        state.player_state["P0_WOOD_IN_HAND"] = 3
@@ -1,6 +1,7 @@
+from catanatron.game import Game
 from catanatron.state import yield_resources
 from catanatron.models.board import Board
-from catanatron.models.player import Color
+from catanatron.models.player import Color, RandomPlayer
 from catanatron.models.decks import (
     freqdeck_count,
     freqdeck_draw,
@@ -92,3 +93,25 @@ def test_empty_payout_if_not_enough_resources():
     assert (
         Color.RED not in payout or freqdeck_count(payout[Color.RED], tile.resource) == 0  # type: ignore
     )
+
+
+def test_payouts_table_matches_tile_scan():
+    players = [RandomPlayer(Color.RED), RandomPlayer(Color.BLUE)]
+    game = Game(players, seed=3)
+    while game.winning_color() is None and game.state.num_turns < 200:
+        game.play_tick()
+        board = game.state.board
+        for number in range(2, 13):
+            expected = {}
+            for coordinate, tile in board.map.land_tiles.items():
+                if tile.number != number or board.robber_coordinate == coordinate:
+                    continue
+                for node_id in tile.nodes.values():
+                    if node_id in board.buildings:
+                        color, building_type = board.buildings[node_id]
+                        expected.setdefault(color, [0, 0, 0, 0, 0])
+                        expected[color][tile.resource] += building_type
+
+            payout, depleted = yield_resources(board, starting_resource_bank(), number)
+            assert len(depleted) == 0
+            assert payout == expected